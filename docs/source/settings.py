@@ -35,6 +35,21 @@ central_pixel = True
 # variables will be written to the netCDF file.
 complete_product = False
 
+# Compression and chunking of the written products: "fast" (no compression),
+# "balanced" or "archive" (highest compression). Default to "balanced".
+write_profile = "balanced"
+
+# Format of the written products: "netcdf" writes one file per half-orbit,
+# "zarr" writes one store per cycle containing one group per half-orbit and
+# requires the zarr and numcodecs packages. Default to "netcdf".
+output_format = "netcdf"
+
+# Floating point type used to compute and store the errors, the SSH and the
+# SWH: "float32" halves the memory used by each half-orbit. The products are
+# packed with a scale factor of 1e-4, which single precision represents
+# without loss. Default to "float64".
+precision = "float64"
+
 # Distance, in km, between the nadir and the center of the first pixel of the
 # swath
 half_gap = 2.0
@@ -80,6 +95,11 @@ ssh_plugin = swot_simulator.plugins.ssh.AVISO("PATH to AVISO files")
 # directory.
 # #working_directory=
 
+# Directory used to store the data computed once and reused between runs
+# and between the workers of a same node (e.g. the geometry of the passes). By
+# default, no data is stored on disk.
+# #cache_directory=
+
 # Generation of measurement noise.
 
 # The calculation of roll errors can be simulated, option "roll_phase", or
@@ -97,6 +117,31 @@ noise = [
     'wet_troposphere',
 ]
 
+# Execution of the error generators: "serial" to run them one after the
+# other, "thread" to run them concurrently in a pool of threads of the worker
+# or "dask" to submit them as tasks to the Dask cluster. Default to "thread".
+error_executor = "thread"
+
+# Memory budget, in bytes, of the errors independent of the cycle number
+# (altimeter, baseline dilation, roll/phase, timing and wet troposphere) kept
+# in memory by each worker. These errors are only simulated once per pass
+# and, if the option "cache_directory" is set, also stored on disk. A pass
+# number comes back only one cycle later: by default (None), the errors are
+# kept in memory (1 GiB) only if the option "cache_directory" is set or if
+# the cycles of a pass are simulated in a row (--group-by-pass), otherwise
+# they are not kept in memory.
+error_cache_size = None
+
+# FFT library used to synthesize the random signals of the errors: "numpy",
+# "scipy", "pyfftw" (the FFTW plans are saved in the cache directory, if
+# defined), "mkl" or "auto" to use the MKL if it is installed, otherwise
+# scipy. Default to "auto".
+fft_backend = "auto"
+
+# Number of threads used by a Fourier transform, -1 to use all the cores of
+# the machine. Default to 1.
+fft_threads = 1
+
 # repeat length
 len_repeat = 20000
 
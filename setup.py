@@ -149,12 +149,14 @@ def main():
         entry_points='''
     [console_scripts]
     swot_simulator=swot_simulator.launcher:main
+    swot_simulator_benchmark=swot_simulator.benchmark:main
     ''',
         python_requires='>=3.6',
         install_requires=[
             "python-dateutil", "distributed", "netCDF4", "numba", "numpy",
             "pyinterp", "scipy", "xarray"
         ],
+        extras_require={"zarr": ["numcodecs", "zarr"]},
     )
 
 
@@ -0,0 +1,128 @@
+# Copyright (c) 2020 CNES/JPL
+#
+# All rights reserved. Use of this source code is governed by a
+# BSD-style license that can be found in the LICENSE file.
+"""
+Benchmark of the write profiles
+===============================
+
+Writes a representative pass with each write profile and reports the number
+of bytes written, the compression ratio and the write time.
+"""
+from typing import Dict, List
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from . import orbit_propagator
+from . import product_specification
+
+
+def usage() -> argparse.Namespace:
+    """Parse the options provided on the command line.
+
+    Returns:
+        argparse.Namespace: The parameters provided on the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the write profiles of the products")
+    parser.add_argument("--profile",
+                        help="Write profile to test. Default to all profiles",
+                        choices=list(product_specification.WRITE_PROFILES),
+                        action="append")
+    parser.add_argument("--num-lines",
+                        help="Number of lines of the pass (Default to 9866)",
+                        type=int,
+                        metavar="N",
+                        default=9866)
+    parser.add_argument("--num-pixels",
+                        help="Number of pixels of the swath (Default to 70)",
+                        type=int,
+                        metavar="N",
+                        default=70)
+    parser.add_argument("--product-type",
+                        help="Type of product to write (Default to expert)",
+                        choices=["expert", "basic"],
+                        default="expert")
+    parser.add_argument("--complete-product",
+                        help="Write the complete product",
+                        action="store_true")
+    parser.add_argument("--directory",
+                        help="Directory used to write the products. Default "
+                        "to a temporary directory",
+                        metavar="PATH")
+    return parser.parse_args()
+
+
+def synthetic_pass(num_lines: int, num_pixels: int) -> orbit_propagator.Pass:
+    """Builds a pass with a realistic geometry: a track going from the south
+    to the north, sampled every 2 km."""
+    x_al = np.arange(num_lines, dtype=np.float64) * 2.0
+    half = num_pixels // 2
+    x_ac = np.arange(half, dtype=np.float64) * 2.0 + 11.0
+    x_ac = np.concatenate((-x_ac[::-1], x_ac))
+    lat_nadir = np.linspace(-77.6, 77.6, num_lines)
+    lon_nadir = np.linspace(0.0, 140.0, num_lines)
+    degrees = x_ac / 111.0
+    lat = lat_nadir[:, np.newaxis] + np.zeros(x_ac.shape)
+    lon = lon_nadir[:, np.newaxis] + degrees / np.cos(
+        np.radians(lat_nadir))[:, np.newaxis]
+    timedelta = (x_al / 6.8 * 1e6).astype("timedelta64[us]")
+    track = orbit_propagator.Pass(lat_nadir, lat, lon_nadir, lon, timedelta,
+                                  x_ac, x_al)
+    track.time = np.datetime64("2020-01-01")
+    return track
+
+
+def synthetic_fields(track: orbit_propagator.Pass) -> Dict[str, np.ndarray]:
+    """Builds the SSH and the errors of a pass: a smooth signal and a white
+    noise, representative of the compressibility of the simulated data."""
+    rng = np.random.RandomState(0)
+    shape = track.lon.shape
+    ssh = 0.5 * np.sin(np.radians(track.lat) * 4) * np.cos(
+        np.radians(track.lon) * 3)
+    return dict(ssh=ssh,
+                simulated_error_karin=rng.normal(0, 0.02, shape),
+                simulated_error_baseline_dilation=np.repeat(
+                    rng.normal(0, 0.01, (shape[0], 1)), shape[1], axis=1))
+
+
+def write(track: orbit_propagator.Pass, fields: Dict[str, np.ndarray],
+          path: str, args: argparse.Namespace, profile: str) -> float:
+    """Writes the pass and returns the time spent writing the file"""
+    product = product_specification.Swath(track, False, args.product_type)
+    product.ssh(fields["ssh"])
+    product.update_noise_errors(
+        dict((key, value) for key, value in fields.items() if key != "ssh"))
+    start_time = time.time()
+    product.to_netcdf(1, 1, path, args.complete_product, profile)
+    return time.time() - start_time
+
+
+def main():
+    """Main function"""
+    args = usage()
+    profiles: List[str] = args.profile or list(
+        product_specification.WRITE_PROFILES)
+    track = synthetic_pass(args.num_lines, args.num_pixels)
+    fields = synthetic_fields(track)
+
+    # Size of the data without compression: the size of the fast profile
+    # written without any compression.
+    with tempfile.TemporaryDirectory(dir=args.directory) as tmpdir:
+        path = os.path.join(tmpdir, "reference.nc")
+        write(track, fields, path, args, "fast")
+        reference = os.path.getsize(path)
+
+        print(f"{'profile':<10} {'bytes':>12} {'ratio':>8} {'time (s)':>10}")
+        for profile in profiles:
+            path = os.path.join(tmpdir, f"{profile}.nc")
+            elapsed = write(track, fields, path, args, profile)
+            size = os.path.getsize(path)
+            print(f"{profile:<10} {size:>12d} {reference / size:>8.2f} "
+                  f"{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# Copyright (c) 2020 CNES/JPL
+#
+# All rights reserved. Use of this source code is governed by a
+# BSD-style license that can be found in the LICENSE file.
+"""
+Persistent cache utilities
+--------------------------
+"""
+from typing import Any, Hashable, Optional
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+
+
+def fingerprint(*args: Any) -> str:
+    """Calculates a stable hash of the given items.
+
+    Args:
+        *args: Items to hash. Numpy arrays and bytes are hashed from their
+            contents, other objects from their representation.
+
+    Returns:
+        str: The hexadecimal digest of the items.
+    """
+    hasher = hashlib.sha256()
+    for item in args:
+        if isinstance(item, np.ndarray):
+            hasher.update(f"{item.dtype.str}{item.shape}".encode())
+            hasher.update(np.ascontiguousarray(item).view(np.uint8).data)
+        elif isinstance(item, bytes):
+            hasher.update(item)
+        else:
+            hasher.update(repr(item).encode())
+    return hasher.hexdigest()
+
+
+def save_array(path: str, array: np.ndarray) -> None:
+    """Writes an array in a ``.npy`` file.
+
+    The array is first written in a temporary file, then renamed, so that
+    other processes reading the cache never see a partially written file.
+
+    Args:
+        path (str): Path to the file to create.
+        array (numpy.ndarray): Array to write.
+    """
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=dirname, suffix=".npy")
+    try:
+        with os.fdopen(handle, "wb") as stream:
+            np.save(stream, array)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_array(path: str,
+               mmap_mode: Optional[str] = "r") -> Optional[np.ndarray]:
+    """Loads an array written by :func:`save_array`.
+
+    Args:
+        path (str): Path to the file to read.
+        mmap_mode (str, optional): Memory-map mode used to open the file. By
+            default, the file is mapped read-only, so that the processes
+            running on the same node share the same pages.
+
+    Returns:
+        numpy.ndarray, optional: The array read or None if the file does not
+        exist.
+    """
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+class LRUCache:
+    """Least recently used cache bounded by a memory budget.
+
+    The cache is shared by the threads of a process. It is emptied when
+    serialized: each process builds its own cache.
+
+    Args:
+        max_bytes (int): Maximum number of bytes occupied by the items kept
+            in memory.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return (self.max_bytes, )
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get an item from the cache.
+
+        Args:
+            key (hashable): Key of the item.
+            default (any, optional): Value returned if the item is not in the
+                cache.
+
+        Returns:
+            any: The item or the default value.
+        """
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        """Inserts an item in the cache, evicting the least recently used
+        items if the memory budget is exceeded.
+
+        Args:
+            key (hashable): Key of the item.
+            value (any): Item to store.
+            nbytes (int): Number of bytes occupied by the item. An item
+                larger than the memory budget is not stored.
+        """
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            while self._items and self.nbytes + nbytes > self.max_bytes:
+                self.nbytes -= self._items.popitem(last=False)[1][1]
+            self._items[key] = (value, nbytes)
+            self.nbytes += nbytes
+
+    def clear(self) -> None:
+        """Removes all the items from the cache."""
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
@@ -6,36 +6,110 @@
 Dispatch task on free workers
 =============================
 """
-from typing import Any, Callable, Iterator, List
-import asyncio
+from typing import Any, Callable, Dict, Iterator, List
+import logging
+import time
 import dask.distributed
 
+#: Logger of this module
+LOGGER = logging.getLogger(__name__)
 
-async def _available_workers(client: dask.distributed.Client) -> List[str]:
-    """Get the list of available workers.
+#: Minimum time, in seconds, between two reports of the dispatcher activity.
+REPORT_INTERVAL = 60
 
-    Args:
-        client (dask.distributed.Client): Client connected to the Dask
-        cluster.
 
-    Returns:
-        list: The list of available workers.
+class Statistics:
+    """Activity of the workers handled by the dispatcher.
+
+    Args:
+        workers (list): Addresses of the workers.
     """
-    while True:
-        info = await client.scheduler.identity()
-        result = [
-            k for k, v in info['workers'].items()
-            if v['metrics']['executing'] == 0
-        ]
-        if result:
-            return result
-        await asyncio.sleep(0.1)
-
-
-def compute(client: dask.distributed.Client, func: Callable, seq: Iterator,
-            *args, **kwargs) -> List[Any]:
-    """Distribute the execution of functions to free workers, i.e. those who
-    do not perform any tasks.
+    def __init__(self, workers: List[str]) -> None:
+        now = time.time()
+        #: Date of the start of the processing.
+        self.start = now
+        #: Date of the last report.
+        self.last_report = now
+        #: Number of tasks completed.
+        self.completed = 0
+        #: Time, in seconds, spent by each worker without any task to do.
+        self.idle: Dict[str, float] = dict((item, 0.0) for item in workers)
+        # Date on which each worker became idle.
+        self._idle_since: Dict[str, float] = dict(
+            (item, now) for item in workers)
+
+    def joined(self, worker: str) -> None:
+        """Records that a worker has been added to the cluster"""
+        if worker not in self.idle:
+            self.idle[worker] = 0.0
+            self._idle_since[worker] = time.time()
+
+    def submitted(self, worker: str) -> None:
+        """Records that a task has been submitted to a worker"""
+        since = self._idle_since.pop(worker, None)
+        if since is not None:
+            self.idle[worker] += time.time() - since
+
+    def done(self, worker: str, in_flight: int) -> None:
+        """Records that a worker has completed a task"""
+        self.completed += 1
+        if in_flight == 0:
+            self._idle_since[worker] = time.time()
+
+    def tasks_per_minute(self) -> float:
+        """Get the number of tasks completed per minute.
+
+        A task may cover several passes, or several cycles of a pass,
+        depending on the grouping of the products."""
+        elapsed = time.time() - self.start
+        return self.completed * 60 / elapsed if elapsed else 0.0
+
+    def idle_times(self) -> Dict[str, float]:
+        """Get the time, in seconds, spent by each worker without any task
+        to do, including the current idle period."""
+        now = time.time()
+        result = self.idle.copy()
+        for worker, since in self._idle_since.items():
+            result[worker] += now - since
+        return result
+
+    def report(self, queue_depth: int, force: bool = False) -> None:
+        """Writes the activity of the workers in the log.
+
+        Args:
+            queue_depth (int): Number of tasks submitted and not yet
+                completed.
+            force (bool, optional): True to write the report even if the
+                last one is recent.
+        """
+        now = time.time()
+        if not force and now - self.last_report < REPORT_INTERVAL:
+            return
+        self.last_report = now
+        idle = self.idle_times()
+        LOGGER.info(
+            "%d tasks completed, %.2f tasks/minute, queue depth: %d, "
+            "idle time of the workers: %.2fs total, %.2fs max",
+            self.completed, self.tasks_per_minute(), queue_depth,
+            sum(idle.values()), max(idle.values(), default=0.0))
+        for worker, value in sorted(idle.items()):
+            LOGGER.debug("worker %s idle for %.2fs", worker, value)
+
+def compute(client: dask.distributed.Client,
+            func: Callable,
+            seq: Iterator,
+            *args,
+            tasks_per_worker: int = 2,
+            **kwargs) -> List[Any]:
+    """Distribute the execution of functions to the workers.
+
+    Each worker receives a bounded window of tasks: as soon as a task is
+    completed, the next items of the sequence are submitted to the workers
+    having a free slot, so that the next task is already queued when a
+    worker becomes free. The list of the workers is read again before each
+    refill: the workers added to the cluster receive tasks, and the workers
+    that left no longer do. The workers are only a hint given to the
+    scheduler, which moves the tasks of a lost worker to the others.
 
     Args:
         client (dask.distributed.Client): Client connected to the Dask
@@ -44,38 +118,73 @@ def compute(client: dask.distributed.Client, func: Callable, seq: Iterator,
         seq (iterable): The sequence of arguments handled by ``func``.
         *args, **kwargs : any
             Extra arguments and keyword arguments to pass to ``func``.
+        tasks_per_worker (int, optional): Maximum number of tasks submitted
+            to a worker and not yet completed.
 
     Returns:
         list: The result of the execution of the functions.
     """
+    seq = iter(seq)
+    workers = list(client.scheduler_info()['workers'])
+    if not workers:
+        raise RuntimeError("no worker connected to the cluster")
+    tasks_per_worker = max(tasks_per_worker, 1)
+    in_flight: Dict[str, int] = dict()
+    assigned: Dict[str, str] = dict()
     completed = dask.distributed.as_completed()
-    workers = []
+    statistics = Statistics(workers)
     result = []
-    iterate = True
-    # As long as there is data to traverse in the iterator.
-    while iterate:
-        # As long as there are free workers
-        while completed.count() < len(client.scheduler_info()['workers']):
-            try:
-                if not workers:
-                    workers = client.sync(_available_workers, client)
-                item = next(seq)
-                completed.add(
-                    client.submit(func,
-                                  item,
-                                  *args,
-                                  workers=workers.pop(),
-                                  allow_other_workers=False,
-                                  **kwargs))
-            except StopIteration:
-                iterate = False
-                break
-        # The computation queue is full, we consume the finished jobs to be
-        # able to continue.
-        if iterate:
-            try:
-                result += client.gather(completed.next_batch())
-            except StopIteration:
-                pass
-    result += [item.result() for item in completed]
+
+    def submit(worker: str) -> bool:
+        """Submits the next item of the sequence to the worker. Returns
+        false if the sequence is exhausted."""
+        try:
+            item = next(seq)
+        except StopIteration:
+            return False
+        future = client.submit(func,
+                               item,
+                               *args,
+                               workers=[worker],
+                               allow_other_workers=True,
+                               **kwargs)
+        assigned[future.key] = worker
+        in_flight[worker] += 1
+        statistics.submitted(worker)
+        completed.add(future)
+        return True
+
+    def fill() -> bool:
+        """Fills the window of each worker connected. Returns false if the
+        sequence is exhausted."""
+        workers = list(client.scheduler_info()['workers'])
+        if not workers and not completed.count():
+            # All the workers have left, and no task is pending: waits for
+            # new workers rather than ending the processing.
+            client.wait_for_workers(1)
+            workers = list(client.scheduler_info()['workers'])
+        for worker in workers:
+            if worker not in in_flight:
+                in_flight[worker] = 0
+                statistics.joined(worker)
+        for _ in range(tasks_per_worker):
+            for worker in workers:
+                if in_flight[worker] < tasks_per_worker and not submit(
+                        worker):
+                    return False
+        return True
+
+    exhausted = not fill()
+
+    # Each completed task frees a slot in the window of a worker, which is
+    # immediately refilled.
+    for future in completed:
+        worker = assigned.pop(future.key)
+        in_flight[worker] -= 1
+        result.append(future.result())
+        statistics.done(worker, in_flight[worker])
+        if not exhausted:
+            exhausted = not fill()
+        statistics.report(completed.count())
+    statistics.report(0, force=True)
     return result
@@ -9,6 +9,7 @@ Altimeter instrument error
 from typing import Dict
 import numpy as np
 
+from . import fft
 from . import utils
 from .. import settings
 
@@ -33,6 +34,16 @@ class Altimeter:
         self.psd = psd * 1e-4
         self.freq = freq
 
+        backend = fft.from_parameters(parameters)
+        # The random signal is synthesized once for all the passes.
+        self.signal = utils.Signal1D(self.freq,
+                                     self.psd,
+                                     nseed=self.nseed,
+                                     fmin=1 / self.len_repeat,
+                                     fmax=1 / self.delta_al,
+                                     alpha=10,
+                                     backend=backend)
+
     def generate(self, x_al: np.array) -> Dict[str, np.ndarray]:
         """Generate altimeter instrument error.
 
@@ -44,11 +55,5 @@ class Altimeter:
         """
         # Compute random noise of 10**2 cm**2/(km/cycle)
         # Compute the correspond error on the nadir in m
-        error = utils.gen_signal_1d(self.freq,
-                                    self.psd,
-                                    x_al,
-                                    nseed=self.nseed,
-                                    fmin=1 / self.len_repeat,
-                                    fmax=1 / self.delta_al,
-                                    alpha=10)
+        error = self.signal(x_al)
         return {"simulated_error_altimeter": error}
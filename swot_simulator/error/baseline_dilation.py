@@ -9,6 +9,7 @@ Baseling dilation errors
 from typing import Dict
 import numpy as np
 
+from . import fft
 from . import utils
 from .. import settings
 from .. import VOLUMETRIC_MEAN_RADIUS, BASELINE
@@ -36,6 +37,16 @@ class BaselineDilation:
         self.psbd = dilation_psd
         self.freq = spatial_frequency
 
+        backend = fft.from_parameters(parameters)
+        # The random signal is synthesized once for all the passes.
+        self.signal = utils.Signal1D(self.freq,
+                                     self.psbd,
+                                     nseed=self.nseed,
+                                     fmin=1 / self.len_repeat,
+                                     fmax=1 / (2 * self.delta_al),
+                                     alpha=10,
+                                     backend=backend)
+
         # TODO
         height = parameters.height * 1e-3
         self.conversion_factor = -((1 + height / VOLUMETRIC_MEAN_RADIUS) /
@@ -43,13 +54,7 @@ class BaselineDilation:
 
     def _generate_1d(self, x_al: np.ndarray) -> np.ndarray:
         # Generate 1d baseline dilation using the power spectrum:
-        dil = utils.gen_signal_1d(self.freq,
-                                  self.psbd,
-                                  x_al,
-                                  nseed=self.nseed,
-                                  fmin=1 / self.len_repeat,
-                                  fmax=1 / (2 * self.delta_al),
-                                  alpha=10)
+        dil = self.signal(x_al)
 
         # Compute the associated baseline dilation error on the swath in m
         return self.conversion_factor * dil
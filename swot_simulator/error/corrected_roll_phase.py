@@ -17,41 +17,53 @@ class CorrectedRollPhase:
     """
     Corrected roll errors
 
+    The channels of the dataset are loaded in memory, in a contiguous array,
+    and interpolated together for each pass.
+
     Args:
         parameters (settings.Parameters): Simulation settings
         first_date (numpy.datetime64): Date of the first simulated
             measurement.
     """
+    #: Variables of the dataset loaded, in the order of the rows of the
+    #: array of values.
+    CHANNELS = ("proll_err", "p1phase_err", "p2phase_err", "slope1_est",
+                "slope2_est", "slope1_err", "slope2_err")
+
     def __init__(self, parameters: settings.Parameters,
                  first_date: np.datetime64) -> None:
         with xr.open_dataset(parameters.corrected_roll_phase_dataset) as ds:
             time_date = first_date + (ds.time[:].astype(np.float32) * 86400 *
                                       1000000).astype("timedelta64[us]")
-            self.time_date = time_date.astype('datetime64[us]').astype(
-                'float64') * 0.001
-            self.proll_err = ds.proll_err
-            self.p1phase_err = ds.p1phase_err
-            self.p2phase_err = ds.p2phase_err
-            self.slope1_est = ds.slope1_est
-            self.slope2_est = ds.slope2_est
-            self.slope1_err = ds.slope1_err
-            self.slope2_err = ds.slope2_err
+            self.time_date = np.ascontiguousarray(
+                time_date.astype('datetime64[us]').astype('float64') * 0.001)
+            #: Values of the channels (channel, time)
+            self.values = np.ascontiguousarray(
+                np.vstack(
+                    [ds[item].values.astype("float64")
+                     for item in self.CHANNELS]))
+
+    def _interpolate(self, time: np.ndarray) -> np.ndarray:
+        """Linear interpolation of all the channels at the dates provided.
+        Like numpy.interp, the values outside the time axis are set to the
+        first or the last value."""
+        xp = self.time_date
+        time = np.clip(time, xp[0], xp[-1])
+        # The bracketing indices are searched once for all the channels.
+        index = np.clip(np.searchsorted(xp, time, side="right") - 1, 0,
+                        xp.size - 2)
+        lower = self.values[:, index]
+        upper = self.values[:, index + 1]
+        slope = (upper - lower) / (xp[index + 1] - xp[index])
+        return slope * (time - xp[index]) + lower
 
     def _generate_1d(self, time: np.ndarray
                      ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         time = time.astype('datetime64[us]').astype('float64')
-        phase_l = np.interp(time, self.time_date, self.p1phase_err)
-        phase_r = np.interp(time, self.time_date, self.p2phase_err)
-        phase1d = np.concatenate(([phase_l.T], [phase_r.T]), axis=0)
-        roll = np.interp(time, self.time_date, self.proll_err)
-
-        est_l = np.interp(time, self.time_date, self.slope1_est)
-        err_l = np.interp(time, self.time_date, self.slope1_err)
-        rem_l = est_l - err_l
-        est_r = np.interp(time, self.time_date, self.slope2_est)
-        err_r = np.interp(time, self.time_date, self.slope2_err)
-        rem_r = est_r - err_r
-        theta2 = np.concatenate(([rem_l.T], [rem_r.T]), axis=0)
+        (roll, phase_l, phase_r, est_l, est_r, err_l,
+         err_r) = self._interpolate(time)
+        phase1d = np.vstack((phase_l, phase_r))
+        theta2 = np.vstack((est_l - err_l, est_r - err_r))
 
         return roll * 1e-3, phase1d.T * 1e-3, theta2.T * 1e-3
 
@@ -70,22 +82,32 @@ class CorrectedRollPhase:
             dict: variable name and errors simulated.
         """
         roll_1d, phase_1d, rollphase_est_1d = self._generate_1d(time)
+        num_lines = phase_1d.shape[0]
         num_pixels = x_ac.shape[0]
         swath_center = num_pixels // 2
         ac_l = x_ac[:swath_center]
         ac_r = x_ac[swath_center:]
 
-        phase = np.full((phase_1d.shape[0], num_pixels), np.nan)
-        phase[:, :swath_center] = ac_l * phase_1d[:, 0, np.newaxis]
-        phase[:, swath_center:] = ac_r * phase_1d[:, 1, np.newaxis]
+        phase = np.empty((num_lines, num_pixels))
+        np.multiply(ac_l,
+                    phase_1d[:, 0, np.newaxis],
+                    out=phase[:, :swath_center])
+        np.multiply(ac_r,
+                    phase_1d[:, 1, np.newaxis],
+                    out=phase[:, swath_center:])
+
+        rollphase_est = np.empty((num_lines, num_pixels))
+        np.multiply(rollphase_est_1d[:, 0, np.newaxis],
+                    ac_l,
+                    out=rollphase_est[:, :swath_center])
+        np.multiply(rollphase_est_1d[:, 1, np.newaxis],
+                    ac_r,
+                    out=rollphase_est[:, swath_center:])
 
-        rollphase_est = np.full((phase_1d.shape[0], num_pixels), np.nan)
-        rollphase_est[:, :swath_center] = np.mat(
-            rollphase_est_1d[:, 0]).T * ac_l
-        rollphase_est[:, swath_center:] = np.mat(
-            rollphase_est_1d[:, 1]).T * ac_r
+        roll = np.empty((num_lines, num_pixels))
+        np.multiply(x_ac, roll_1d[:, np.newaxis], out=roll)
         return {
-            "simulated_error_roll": x_ac * roll_1d[:, np.newaxis],
+            "simulated_error_roll": roll,
             "simulated_error_phase": phase,
             "roll_phase_estimate": rollphase_est
         }
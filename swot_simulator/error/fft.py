@@ -0,0 +1,231 @@
+# Copyright (c) 2020 CNES/JPL
+#
+# All rights reserved. Use of this source code is governed by a
+# BSD-style license that can be found in the LICENSE file.
+"""
+FFT backends used to synthesize the random signals
+--------------------------------------------------
+"""
+from typing import Dict, Optional, Set, Tuple
+import functools
+import importlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import numpy as np
+import scipy.fft
+from .. import settings
+
+#: Logger of this module
+LOGGER = logging.getLogger(__name__)
+
+
+class Backend:
+    """Abstract class implementing the inverse discrete Fourier transforms.
+
+    Args:
+        threads (int, optional): Number of threads used by a transform. A
+            negative value uses all the cores of the machine. Ignored by the
+            backends that are not multithreaded.
+    """
+    #: Name of the backend
+    NAME = ""
+
+    def __init__(self, threads: int = 1) -> None:
+        self.threads = threads
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(threads={self.threads})"
+
+    def ifft(self, array: np.ndarray) -> np.ndarray:
+        """Computes the 1D inverse discrete Fourier transform"""
+        raise NotImplementedError()
+
+    def ifft2(self, array: np.ndarray) -> np.ndarray:
+        """Computes the 2D inverse discrete Fourier transform"""
+        raise NotImplementedError()
+
+
+class Numpy(Backend):
+    """FFT backend using ``numpy.fft``, single-threaded."""
+    NAME = "numpy"
+
+    def ifft(self, array: np.ndarray) -> np.ndarray:
+        return np.fft.ifft(array)
+
+    def ifft2(self, array: np.ndarray) -> np.ndarray:
+        return np.fft.ifft2(array)
+
+
+class Scipy(Backend):
+    """FFT backend using ``scipy.fft``, multithreaded."""
+    NAME = "scipy"
+
+    def ifft(self, array: np.ndarray) -> np.ndarray:
+        return scipy.fft.ifft(array, workers=self.threads)
+
+    def ifft2(self, array: np.ndarray) -> np.ndarray:
+        return scipy.fft.ifft2(array, workers=self.threads)
+
+
+class MKL(Backend):
+    """FFT backend using the Intel MKL. The number of threads is set by the
+    MKL configuration (e.g. ``MKL_NUM_THREADS``)."""
+    NAME = "mkl"
+
+    def ifft(self, array: np.ndarray) -> np.ndarray:
+        import mkl_fft
+        return mkl_fft.ifft(array)
+
+    def ifft2(self, array: np.ndarray) -> np.ndarray:
+        import mkl_fft
+        return mkl_fft.ifft2(array)
+
+
+class PyFFTW(Backend):
+    """FFT backend using FFTW through pyFFTW.
+
+    The plans are created once for each shape of array, then reused by the
+    following transforms. The knowledge acquired by FFTW when planning (the
+    wisdom) is saved in a file read by the other processes: the expensive
+    planning is done once.
+
+    Args:
+        threads (int, optional): Number of threads used by a transform. A
+            negative value uses all the cores of the machine.
+        wisdom (str, optional): Path to the file storing the FFTW wisdom.
+        planner_effort (str, optional): FFTW planning flag.
+    """
+    NAME = "pyfftw"
+
+    def __init__(self,
+                 threads: int = 1,
+                 wisdom: Optional[str] = None,
+                 planner_effort: str = "FFTW_MEASURE") -> None:
+        super().__init__(threads)
+        self.wisdom = wisdom
+        self.planner_effort = planner_effort
+        self._shapes: Set[Tuple[str, Tuple[int, ...]]] = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        return dict(threads=self.threads,
+                    wisdom=self.wisdom,
+                    planner_effort=self.planner_effort)
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    def _load_wisdom(self) -> None:
+        """Imports the wisdom saved by the other processes"""
+        import pyfftw
+        import pyfftw.interfaces.cache
+        pyfftw.interfaces.cache.enable()
+        if self.wisdom is None or not os.path.exists(self.wisdom):
+            return
+        try:
+            with open(self.wisdom, "rb") as stream:
+                pyfftw.import_wisdom(pickle.load(stream))
+        except (OSError, pickle.UnpicklingError, ValueError) as exc:
+            LOGGER.warning("unable to read the FFTW wisdom %r: %s",
+                           self.wisdom, exc)
+
+    def _save_wisdom(self) -> None:
+        """Saves the wisdom acquired by this process"""
+        import pyfftw
+        if self.wisdom is None:
+            return
+        dirname = os.path.dirname(os.path.abspath(self.wisdom))
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=dirname)
+            with os.fdopen(handle, "wb") as stream:
+                pickle.dump(pyfftw.export_wisdom(), stream)
+            os.replace(temporary, self.wisdom)
+        except OSError as exc:
+            LOGGER.warning("unable to write the FFTW wisdom %r: %s",
+                           self.wisdom, exc)
+
+    def _transform(self, name: str, array: np.ndarray) -> np.ndarray:
+        """Computes a transform, and saves the wisdom if a new plan has been
+        created."""
+        import pyfftw.interfaces.numpy_fft
+        with self._lock:
+            if not self._loaded:
+                self._load_wisdom()
+                self._loaded = True
+        threads = self.threads if self.threads > 0 else (os.cpu_count() or 1)
+        result = getattr(pyfftw.interfaces.numpy_fft,
+                         name)(array,
+                               threads=threads,
+                               planner_effort=self.planner_effort)
+        key = (name, array.shape)
+        with self._lock:
+            if key not in self._shapes:
+                self._shapes.add(key)
+                self._save_wisdom()
+        return result
+
+    def ifft(self, array: np.ndarray) -> np.ndarray:
+        return self._transform("ifft", array)
+
+    def ifft2(self, array: np.ndarray) -> np.ndarray:
+        return self._transform("ifft2", array)
+
+
+#: Known backends
+BACKENDS = dict(
+    (item.NAME, item) for item in (Numpy, Scipy, MKL, PyFFTW))
+
+
+@functools.lru_cache(maxsize=None)
+def _available(module: str) -> bool:
+    """Checks if a module can be imported"""
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return False
+    return True
+
+
+def create(name: str = "auto",
+           threads: int = 1,
+           cache_directory: Optional[str] = None) -> Backend:
+    """Creates a FFT backend.
+
+    Args:
+        name (str, optional): Name of the backend: ``numpy``, ``scipy``,
+            ``pyfftw``, ``mkl`` or ``auto`` to select the MKL if it is
+            installed, otherwise ``scipy.fft``.
+        threads (int, optional): Number of threads used by a transform.
+        cache_directory (str, optional): Directory storing the FFTW wisdom.
+
+    Returns:
+        Backend: The FFT backend.
+    """
+    if name == "auto":
+        name = "mkl" if _available("mkl_fft") else "scipy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown FFT backend: {name}")
+    if name == "pyfftw":
+        return PyFFTW(
+            threads,
+            None if cache_directory is None else os.path.join(
+                cache_directory, "fftw_wisdom.pickle"))
+    return BACKENDS[name](threads)
+
+
+def from_parameters(parameters: settings.Parameters) -> Backend:
+    """Creates the FFT backend selected by the simulation settings.
+
+    Args:
+        parameters (settings.Parameters): Simulation settings
+
+    Returns:
+        Backend: The FFT backend.
+    """
+    return create(parameters.fft_backend, parameters.fft_threads,
+                  parameters.cache_directory)
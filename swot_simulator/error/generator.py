@@ -6,18 +6,58 @@
 Generate instrumental errors
 ----------------------------
 """
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import concurrent.futures
+import logging
+import os
+import pickle
 import dask.distributed
 import numpy as np
+from .. import cache
 from .. import settings
 from . import (Altimeter, BaselineDilation, CorrectedRollPhase, Karin,
                RollPhase, Timing, WetTroposphere)
 from . import utils
 
+#: Logger of this module
+LOGGER = logging.getLogger(__name__)
+
+#: Default memory budget, in bytes, of the errors independent of the cycle
+#: number kept in memory.
+DEFAULT_CACHE_SIZE = 1 << 30
+
+#: Error generators whose values at a point depend only on the position or the
+#: date of the point: they are calculated in a single call for a batch of
+#: half-orbits.
+POINTWISE = (Altimeter, BaselineDilation, CorrectedRollPhase, RollPhase,
+             Timing)
+
+#: Error generators whose values depend only on the geometry of the
+#: half-orbit, and not on the cycle number: they are calculated once for each
+#: pass and then reused.
+CYCLE_INVARIANT = (Altimeter, BaselineDilation, RollPhase, Timing,
+                   WetTroposphere)
+
 
 class Generator:
     """Instrumental error generator.
 
+    The errors are generated in the calling process, one after the other
+    (``serial``), concurrently by a pool of threads (``thread``) or by tasks
+    submitted to the Dask cluster (``dask``) according to the
+    ``error_executor`` setting.
+
+    The simulated errors are returned in the floating point type selected by
+    the ``precision`` setting.
+
+    The errors that do not depend on the cycle number are kept in memory, in
+    a LRU cache bounded by the ``error_cache_size`` setting, and, if the
+    ``cache_directory`` setting is defined, on disk. They are identified by
+    the geometry of the half-orbit and the settings of their generator. If
+    the memory budget is not set, the errors are kept in memory only if the
+    cache directory is defined or if the cycles of a pass are simulated in a
+    row (see :meth:`enable_cache`).
+
     Args:
         parameters (settings.Parameters): Simulation settings
         first_date (numpy.datetime64): Date of the first simulated
@@ -28,6 +68,27 @@ class Generator:
         #: The list of user-defined error generators
         self.generators = []
 
+        #: Strategy of execution of the error generators
+        self.executor = parameters.error_executor
+
+        #: Floating point type of the simulated errors
+        self.dtype = np.dtype(parameters.precision)
+
+        # A pass number comes back only one cycle later: unless the errors
+        # are also stored on disk, they are not kept in memory by default.
+        self._cache_size = parameters.error_cache_size
+        cache_size = self._cache_size
+        if cache_size is None:
+            cache_size = 0 if parameters.cache_directory is None \
+                else DEFAULT_CACHE_SIZE
+
+        #: Errors independent of the cycle number already simulated
+        self.cache = cache.LRUCache(cache_size)
+
+        #: Directory storing the errors independent of the cycle number
+        self.cache_directory = None if parameters.cache_directory is None \
+            else os.path.join(parameters.cache_directory, "errors")
+
         assert parameters.error_spectrum is not None
         error_spectrum = utils.read_file_instr(parameters.error_spectrum,
                                                parameters.delta_al,
@@ -62,9 +123,111 @@ class Generator:
                 # not handled by this object.
                 raise ValueError(f"unknown error generation class: {item}")
 
+        # The errors independent of the cycle number are reused only if
+        # their generator has the same settings: it is identified by the
+        # hash of its serialized state.
+        self._identities = [
+            cache.fingerprint(pickle.dumps(item))
+            if isinstance(item, CYCLE_INVARIANT) else None
+            for item in self.generators
+        ]
+
+    def enable_cache(self) -> None:
+        """Keeps the errors independent of the cycle number in memory, with
+        the default memory budget unless it has been set by the user.
+
+        Called when the cycles of a pass are simulated in a row by the same
+        task: the errors of the pass are then reused by the following
+        batches of cycles.
+        """
+        if self._cache_size is None and self.cache.max_bytes == 0:
+            self.cache = cache.LRUCache(DEFAULT_CACHE_SIZE)
+
+    @staticmethod
+    def _task(item, cycle_number: int, curvilinear_distance: float,
+              time: np.ndarray, x_al: np.ndarray, x_ac: np.ndarray,
+              swh: Optional[np.ndarray]) -> Tuple[Callable, Tuple]:
+        """Get the function to call, and its arguments, to generate the
+        errors of a generator."""
+        if isinstance(item, Altimeter):
+            return item.generate, (x_al, )
+        if isinstance(item, CorrectedRollPhase):
+            return item.generate, (time, x_ac)
+        if isinstance(item, Karin):
+            return item.generate, (x_al, x_ac, curvilinear_distance,
+                                   cycle_number, swh)
+        return item.generate, (x_al, x_ac)
+
+    def _cast(self, errors: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Converts the errors simulated by a generator to the floating point
+        type selected."""
+        return dict((key, value.astype(self.dtype, copy=False))
+                    for key, value in errors.items())
+
+    def _key(self, index: int, x_al: np.ndarray,
+             x_ac: np.ndarray) -> Optional[str]:
+        """Get the key identifying the errors of a generator for a
+        half-orbit, or None if the errors depend on the cycle number."""
+        identity = self._identities[index]
+        if identity is None:
+            return None
+        return cache.fingerprint(identity, x_al, x_ac, self.dtype.str)
+
+    def _load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Loads the errors stored in the cache directory"""
+        assert self.cache_directory is not None
+        dirname = os.path.join(self.cache_directory, key)
+        names = cache.load_array(os.path.join(dirname, "variables.npy"),
+                                 mmap_mode=None)
+        if names is None:
+            return None
+        errors = dict()
+        for name in names:
+            array = cache.load_array(os.path.join(dirname, f"{name}.npy"))
+            if array is None:
+                return None
+            errors[str(name)] = array
+        return errors
+
+    def _lookup(self, key: Optional[str]) -> Optional[Dict[str, np.ndarray]]:
+        """Get the errors already simulated, or None if they are unknown."""
+        if key is None:
+            return None
+        errors = self.cache.get(key)
+        if errors is None and self.cache_directory is not None:
+            errors = self._load(key)
+            if errors is not None:
+                self.cache.put(key, errors,
+                               sum(item.nbytes for item in errors.values()))
+        if errors is None:
+            return None
+        # The errors returned are modified by the caller (the swaths are
+        # masked in place).
+        return dict((name, np.array(value)) for name, value in errors.items())
+
+    def _store(self, key: str, errors: Dict[str, np.ndarray]) -> None:
+        """Stores the errors simulated in the cache"""
+        errors = dict(
+            (name, np.array(value)) for name, value in errors.items())
+        self.cache.put(key, errors,
+                       sum(item.nbytes for item in errors.values()))
+        if self.cache_directory is None:
+            return
+        dirname = os.path.join(self.cache_directory, key)
+        try:
+            for name, value in errors.items():
+                cache.save_array(os.path.join(dirname, f"{name}.npy"), value)
+            # The list of variables is written last: it marks the entry as
+            # complete.
+            cache.save_array(os.path.join(dirname, "variables.npy"),
+                             np.array(list(errors)))
+        except OSError as exc:
+            LOGGER.warning("unable to write the errors in %r: %s", dirname,
+                           exc)
+
     def generate(self, cycle_number: int, curvilinear_distance: float,
-                 time: np.ndarray, x_al: np.ndarray,
-                 x_ac: np.ndarray, swh:np.ndarray) -> Dict[str, np.ndarray]:
+                 time: np.ndarray, x_al: np.ndarray, x_ac: np.ndarray,
+                 swh: np.ndarray) -> Dict[str, np.ndarray]:
         """Generate errors
 
         Args:
@@ -74,35 +237,139 @@ class Generator:
             time (numpy.ndarray): Date of measurements.
             x_al (numpy.ndarray): Along track distance.
             x_ac (numpy.ndarray): Across track distance.
+            swh (numpy.ndarray): Significant wave height.
 
         Returns:
             dict: Associative array between error variables and simulated
             values.
         """
-        result = {}
-        if not self.generators or x_al.shape[0] == 0:
+        return self.generate_batch(curvilinear_distance, x_ac,
+                                   [(cycle_number, time, x_al, swh)])[0]
+
+    def generate_batch(
+        self, curvilinear_distance: float, x_ac: np.ndarray,
+        passes: Sequence[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]
+    ) -> List[Dict[str, np.ndarray]]:
+        """Generate the errors of a batch of half-orbits.
+
+        The along track coordinates of the half-orbits are concatenated, the
+        errors depending only on the position or the date of the
+        measurements are calculated in one call for the whole batch, and
+        then split by half-orbit. The other errors are calculated for each
+        half-orbit. The errors independent of the cycle number already
+        simulated are read from the cache.
+
+        Args:
+            curvilinear_distance (float): Curvilinear distance covered by the
+                satellite during a complete cycle.
+            x_ac (numpy.ndarray): Across track distance, shared by all the
+                half-orbits.
+            passes (list): Cycle number, date of measurements, along track
+                distance and significant wave height of each half-orbit.
+
+        Returns:
+            list: Associative array between error variables and simulated
+            values, for each half-orbit.
+        """
+        result: List[Dict[str, np.ndarray]] = [dict() for _ in passes]
+        selected = [ix for ix, item in enumerate(passes) if item[2].size]
+        if not self.generators or not selected:
             return result
 
-        futures = []
-        with dask.distributed.worker_client() as client:
-            for item in self.generators:
-                if isinstance(item, Altimeter):
-                    futures.append(client.submit(item.generate, x_al))
-                elif isinstance(item, BaselineDilation):
-                    futures.append(client.submit(item.generate, x_al, x_ac))
-                elif isinstance(item, CorrectedRollPhase):
-                    futures.append(client.submit(item.generate, time, x_ac))
-                elif isinstance(item, Karin):
-                    futures.append(
-                        client.submit(item.generate, x_al, x_ac,
-                                      curvilinear_distance, cycle_number, swh))
-                elif isinstance(item, RollPhase):
-                    futures.append(client.submit(item.generate, x_al, x_ac))
-                elif isinstance(item, Timing):
-                    futures.append(client.submit(item.generate, x_al, x_ac))
-                elif isinstance(item, WetTroposphere):
-                    futures.append(client.submit(item.generate, x_al, x_ac))
-
-            for future in dask.distributed.as_completed(futures):
-                result.update(future.result())
+        tasks = []
+        # Half-orbits handled by each task, the cache keys of their errors,
+        # and the other half-orbits sharing these keys.
+        owners: List[Tuple[List[int], Dict[int, Optional[str]],
+                           Dict[int, List[int]]]] = []
+        for index, item in enumerate(self.generators):
+            # The half-orbits of the batch having the same key (the same pass
+            # in different cycles) share the errors independent of the cycle
+            # number: they are simulated or read once.
+            keys: Dict[int, Optional[str]] = dict()
+            duplicates: Dict[int, List[int]] = dict()
+            first: Dict[str, int] = dict()
+            for ix in selected:
+                key = self._key(index, passes[ix][2], x_ac)
+                if key is not None and key in first:
+                    duplicates[first[key]].append(ix)
+                    continue
+                if key is not None:
+                    first[key] = ix
+                keys[ix] = key
+                duplicates[ix] = []
+            for ix, key in list(keys.items()):
+                errors = self._lookup(key)
+                if errors is not None:
+                    del keys[ix]
+                    self._share(result, errors, [ix] + duplicates[ix])
+            if not keys:
+                continue
+
+            missing = list(keys)
+            groups = [missing] if isinstance(item, POINTWISE) else [
+                [ix] for ix in missing
+            ]
+            for group in groups:
+                if len(group) == 1:
+                    cycle_number, time, x_al, swh = passes[group[0]]
+                else:
+                    # The coordinates of the half-orbits are concatenated.
+                    cycle_number, swh = 0, None
+                    time = np.concatenate([passes[ix][1] for ix in group])
+                    x_al = np.concatenate([passes[ix][2] for ix in group])
+                tasks.append(
+                    self._task(item, cycle_number, curvilinear_distance, time,
+                               x_al, x_ac, swh))
+                owners.append((group, keys, duplicates))
+
+        for (group, keys,
+             duplicates), errors in zip(owners, self._execute(tasks)):
+            if len(group) == 1:
+                parts = [errors]
+            else:
+                # Errors calculated for several half-orbits.
+                sections = np.cumsum([passes[ix][2].size
+                                      for ix in group])[:-1]
+                parts = [dict() for _ in group]
+                for name, value in errors.items():
+                    for part, array in zip(parts, np.split(value, sections)):
+                        part[name] = array
+            for ix, part in zip(group, parts):
+                self._share(result, part, [ix] + duplicates[ix])
+                key = keys[ix]
+                if key is not None:
+                    self._store(key, part)
         return result
+
+    @staticmethod
+    def _share(result: List[Dict[str, np.ndarray]],
+               errors: Dict[str, np.ndarray], owners: List[int]) -> None:
+        """Sets the errors of a generator to the half-orbits sharing them.
+        Each half-orbit gets its own arrays: the swaths are masked in
+        place."""
+        result[owners[0]].update(errors)
+        for ix in owners[1:]:
+            result[ix].update(
+                dict((name, np.array(value))
+                     for name, value in errors.items()))
+
+    def _execute(self, tasks: List[Tuple[Callable, Tuple]]
+                 ) -> List[Dict[str, np.ndarray]]:
+        """Executes the tasks generating the errors, and returns their
+        results in the order of the tasks."""
+        if not tasks:
+            return []
+        if self.executor == "dask":
+            with dask.distributed.worker_client() as client:
+                futures = [client.submit(func, *args) for func, args in tasks]
+                return [self._cast(item) for item in client.gather(futures)]
+        if self.executor == "thread":
+            # The generators release the GIL during the heavy computations,
+            # they can be run concurrently in the calling process.
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=len(tasks)) as executor:
+                futures = [
+                    executor.submit(func, *args) for func, args in tasks
+                ]
+                return [self._cast(future.result()) for future in futures]
+        return [self._cast(func(*args)) for func, args in tasks]
@@ -7,15 +7,22 @@ Karin noise
 -----------
 """
 from typing import Dict
+import threading
 import numpy as np
 
 from . import utils
+from .. import orbit_propagator
 from .. import settings
 
 
 class Karin:
     """Karin instrumental error computed from random realization
 
+    The table of random realizations and the standard deviation of the noise
+    as a function of the SWH for each across track position are calculated
+    once, for the swath defined by the simulation settings, and reused for
+    each pass.
+
     Args:
         parameters (settings.Parameters): Simulation settings
     """
@@ -31,6 +38,53 @@ class Karin:
         self.nrand_karin = parameters.nrand_karin
         self.nseed = parameters.nseed
 
+        # Random realizations, indexed by the number of pixels of the swath,
+        # and look-up tables of the standard deviation, indexed by the across
+        # track distances of the pixels.
+        self._random: Dict[int, np.ndarray] = dict()
+        self._lut: Dict[bytes, np.ndarray] = dict()
+        self._lock = threading.Lock()
+        x_ac = orbit_propagator.across_track_distance(parameters)
+        self._random_table(x_ac.size)
+        self._sigma_lut(x_ac)
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _random_table(self, num_pixels: int) -> np.ndarray:
+        """Get the table of random realizations for a swath"""
+        with self._lock:
+            if num_pixels not in self._random:
+                # Generate random noise for left and right part of the mast
+                random_state = np.random.RandomState(self.nseed + 1)
+                self._random[num_pixels] = random_state.normal(
+                    0, 1, (self.nrand_karin, num_pixels))
+            return self._random[num_pixels]
+
+    def _sigma_lut(self, x_ac: np.ndarray) -> np.ndarray:
+        """Get the standard deviation of the noise as a function of the SWH
+        (rows) for each across track distance (columns)"""
+        key = np.ascontiguousarray(x_ac, dtype=np.float64).tobytes()
+        with self._lock:
+            if key not in self._lut:
+                # Nearest across track distance of the noise file.
+                nearest = utils.nearest_cross_track(x_ac, self.x_ac)
+                self._lut[key] = np.ascontiguousarray(self.hsdt[:, nearest])
+            return self._lut[key]
+
+    def _sigma(self, swh: np.ndarray, x_ac: np.ndarray) -> np.ndarray:
+        """Calculates the standard deviation of the noise for the SWH
+        provided."""
+        lut = self._sigma_lut(x_ac)
+        return utils.interpolate_karin(swh, lut, np.arange(x_ac.size),
+                                       self.swh)
+
     def generate(self, x_al: np.array, x_ac: np.array,
                  curvilinear_distance: float, cycle: int,
                  swh: np.array) -> Dict[str, np.ndarray]:
@@ -47,14 +101,10 @@ class Karin:
             dict: variable name and errors simulated.
         """
         num_pixels = x_ac.shape[0]
-
-        # Generate random noise for left and right part of the mast
-        np.random.seed(self.nseed + 1)
-        a_karin = np.random.normal(0, 1, (self.nrand_karin, num_pixels))
+        a_karin = self._random_table(num_pixels)
 
         # Formula of karin noise as a function of x_ac (smile shape)
-        sigma_karin =  utils.interpolate_file_karin(swh, x_ac, self.hsdt,
-                                                    self.x_ac, self.swh)
+        sigma_karin = self._sigma(swh, x_ac)
         size_grid = np.sqrt(self.delta_al * self.delta_ac)
         sigma_karin = sigma_karin / size_grid
 
@@ -9,6 +9,7 @@ Roll errors
 from typing import Dict, Tuple
 import numpy as np
 
+from . import fft
 from . import utils
 from .. import settings
 from .. import VOLUMETRIC_MEAN_RADIUS, CELERITY, F_KA, BASELINE
@@ -36,6 +37,30 @@ class RollPhase:
         self.phase_psd = phase_psd
         self.spatial_frequency = spatial_frequency
 
+        backend = fft.from_parameters(parameters)
+        # The random signals are synthesized once for all the passes.
+        self.roll_signal = utils.Signal1D(self.spatial_frequency,
+                                          self.roll_psd,
+                                          nseed=self.nseed,
+                                          fmin=1 / self.len_repeat,
+                                          fmax=1 / (2 * self.delta_al),
+                                          alpha=10,
+                                          backend=backend)
+        self.phase_signal_l = utils.Signal1D(self.spatial_frequency,
+                                             self.phase_psd,
+                                             nseed=self.nseed + 100,
+                                             fmin=1 / self.len_repeat,
+                                             fmax=1 / (2 * self.delta_al),
+                                             alpha=10,
+                                             backend=backend)
+        self.phase_signal_r = utils.Signal1D(self.spatial_frequency,
+                                             self.phase_psd,
+                                             nseed=self.nseed + 200,
+                                             fmin=1 / self.len_repeat,
+                                             fmax=1 / (2 * self.delta_al),
+                                             alpha=10,
+                                             backend=backend)
+
         # TODO
         height = parameters.height * 1e-3
         self.phase_conversion_factor = (
@@ -48,27 +73,9 @@ class RollPhase:
 
         # Compute roll angle using the power spectrum
         # Compute left and right phase angles the power spectrum
-        theta = utils.gen_signal_1d(self.spatial_frequency,
-                                    self.roll_psd,
-                                    x_al,
-                                    nseed=self.nseed,
-                                    fmin=1 / self.len_repeat,
-                                    fmax=1 / (2 * self.delta_al),
-                                    alpha=10)
-        theta_l = utils.gen_signal_1d(self.spatial_frequency,
-                                      self.phase_psd,
-                                      x_al,
-                                      nseed=self.nseed + 100,
-                                      fmin=1 / self.len_repeat,
-                                      fmax=1 / (2 * self.delta_al),
-                                      alpha=10)
-        theta_r = utils.gen_signal_1d(self.spatial_frequency,
-                                      self.phase_psd,
-                                      x_al,
-                                      nseed=self.nseed + 200,
-                                      fmin=1 / self.len_repeat,
-                                      fmax=1 / (2 * self.delta_al),
-                                      alpha=10)
+        theta = self.roll_signal(x_al)
+        theta_l = self.phase_signal_l(x_al)
+        theta_r = self.phase_signal_r(x_al)
         # Compute the associated roll  error on the swath in m
         roll = self.roll_conversion_factor * theta
         # Compute the associated phase error on the swath in m
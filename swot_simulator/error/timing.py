@@ -8,6 +8,7 @@ Timing errors
 """
 from typing import Dict
 import numpy as np
+from . import fft
 from . import utils
 
 from .. import CELERITY
@@ -36,22 +37,28 @@ class Timing:
         self.timing_psd = timing_psd
         self.spatial_frequency = spatial_frequency
 
-    def _generate_1d(self, x_al: np.ndarray) -> np.ndarray:
-        # Generate 1d timing using the power spectrum:
-        timing_l = utils.gen_signal_1d(self.spatial_frequency,
+        backend = fft.from_parameters(parameters)
+        # The random signals of the left and right sides are synthesized
+        # once for all the passes.
+        self.signal_l = utils.Signal1D(self.spatial_frequency,
                                        self.timing_psd,
-                                       x_al,
                                        nseed=self.nseed,
                                        fmin=1 / self.len_repeat,
                                        fmax=1 / (2 * self.delta_al),
-                                       alpha=10)
-        timing_r = utils.gen_signal_1d(self.spatial_frequency,
+                                       alpha=10,
+                                       backend=backend)
+        self.signal_r = utils.Signal1D(self.spatial_frequency,
                                        self.timing_psd,
-                                       x_al,
                                        nseed=self.nseed + 100,
                                        fmin=1 / self.len_repeat,
                                        fmax=1 / (2 * self.delta_al),
-                                       alpha=10)
+                                       alpha=10,
+                                       backend=backend)
+
+    def _generate_1d(self, x_al: np.ndarray) -> np.ndarray:
+        # Generate 1d timing using the power spectrum:
+        timing_l = self.signal_l(x_al)
+        timing_r = self.signal_r(x_al)
         # Compute the corresponding timing error on the swath in m
         return np.array([
             self.CONVERSION_FACTOR * timing_l,
@@ -7,18 +7,13 @@ Random signal generation utilities
 ----------------------------------
 """
 from typing import Optional, Tuple
+import os
 import warnings
 import numba as nb
 import numpy as np
-import scipy.interpolate
 import xarray as xr
-try:
-    import mkl_fft
-    IFFT = mkl_fft.ifft
-    IFFT2 = mkl_fft.ifft2
-except ImportError:
-    IFFT = np.fft.ifft
-    IFFT2 = np.fft.ifft2
+from .. import cache
+from . import fft
 
 
 def read_file_instr(file_instr: str, delta_al: float,
@@ -51,37 +46,216 @@ def read_file_karin(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     return height_sdt, cross_track, swh
 
 
-def interpolate_file_karin(swh_in: np.array, x_ac_in: np.array,
-                           height_sdt:np.array, cross_track: np.array,
-                           swh: np.array) -> np.ndarray:
-    warning = False
-    size_swh = np.shape(swh_in)
-    if len(size_swh) == 1:
-        swh_in = swh_in.reshape((1, size_swh[0]))
-        size_swh = np.shape(swh_in)
-    hsdt = np.zeros(size_swh)
-    for j in range(size_swh[1]):
-        xacj = x_ac_in[j]
-        indice_ac = np.argmin(np.abs(cross_track - xacj))
-        for i in range(size_swh[0]):
-            threshold = swh_in[i, j]
-            indices = np.argmin(np.abs(swh - threshold))
-            if swh[indices] > threshold:
-                indices -= 1
-            if swh.max() <= threshold:
-                hsdt[i, j] = height_sdt[-1, indice_ac]
-                warning = True
+@nb.njit(cache=True, nogil=True)
+def _bisect_right(values: np.ndarray, item: float) -> int:
+    """Index of the first value greater than item in sorted values."""
+    lower = 0
+    upper = values.size
+    while lower < upper:
+        middle = (lower + upper) // 2
+        if item < values[middle]:
+            upper = middle
+        else:
+            lower = middle + 1
+    return lower
+
+
+@nb.njit(cache=True, nogil=True, parallel=True)
+def _interpolate_karin(swh_in: np.ndarray, height_sdt: np.ndarray,
+                       columns: np.ndarray,
+                       swh: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Linear interpolation of the standard deviation of the noise for the
+    SWH provided. Returns the interpolated values and the greatest SWH above
+    the maximum of the table (NaN if none)."""
+    num_lines, num_pixels = swh_in.shape
+    result = np.empty((num_lines, num_pixels))
+    exceeded = np.full(num_lines, np.nan)
+    last = swh.size - 1
+    swh_max = swh.max()
+    for ix in nb.prange(num_lines):
+        for jx in range(num_pixels):
+            threshold = swh_in[ix, jx]
+            column = columns[jx]
+            if swh_max <= threshold:
+                result[ix, jx] = height_sdt[last, column]
+                if not threshold <= exceeded[ix]:
+                    exceeded[ix] = threshold
             else:
-                rswh = threshold - swh[indices]
-                hsdt[i, j] = height_sdt[indices, indice_ac] * (
-                    1 - rswh) + rswh * height_sdt[indices + 1, indice_ac]
-    if warning is True:
-        warnings.warn(f'swh={threshold} is greater than the maximum value, '
+                index = min(max(_bisect_right(swh, threshold) - 1, 0),
+                            last - 1)
+                rswh = threshold - swh[index]
+                result[ix, jx] = height_sdt[index, column] * (
+                    1 - rswh) + rswh * height_sdt[index + 1, column]
+    greatest = np.nan
+    for ix in range(num_lines):
+        if not exceeded[ix] <= greatest:
+            greatest = exceeded[ix]
+    return result, greatest
+
+
+def nearest_cross_track(x_ac_in: np.ndarray,
+                        cross_track: np.ndarray) -> np.ndarray:
+    """Get the index of the nearest across track distance of the noise file
+    for each pixel.
+
+    Args:
+        x_ac_in (numpy.ndarray): Across track distances of the pixels.
+        cross_track (numpy.ndarray): Across track distances of the noise
+            file.
+
+    Returns:
+        numpy.ndarray: The indices of the nearest distances.
+    """
+    return np.argmin(np.abs(cross_track[np.newaxis, :] -
+                            np.asarray(x_ac_in)[:, np.newaxis]),
+                     axis=1).astype(np.int64)
+
+
+def interpolate_karin(swh_in: np.ndarray, height_sdt: np.ndarray,
+                      columns: np.ndarray, swh: np.ndarray) -> np.ndarray:
+    """Interpolates the standard deviation of the KaRIn noise for the SWH
+    provided.
+
+    Args:
+        swh_in (numpy.ndarray): SWH of each pixel (2D) or constant along
+            track (1D).
+        height_sdt (numpy.ndarray): Standard deviation of the noise for each
+            SWH of the table (rows).
+        columns (numpy.ndarray): Column of the table used for each pixel.
+        swh (numpy.ndarray): SWH of the table, in ascending order.
+
+    Returns:
+        numpy.ndarray: The standard deviation of the noise (2D).
+    """
+    swh_in = np.ascontiguousarray(np.atleast_2d(swh_in), dtype=np.float64)
+    hsdt, greatest = _interpolate_karin(
+        swh_in, np.ascontiguousarray(height_sdt, dtype=np.float64),
+        np.ascontiguousarray(columns, dtype=np.int64),
+        np.ascontiguousarray(swh, dtype=np.float64))
+    if not np.isnan(greatest):
+        warnings.warn(f'swh={greatest} is greater than the maximum value, '
                       f'therefore swh is set to the file maximum '
                       'value', RuntimeWarning)
     return hsdt
 
 
+def interpolate_file_karin(swh_in: np.array, x_ac_in: np.array,
+                           height_sdt: np.array, cross_track: np.array,
+                           swh: np.array) -> np.ndarray:
+    """Interpolates the standard deviation of the KaRIn noise read from the
+    noise file for the SWH and the across track distances provided.
+
+    Args:
+        swh_in (numpy.ndarray): SWH of each pixel (2D) or constant along
+            track (1D).
+        x_ac_in (numpy.ndarray): Across track distances of the pixels.
+        height_sdt (numpy.ndarray): Standard deviation of the noise.
+        cross_track (numpy.ndarray): Across track distances of the noise
+            file.
+        swh (numpy.ndarray): SWH of the noise file.
+
+    Returns:
+        numpy.ndarray: The standard deviation of the noise (2D).
+    """
+    return interpolate_karin(swh_in, height_sdt,
+                             nearest_cross_track(x_ac_in, cross_track), swh)
+
+
+class Signal1D:
+    """Periodic 1d random signal synthesized from a spectrum using Fourier
+    coefficients.
+
+    The signal depends only on the spectrum and the properties of the
+    synthesis: it is calculated once, then evaluated at the requested
+    positions.
+
+    Args:
+        fi (numpy.ndarray): Frequencies of the spectrum.
+        psi (numpy.ndarray): Power spectral density.
+        nseed (int, optional): Seed of the random phases.
+        fmin (float, optional): Minimal frequency of the signal. Default to
+            the first frequency of the spectrum.
+        fmax (float, optional): Maximal frequency of the signal. Default to
+            the last frequency of the spectrum.
+        alpha (int, optional): Oversampling factor of the frequencies.
+        lf_extpl (bool, optional): Prolongates the spectrum as a plateau
+            below its first frequency.
+        hf_extpl (bool, optional): Prolongates the spectrum as a plateau
+            above its last frequency.
+        backend (fft.Backend, optional): FFT backend used to synthesize the
+            signal. Default to the backend selected automatically.
+    """
+    def __init__(self,
+                 fi: np.ndarray,
+                 psi: np.ndarray,
+                 nseed: int = 0,
+                 fmin: Optional[float] = None,
+                 fmax: Optional[float] = None,
+                 alpha: int = 10,
+                 lf_extpl: bool = False,
+                 hf_extpl: bool = False,
+                 backend: Optional[fft.Backend] = None) -> None:
+        backend = backend or fft.create()
+        # Make sure fi, PSi does not contain the zero frequency:
+        psi = psi[fi > 0]
+        fi = fi[fi > 0]
+
+        # Adjust fmin and fmax to fi bounds if not specified
+        fmin = fmin or fi[0]
+        fmax = fmax or fi[-1]
+
+        # Go alpha times further in frequency to avoid interpolation aliasing.
+        fmaxr = alpha * fmax
+
+        # Interpolation of the non-zero part of the spectrum
+        f = np.arange(fmin, fmaxr + fmin, fmin)
+        mask = psi > 0
+        ps = np.exp(np.interp(np.log(f), np.log(fi[mask]),
+                              np.log(psi[mask])))
+
+        # lf_extpl=True prolongates the PSi as a plateau below min(fi).
+        # Otherwise, we consider zeros values. same for hf
+        ps[f < fi[0]] = psi[0] if lf_extpl else 0
+        ps[f > fi[-1]] = psi[-1] if hf_extpl else 0
+        ps[f > fmax] = 0
+
+        # Detect the sections (if any) where PSi==0 and apply it to PS
+        mask = np.interp(f, fi, psi)
+        ps[mask == 0] = 0
+
+        f_size = f.size
+        phase = np.empty((2 * f_size + 1))
+        # Each signal draws from its own random stream: the signals can be
+        # synthesized concurrently.
+        random_state = np.random.RandomState(nseed)
+        phase[1:(f_size + 1)] = random_state.random_sample(f_size) * 2 * np.pi
+        phase[0] = 0
+        phase[-f_size:] = -phase[1:(f_size + 1)][::-1]
+
+        fft1a = np.concatenate((np.array([0]), 0.5 * ps, 0.5 * ps[::-1]),
+                               axis=0)
+        fft1a = np.sqrt(fft1a) * np.exp(1j * phase) / fmin**0.5
+
+        #: Values of the signal over one period.
+        self.yg = 2 * fmaxr * np.real(backend.ifft(fft1a))
+        #: Positions of the values over one period.
+        self.xg = np.linspace(0, 0.5 / fmaxr * self.yg.shape[0],
+                              self.yg.shape[0])
+        #: Period of the signal.
+        self.period = self.xg.max()
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """Evaluates the signal at the requested positions.
+
+        Args:
+            x (numpy.ndarray): Positions of the signal to evaluate.
+
+        Returns:
+            numpy.ndarray: The values of the signal.
+        """
+        return np.interp(np.mod(x, self.period), self.xg, self.yg)
+
+
 def gen_signal_1d(fi: np.ndarray,
                   psi: np.ndarray,
                   x: np.ndarray,
@@ -92,46 +266,22 @@ def gen_signal_1d(fi: np.ndarray,
                   lf_extpl: bool = False,
                   hf_extpl: bool = False) -> np.ndarray:
     """Generate 1d random signal using Fourier coefficient"""
-    # Make sure fi, PSi does not contain the zero frequency:
-    psi = psi[fi > 0]
-    fi = fi[fi > 0]
+    return Signal1D(fi, psi, nseed, fmin, fmax, alpha, lf_extpl,
+                    hf_extpl)(x)
 
-    # Adjust fmin and fmax to fi bounds if not specified
-    fmin = fmin or fi[0]
-    fmax = fmax or fi[-1]
 
-    # Go alpha times further in frequency to avoid interpolation aliasing.
-    fmaxr = alpha * fmax
+@nb.njit(cache=True, nogil=True)
+def _ring_range(f: np.ndarray, value: float, dfx: float) -> Tuple[int, int]:
+    """Range of the rings that may contain a frequency"""
+    first = max(np.searchsorted(f, value - dfx) - 1, 0)
+    last = min(np.searchsorted(f, value + dfx) + 1, f.size)
+    return first, last
 
-    # Interpolation of the non-zero part of the spectrum
-    f = np.arange(fmin, fmaxr + fmin, fmin)
-    mask = psi > 0
-    ps = np.exp(np.interp(np.log(f), np.log(fi[mask]), np.log(psi[mask])))
 
-    # lf_extpl=True prolongates the PSi as a plateau below min(fi).
-    # Otherwise, we consider zeros values. same for hf
-    ps[f < fi[0]] = psi[0] if lf_extpl else 0
-    ps[f > fi[-1]] = psi[-1] if hf_extpl else 0
-    ps[f > fmax] = 0
-
-    # Detect the sections (if any) where PSi==0 and apply it to PS
-    mask = np.interp(f, fi, psi)
-    ps[mask == 0] = 0
-
-    f_size = f.size
-    phase = np.empty((2 * f_size + 1))
-    np.random.seed(nseed)
-    phase[1:(f_size + 1)] = np.random.random(f_size) * 2 * np.pi
-    phase[0] = 0
-    phase[-f_size:] = -phase[1:(f_size + 1)][::-1]
-
-    fft1a = np.concatenate((np.array([0]), 0.5 * ps, 0.5 * ps[::-1]), axis=0)
-    fft1a = np.sqrt(fft1a) * np.exp(1j * phase) / fmin**0.5
-
-    yg = 2 * fmaxr * np.real(IFFT(fft1a))
-    xg = np.linspace(0, 0.5 / fmaxr * yg.shape[0], yg.shape[0])
-
-    return np.interp(np.mod(x, xg.max()), xg, yg)
+@nb.njit(cache=True, nogil=True)
+def _in_ring(item: float, value: float, dfx_2: float) -> bool:
+    """True if the frequency is within the ring centered on item"""
+    return value >= (item - dfx_2) and value < (item + dfx_2)
 
 
 @nb.njit("(float64[:, ::1])"
@@ -142,35 +292,80 @@ def _calculate_ps2d(f: np.ndarray, f2: np.ndarray, ps1d: np.ndarray,
                     dfx: np.ndarray, dfy: np.ndarray) -> np.ndarray:
     result = np.zeros(f2.shape)
     view = result.ravel()
+    values = f2.ravel()
     dfx_2 = dfx * 0.5
     dfx_y = dfx * dfy
-    for idx in range(-1, -f.size - 1, -1):
-        item = f[idx]
-        mask = (f2 >= (item - dfx_2)) & (f2 < (item + dfx_2))
-        amount = np.sum(result[:, idx]) * dfx_y
+    num_frequencies = f.size
+    column_shift = f2.shape[1] - num_frequencies
+
+    # Binning of the 2D frequencies: each cell is assigned to the rings
+    # [f - dfx / 2, f + dfx / 2[ containing it. The rings are stored as
+    # lists of cells (CSR layout).
+    offsets = np.zeros(num_frequencies + 1, dtype=np.int64)
+    for ix in range(values.size):
+        first, last = _ring_range(f, values[ix], dfx)
+        for jx in range(first, last):
+            if _in_ring(f[jx], values[ix], dfx_2):
+                offsets[jx + 1] += 1
+    offsets = np.cumsum(offsets)
+    cells = np.empty(offsets[-1], dtype=np.int64)
+    position = offsets[:-1].copy()
+    for ix in range(values.size):
+        first, last = _ring_range(f, values[ix], dfx)
+        for jx in range(first, last):
+            if _in_ring(f[jx], values[ix], dfx_2):
+                cells[position[jx]] = ix
+                position[jx] += 1
+
+    # The rings are processed from the highest frequency: the energy missing
+    # in the column of a frequency is spread over its ring.
+    for idx in range(num_frequencies - 1, -1, -1):
+        amount = np.sum(result[:, idx + column_shift]) * dfx_y
         miss = ps1d[idx] * dfx - amount
-        view[mask.ravel()] = 0 if miss <= 0 else miss * 0.5 / dfx_y
+        value = 0 if miss <= 0 else miss * 0.5 / dfx_y
+        for jx in range(offsets[idx], offsets[idx + 1]):
+            view[cells[jx]] = value
     return result
 
 
-@nb.njit("(float64[:, ::1])"
-         "(float64[:, ::1], float64[::1], float64[::1], float64, float64)",
-         cache=True,
-         nogil=True)
-def _calculate_signal(rectangle, x, y, xgmax, ygmax):
-    result = np.zeros((len(y), len(x)))
-    xn = (x.max() - x[0]) // xgmax
-    yn = (y.max() - y[0]) // ygmax
-    dx = x - x[0]
-    dy = y - y[0]
-
-    for ix_n in range(int(xn + 1)):
-        ix0 = np.where((dx >= (ix_n * xgmax)) & (dx < ((ix_n + 1) * xgmax)))[0]
-        for iy_n in range(int(yn + 1)):
-            iy0 = np.where((dy >= (iy_n * ygmax))
-                           & (dy < ((iy_n + 1) * ygmax)))[0]
-            result[iy0[0]:iy0[-1] + 1,
-                   ix0[0]:ix0[-1] + 1] = rectangle[:len(iy0), :len(ix0)]
+@nb.njit(cache=True, nogil=True)
+def _periodic_stencil(axis: np.ndarray,
+                      positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of the cell of the axis containing each position, relative to
+    the first position and wrapped around the period of the axis, and the
+    weight of the next node."""
+    period = axis[-1]
+    step = axis[1] - axis[0]
+    last = axis.size - 2
+    index = np.empty(positions.shape, dtype=np.int64)
+    weight = np.empty(positions.shape)
+    for ix in range(positions.size):
+        delta = (positions[ix] - positions[0]) % period
+        item = min(int(delta / step), last)
+        index[ix] = item
+        weight[ix] = (delta - axis[item]) / step
+    return index, weight
+
+
+@nb.njit(cache=True, nogil=True, parallel=True)
+def _periodic_bilinear(tile: np.ndarray, xg: np.ndarray, yg: np.ndarray,
+                       x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Bilinear interpolation of a periodic signal, defined over one period
+    by a tile on a regular grid, at the grid defined by x and y."""
+    ix, wx = _periodic_stencil(xg, x)
+    iy, wy = _periodic_stencil(yg, y)
+    result = np.empty((y.size, x.size))
+    for row in nb.prange(y.size):
+        j0 = iy[row]
+        w1 = wy[row]
+        w0 = 1 - w1
+        for col in range(x.size):
+            i0 = ix[col]
+            v1 = wx[col]
+            v0 = 1 - v1
+            result[row, col] = (
+                w0 * (v0 * tile[j0, i0] + v1 * tile[j0, i0 + 1]) + w1 *
+                (v0 * tile[j0 + 1, i0] + v1 * tile[j0 + 1, i0 + 1]))
     return result
 
 
@@ -181,8 +376,22 @@ def gen_ps2d(fi: np.ndarray,
              fmax: float,
              alpha: int = 10,
              lf_extpl: bool = False,
-             hf_extpl: bool = False) -> Tuple[np.ndarray, np.ndarray]:
-    """TODO(lgaultier)"""
+             hf_extpl: bool = False,
+             cache_directory: Optional[str] = None
+             ) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the 2D power spectral density following the given 1D power
+    spectral density.
+
+    If a cache directory is provided, the 2D spectrum is stored on disk,
+    keyed by a hash of the spectrum and of the parameters, and read by the
+    following runs and the other processes.
+    """
+    path = None
+    if cache_directory is not None:
+        path = os.path.join(
+            cache_directory, "ps2d",
+            cache.fingerprint(fi, psi, fminx, fminy, fmax, alpha, lf_extpl,
+                              hf_extpl) + ".npy")
     if fminy < fminx:
         fmin, fminy = fminy, fminx
     else:
@@ -211,6 +420,10 @@ def gen_ps2d(fi: np.ndarray,
     ps[psmask == 0] = 0
     ps1d = ps
 
+    ps2d = cache.load_array(path) if path is not None else None
+    if ps2d is not None:
+        return ps2d, f
+
     # Build the 2D PSD following the given 1D PSD
     fx = np.concatenate(([0], f))
     fy = np.concatenate(([0], np.arange(fminy, fmaxr + fminy, fminy)))
@@ -220,9 +433,121 @@ def gen_ps2d(fi: np.ndarray,
     dfy = fminy
     ps2d = _calculate_ps2d(f, f2, ps1d, dfx, dfy)
     ps2d[f2 > fmax] = 0
+    if path is not None:
+        cache.save_array(path, ps2d)
     return ps2d, f
 
 
+class Signal2D:
+    """Periodic 2d random signal synthesized from a 2d spectrum using
+    Fourier coefficients.
+
+    The tile holding one period of the signal is calculated once, then
+    sampled at the requested positions. A tile calculated beforehand is
+    reused with :meth:`from_tile`.
+
+    Args:
+        ps2d (numpy.ndarray): 2d power spectral density.
+        f (numpy.ndarray): Frequencies of the spectrum.
+        fminx (float): Minimal frequency along the x axis.
+        fminy (float): Minimal frequency along the y axis.
+        fmax (float): Maximal frequency of the signal.
+        alpha (int, optional): Oversampling factor of the frequencies.
+        nseed (int, optional): Seed of the random phases.
+        backend (fft.Backend, optional): FFT backend used to synthesize the
+            signal. Default to the backend selected automatically.
+    """
+    def __init__(self,
+                 ps2d: np.ndarray,
+                 f: np.ndarray,
+                 fminx: float,
+                 fminy: float,
+                 fmax: float,
+                 alpha: int = 10,
+                 nseed: int = 0,
+                 backend: Optional[fft.Backend] = None) -> None:
+        backend = backend or fft.create()
+        if fminy < fminx:
+            fmin, fminr = fminy, fminx
+        else:
+            fmin, fminr = fminx, fminy
+
+        # Go alpha times further in frequency to avoid interpolation aliasing.
+        fmaxr = alpha * fmax
+
+        # Build the 2D PSD following the given 1D PSD
+        fx = np.concatenate(([0], f))
+        fy = np.concatenate(([0], np.arange(fminr, fmaxr + fminr, fminr)))
+        dfx, dfy = fmin, fminr
+
+        random_state = np.random.RandomState(nseed)
+        phase = random_state.random_sample(
+            (2 * len(fy) - 1, len(fx))) * 2 * np.pi
+        phase[0, 0] = 0.
+        phase[-len(fy) + 1:, 0] = -phase[1:len(fy), 0][::-1]
+
+        fft2a = np.concatenate((0.25 * ps2d, 0.25 * ps2d[1:, :][::-1, :]),
+                               axis=0)
+        fft2a = np.sqrt(fft2a) * np.exp(1j * phase) / np.sqrt((dfx * dfy))
+        fft2 = np.zeros((2 * len(fy) - 1, 2 * len(fx) - 1), dtype=complex)
+        fft2[:, :len(fx)] = fft2a
+        fft2[1:, -len(fx) + 1:] = fft2a[1:, 1:].conj()[::-1, ::-1]
+        fft2[0, -len(fx) + 1:] = fft2a[0, 1:].conj()[::-1]
+
+        self._set_tile((4 * fy[-1] * fx[-1]) * np.real(backend.ifft2(fft2)),
+                       fminx, fminy)
+
+    def _set_tile(self, sg: np.ndarray, fminx: float, fminy: float) -> None:
+        """Sets the tile holding one period of the signal"""
+        #: True if the axes of the tile are swapped.
+        self.revert = fminy < fminx
+        if self.revert:
+            fminx, fminy = fminy, fminx
+        #: Values of the signal over one period.
+        self.sg = sg
+        #: Positions of the values over one period along the x axis.
+        self.xg = np.linspace(0, 1 / fminx, self.sg.shape[1])
+        #: Positions of the values over one period along the y axis.
+        self.yg = np.linspace(0, 1 / fminy, self.sg.shape[0])
+
+    @classmethod
+    def from_tile(cls, sg: np.ndarray, fminx: float,
+                  fminy: float) -> "Signal2D":
+        """Creates the signal from a tile calculated beforehand.
+
+        Args:
+            sg (numpy.ndarray): Values of the signal over one period, as
+                stored in the attribute ``sg``. A memory-mapped array is not
+                copied.
+            fminx (float): Minimal frequency along the x axis.
+            fminy (float): Minimal frequency along the y axis.
+
+        Returns:
+            Signal2D: The signal.
+        """
+        result = cls.__new__(cls)
+        result._set_tile(np.asarray(sg), fminx, fminy)
+        return result
+
+    def __call__(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Evaluates the signal on the grid defined by the positions
+        provided, relative to the first position of each axis.
+
+        Args:
+            x (numpy.ndarray): Positions along the x axis.
+            y (numpy.ndarray): Positions along the y axis.
+
+        Returns:
+            numpy.ndarray: The values of the signal (y, x).
+        """
+        if self.revert:
+            x, y = y, x
+        signal = _periodic_bilinear(self.sg, self.xg, self.yg,
+                                    np.ascontiguousarray(x, dtype=np.float64),
+                                    np.ascontiguousarray(y, dtype=np.float64))
+        return signal.transpose() if self.revert else signal
+
+
 def gen_signal_2d_rectangle(ps2d: np.ndarray,
                             f: np.ndarray,
                             x: np.ndarray,
@@ -232,46 +557,5 @@ def gen_signal_2d_rectangle(ps2d: np.ndarray,
                             fmax: float,
                             alpha: int = 10,
                             nseed: int = 0) -> np.ndarray:
-    """TODO(lgaultier)"""
-    revert = fminy < fminx
-    if revert:
-        fmin, fminy = fminy, fminx
-        x, y = y, x
-    else:
-        fmin = fminx
-
-    # Go alpha times further in frequency to avoid interpolation aliasing.
-    fmaxr = alpha * fmax
-
-    # Build the 2D PSD following the given 1D PSD
-    fx = np.concatenate(([0], f))
-    fy = np.concatenate(([0], np.arange(fminy, fmaxr + fminy, fminy)))
-    dfx, dfy = fmin, fminy
-
-    np.random.seed(nseed)
-    phase = np.random.random((2 * len(fy) - 1, len(fx))) * 2 * np.pi
-    phase[0, 0] = 0.
-    phase[-len(fy) + 1:, 0] = -phase[1:len(fy), 0][::-1]
-
-    fft2a = np.concatenate((0.25 * ps2d, 0.25 * ps2d[1:, :][::-1, :]), axis=0)
-    fft2a = np.sqrt(fft2a) * np.exp(1j * phase) / np.sqrt((dfx * dfy))
-    fft2 = np.zeros((2 * len(fy) - 1, 2 * len(fx) - 1), dtype=complex)
-    fft2[:, :len(fx)] = fft2a
-    fft2[1:, -len(fx) + 1:] = fft2a[1:, 1:].conj()[::-1, ::-1]
-    fft2[0, -len(fx) + 1:] = fft2a[0, 1:].conj()[::-1]
-
-    sg = (4 * fy[-1] * fx[-1]) * np.real(IFFT2(fft2))
-    xg = np.linspace(0, 1 / fmin, sg.shape[1])
-    yg = np.linspace(0, 1 / fminy, sg.shape[0])
-    xgmax = xg.max()
-    ygmax = yg.max()
-
-    yl = y - y[0]
-    yl = yl[yl < yg.max()]
-    xl = x - x[0]
-    xl = xl[xl < xg.max()]
-    rectangle = np.ascontiguousarray(
-        scipy.interpolate.interp2d(xg, yg, sg)(xl, yl))
-    signal = _calculate_signal(rectangle, x, y, xgmax, ygmax)
-
-    return signal.transpose() if revert else signal
+    """Generate 2d random signal using Fourier coefficient"""
+    return Signal2D(ps2d, f, fminx, fminy, fmax, alpha, nseed)(x, y)
@@ -6,91 +6,107 @@
 Wet troposphere errors
 ----------------------
 """
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
 import numba as nb
 import numpy as np
 import scipy.ndimage.filters
 
+from . import fft
 from . import utils
+from .. import cache
 from .. import settings
 from .. import F_KA, VOLUMETRIC_MEAN_RADIUS, CELERITY, BASELINE
 
 
-@nb.njit(cache=True, nogil=True)
-def _meshgrid(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-    nx = x.size
-    ny = y.size
-    mx = np.empty((ny, nx))
-    my = np.empty((ny, nx))
-    for idx in range(ny):
-        mx[idx, :] = x
-    for idx in range(nx):
-        my[:, idx] = y
-    return mx, my
+def _gaussian_stencil(sigma: float,
+                      delta_al: float) -> Tuple[np.ndarray, int]:
+    """Weights of the gaussian of standard deviation sigma, truncated at
+    2 * sigma, sampled at the regular along track spacing delta_al.
+
+    Returns:
+        tuple: the weights and the offset, in number of lines, of the first
+        weight relative to the convolved line.
+    """
+    # Offsets k * delta_al such as -2 * sigma < k * delta_al <= 2 * sigma
+    lower = int(np.floor(-2 * sigma / delta_al)) + 1
+    upper = int(np.floor(2 * sigma / delta_al))
+    offsets = np.arange(lower, upper + 1) * delta_al
+    return np.exp(-offsets**2 / (2 * sigma**2)), lower
+
+
+@nb.njit(cache=True, nogil=True, parallel=True)
+def _convolve_along_track(weights: np.ndarray, lower: int,
+                          column: np.ndarray) -> np.ndarray:
+    """Normalized convolution of a signal, regularly sampled along track, by
+    the gaussian stencil provided. At the ends of the pass, the result is
+    normalized by the sum of the weights of the lines available."""
+    size = column.shape[0]
+    result = np.empty((size, ))
+    for idx in nb.prange(size):
+        start = max(idx + lower, 0)
+        stop = min(idx + lower + weights.shape[0], size)
+        weighted = 0.0
+        total = 0.0
+        for jx in range(start, stop):
+            weight = weights[jx - idx - lower]
+            weighted += weight * column[jx]
+            total += weight
+        result[idx] = weighted / total
+    return result
+
+
+def _across_track_mean(sigma: float, x_ac_large: np.ndarray,
+                       wt_large: np.ndarray, position: float) -> np.ndarray:
+    """Average of the wet troposphere across track, weighted by the gaussian
+    footprint of the beam located at the position provided."""
+    # Find across track indices in the gaussian footprint of 2 * sigma
+    ind = x_ac_large + position
+    indac = np.where((ind < 2 * sigma) & (ind > -2 * sigma))[0]
+    slice_ac = slice(indac[0], indac[-1] + 1)
+    weights = np.exp(-x_ac_large[slice_ac]**2 / (2 * sigma**2))
+    return np.ascontiguousarray(
+        wt_large[:, slice_ac].dot(weights) / weights.sum())
 
 
-@nb.njit(cache=True, nogil=True)
 def _calculate_path_delay_lr(beam_positions: List[float], sigma: float,
+                             stencil: Tuple[np.ndarray, int],
                              radio_r: np.ndarray, radio_l: np.ndarray,
-                             x_al: np.ndarray, x_ac_large: np.ndarray,
-                             wt_large: np.ndarray):
-    beam_r = np.empty((x_al.shape[0], ))
-    beam_l = np.empty((x_al.shape[0], ))
-    # Find righ and leftacross track indices in the gaussian
-    # footprint of 2.*p.sigma
-    ind_r = x_ac_large + beam_positions[1]
-    indac_r = np.where((ind_r < 2 * sigma) & (ind_r > -2 * sigma))[0]
-    ind_l = x_ac_large + beam_positions[0]
-    indac_l = np.where((ind_l < 2 * sigma) & (ind_l > -2 * sigma))[0]
-
-    factor = 1 / (2 * np.pi * sigma**2)
-
-    for idx, xal in enumerate(x_al):
-        # Find along track indices in the gaussian footprint
-        # of 2.*p.sigma
-        delta_x_al = x_al - xal
-        indal = np.where((delta_x_al <= (2 * sigma))
-                         & (delta_x_al > (-2 * sigma)))[0]
-        slice_al = slice(indal[0], indal[-1] + 1)
-        slice_acr = slice(indac_r[0], indac_r[-1] + 1)
-        slice_acl = slice(indac_l[0], indac_l[-1] + 1)
-        x, y = _meshgrid(x_ac_large[slice_acr], x_al[slice_al] - xal)
-        # Compute path delay on left and right gaussian footprint
-        g = factor * np.exp(-(x**2 + y**2) / (2 * sigma**2))
-        beam_r[idx] = np.sum(
-            g * wt_large[slice_al, slice_acr]) / np.sum(g) + radio_r[idx]
-        x, y = _meshgrid(x_ac_large[slice_acl], x_al[slice_al] - xal)
-        g = factor * np.exp(-(x**2 + y**2) / (2 * sigma**2))
-        beam_l[idx] = np.sum(
-            g * wt_large[slice_al, slice_acl]) / np.sum(g) + radio_l[idx]
+                             x_ac_large: np.ndarray, wt_large: np.ndarray):
+    """Path delay of the right and left beams.
+
+    The gaussian footprint of the beams is separable: the wet troposphere is
+    first averaged across track, then convolved along track with the
+    stencil computed by :func:`_gaussian_stencil`."""
+    beam_r = _convolve_along_track(
+        *stencil,
+        _across_track_mean(sigma, x_ac_large, wt_large,
+                           beam_positions[1])) + radio_r
+    beam_l = _convolve_along_track(
+        *stencil,
+        _across_track_mean(sigma, x_ac_large, wt_large,
+                           beam_positions[0])) + radio_l
     return beam_r, beam_l
 
 
-@nb.njit(cache=True, nogil=True)
-def _calculate_path_delay(sigma: float, radio: np.ndarray, x_al: np.ndarray,
-                          x_ac_large: np.ndarray, wt_large: np.ndarray):
-    beam = np.empty((x_al.shape[0], ))
-    # Find across track indices in the gaussian footprint of
-    # 2. * sigma
-    indac = np.where((x_ac_large < 2 * sigma) & (x_ac_large > -2 * sigma))[0]
-    factor = 1 / (2 * np.pi * sigma**2)
-    for idx, xal in enumerate(x_al):
-        delta_x_al = x_al[:] - xal
-        indal = np.where((delta_x_al <= (2 * sigma))
-                         & (delta_x_al > (-2 * sigma)))[0]
-        slice_al = slice(indal[0], indal[-1] + 1)
-        slice_ac = slice(indac[0], indac[-1] + 1)
-        x, y = _meshgrid(x_ac_large[slice_ac], x_al[slice_al] - xal)
-        # Compute path delay on gaussian footprint
-        g = factor * np.exp(-(x**2 + y**2) / (2 * sigma**2))
-        beam[idx] = np.sum(
-            g * wt_large[slice_al, slice_ac]) / np.sum(g) + radio[idx]
-    return beam
+def _calculate_path_delay(sigma: float, stencil: Tuple[np.ndarray, int],
+                          radio: np.ndarray, x_ac_large: np.ndarray,
+                          wt_large: np.ndarray):
+    """Path delay of the nadir beam."""
+    return _convolve_along_track(
+        *stencil, _across_track_mean(sigma, x_ac_large, wt_large, 0)) + radio
 
 
 class WetTroposphere:
     """Wet troposphere errors
 
+    The random field of the wet troposphere is synthesized once per process.
+    If the ``cache_directory`` setting is defined, the synthesized field is
+    written in this directory, keyed by a hash of the spectrum and of the
+    seed, and memory-mapped read-only by the other processes; in this case,
+    the 2D spectrum is not serialized with the instance.
+
     Args:
         parameters (settings.Parameters): Simulation settings
     """
@@ -107,6 +123,9 @@ class WetTroposphere:
         self.nbeam = parameters.nbeam
         self.nseed = parameters.nseed + 4
         self.sigma = parameters.sigma
+        #: Gaussian footprint of the beams along track, computed once since
+        #: the lines of the passes are regularly spaced by delta_al.
+        self.stencil = _gaussian_stencil(self.sigma, self.delta_al)
         # TODO
         self.conversion_factor = (
             1 / (F_KA * 2 * np.pi / CELERITY * BASELINE) *
@@ -123,17 +142,19 @@ class WetTroposphere:
         self.pswt = pswt
         self.freq = freq
         self.fminx = 1 / self.len_repeat
-        self.ps2d, self.f = utils.gen_ps2d(freq,
-                                           pswt,
-                                           fminx=self.fminx,
-                                           fminy=1 / self.LC_MAX,
-                                           fmax=self.F_MAX,
-                                           alpha=self.ALPHA,
-                                           lf_extpl=True,
-                                           hf_extpl=True)
+        self.cache_directory = parameters.cache_directory
+        #: FFT backend used to synthesize the random signals
+        self.backend = fft.from_parameters(parameters)
+        # Without cache directory, the 2D spectrum is calculated once and
+        # serialized with the instance. Otherwise, it is only calculated if
+        # the random field is not already stored in the cache.
+        self.ps2d: Optional[np.ndarray] = None
+        self.f: Optional[np.ndarray] = None
+        if self.cache_directory is None:
+            self.ps2d, self.f = self._spectrum()
+        self._signal: Optional[utils.Signal2D] = None
+        self._lock = threading.Lock()
 
-    def _radiometer_error(self,
-                          x_al: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         # Define radiometer error power spectrum for a beam
         # High frequencies are cut to filter the associated error:
         # during the reconstruction of the wet trop signal
@@ -142,28 +163,97 @@ class WetTroposphere:
         mask = (self.freq > 0.0023) & (self.freq <= 0.0683)
         psradio[mask] = 0.036 * self.freq[mask]**-0.814
         psradio[self.freq > 0.0683] = 0.32
+        # The random signals of the radiometer error of the right and left
+        # beams are synthesized once for all the passes.
+        self.radiometer_r = utils.Signal1D(self.freq,
+                                           psradio,
+                                           fmin=1 / self.len_repeat,
+                                           fmax=1 / (2 * self.delta_al),
+                                           alpha=10,
+                                           nseed=self.nseed + 100,
+                                           hf_extpl=True,
+                                           lf_extpl=True,
+                                           backend=self.backend)
+        self.radiometer_l = utils.Signal1D(self.freq,
+                                           psradio,
+                                           fmin=1 / self.len_repeat,
+                                           fmax=1 / (2 * self.delta_al),
+                                           alpha=10,
+                                           nseed=self.nseed + 200,
+                                           hf_extpl=True,
+                                           lf_extpl=True,
+                                           backend=self.backend)
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_signal"] = None
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _spectrum(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculates the 2D spectrum of the wet troposphere"""
+        return utils.gen_ps2d(self.freq,
+                              self.pswt,
+                              fminx=self.fminx,
+                              fminy=1 / self.LC_MAX,
+                              fmax=self.F_MAX,
+                              alpha=self.ALPHA,
+                              lf_extpl=True,
+                              hf_extpl=True,
+                              cache_directory=self.cache_directory)
+
+    def _synthesize(self) -> utils.Signal2D:
+        """Synthesizes the random field of the wet troposphere, or reads it
+        from the cache directory."""
+        path = None
+        if self.cache_directory is not None:
+            path = os.path.join(
+                self.cache_directory, "wet_troposphere",
+                cache.fingerprint(self.freq, self.pswt, self.fminx,
+                                  1 / self.LC_MAX, self.F_MAX, self.ALPHA,
+                                  self.nseed) + ".npy")
+            tile = cache.load_array(path)
+            if tile is not None:
+                return utils.Signal2D.from_tile(tile, self.fminx,
+                                                1 / self.LC_MAX)
+
+        if self.ps2d is None:
+            ps2d, f = self._spectrum()
+        else:
+            ps2d, f = self.ps2d, self.f
+        signal = utils.Signal2D(ps2d,
+                                f,
+                                fminx=self.fminx,
+                                fminy=1 / self.LC_MAX,
+                                fmax=self.F_MAX,
+                                alpha=self.ALPHA,
+                                nseed=self.nseed,
+                                backend=self.backend)
+        if path is None:
+            return signal
+        cache.save_array(path, signal.sg)
+        # The field written is mapped, so that the processes of the node
+        # share the same pages.
+        return utils.Signal2D.from_tile(cache.load_array(path), self.fminx,
+                                        1 / self.LC_MAX)
+
+    def signal(self) -> utils.Signal2D:
+        """Get the random field of the wet troposphere"""
+        with self._lock:
+            if self._signal is None:
+                self._signal = self._synthesize()
+            return self._signal
+
+    def _radiometer_error(self,
+                          x_al: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         # Compute random coefficients (1D) for the radiometer error
         # power spectrum for right and left beams
-        hrad = utils.gen_signal_1d(self.freq,
-                                   psradio,
-                                   x_al,
-                                   fmin=1 / self.len_repeat,
-                                   fmax=1 / (2 * self.delta_al),
-                                   alpha=10,
-                                   nseed=self.nseed + 100,
-                                   hf_extpl=True,
-                                   lf_extpl=True)
-        radio_r = hrad * 1e-2
-        hrad = utils.gen_signal_1d(self.freq,
-                                   psradio,
-                                   x_al,
-                                   fmin=1 / self.len_repeat,
-                                   fmax=1 / (2 * self.delta_al),
-                                   alpha=10,
-                                   nseed=self.nseed + 200,
-                                   hf_extpl=True,
-                                   lf_extpl=True)
-        radio_l = hrad * 1e-2
+        radio_r = self.radiometer_r(x_al) * 1e-2
+        radio_l = self.radiometer_l(x_al) * 1e-2
 
         return radio_r, radio_l
 
@@ -194,32 +284,17 @@ class WetTroposphere:
         naclarge = np.shape(x_ac_large)[0]
         # Compute path delay error due to wet tropo and radiometer error
         # using random coefficient initialized with power spectrums
-        wt = utils.gen_signal_2d_rectangle(self.ps2d,
-                                           self.f,
-                                           x_al,
-                                           x_ac,
-                                           fminx=self.fminx,
-                                           fminy=1 / self.LC_MAX,
-                                           fmax=self.F_MAX,
-                                           alpha=self.ALPHA,
-                                           nseed=self.nseed)
-        wt = wt.T * 1e-2
-        wt_large = utils.gen_signal_2d_rectangle(self.ps2d,
-                                                 self.f,
-                                                 x_al,
-                                                 x_ac_large,
-                                                 fminx=self.fminx,
-                                                 fminy=1 / self.LC_MAX,
-                                                 fmax=self.F_MAX,
-                                                 alpha=self.ALPHA,
-                                                 nseed=self.nseed)
-        wt_large = wt_large.T * 1e-2
+        # The random field is synthesized once and sampled on the swath and
+        # on the large swath.
+        signal = self.signal()
+        wt = signal(x_al, x_ac).T * 1e-2
+        wt_large = signal(x_al, x_ac_large).T * 1e-2
 
         # Compute Residual path delay error after a 1-beam radiometer
         # correction
         if self.nbeam == 1:
-            beam = _calculate_path_delay(self.sigma, radio_l, x_al, x_ac_large,
-                                         wt_large)
+            beam = _calculate_path_delay(self.sigma, self.stencil, radio_l,
+                                         x_ac_large, wt_large)
             beam = scipy.ndimage.filters.gaussian_filter(
                 beam, 30. / self.delta_al)
             beam2d = np.vstack(num_pixels * (beam, )).T
@@ -231,8 +306,8 @@ class WetTroposphere:
         # correction
         elif self.nbeam == 2:
             beam_r, beam_l = _calculate_path_delay_lr(self.beam_positions,
-                                                      self.sigma, radio_r,
-                                                      radio_l, x_al,
+                                                      self.sigma, self.stencil,
+                                                      radio_r, radio_l,
                                                       x_ac_large, wt_large)
             # Filtering beam signal to cut frequencies higher than 125 km
             beam_r = scipy.ndimage.filters.gaussian_filter(
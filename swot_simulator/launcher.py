@@ -9,7 +9,7 @@ Main program
 This module defines the main :func:`function <launch>` handling the simulation
 of SWOT products as well as the entry point of the main program.
 """
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import argparse
 import datetime
 import logging
@@ -18,6 +18,7 @@ import sys
 import traceback
 import dask.distributed
 import dateutil.parser
+import numba as nb
 import numpy as np
 from . import dispatch
 from . import exception
@@ -26,6 +27,7 @@ from . import product_specification
 from . import orbit_propagator
 from . import settings
 from .error import generator
+from .plugins import detail
 
 #: Logger of this module
 LOGGER = logging.getLogger(__name__)
@@ -119,6 +121,23 @@ def usage() -> argparse.Namespace:
                        "default, use a local cluster.",
                        metavar='PATH',
                        type=argparse.FileType("r"))
+    group.add_argument("--tasks-per-worker",
+                       help="Maximum number of tasks queued on each worker. "
+                       "(Default to 2)",
+                       type=int,
+                       metavar='N',
+                       default=2)
+    group.add_argument("--group-by-pass",
+                       action="store_true",
+                       help="Simulate all the cycles of a pass number in a "
+                       "single task")
+    group.add_argument("--cycles-per-batch",
+                       help="Number of cycles of a pass whose errors are "
+                       "generated together, with --group-by-pass. "
+                       "(Default to 4)",
+                       type=int,
+                       metavar='N',
+                       default=4)
     group = parser.add_argument_group("LocalCluster",
                                       "Dask local cluster option")
     group.add_argument("--n-workers",
@@ -166,11 +185,16 @@ def file_path(first_date: np.datetime64,
             measurements.
 
     Returns:
-        str: The path to the file to be created.
+        str: The path to the file to be created. With the Zarr output format,
+        the path to the group of the pass in the store of the cycle.
     """
     first_date = first_date.astype(datetime.datetime)
     last_date = last_date.astype(datetime.datetime)
     product_type = "nadir" if nadir else "karin"
+    if parameters.output_format == "zarr":
+        return os.path.join(parameters.working_directory, product_type,
+                            f"cycle_{cycle_number:03d}.zarr",
+                            f"pass_{pass_number:03d}")
     dirname = os.path.join(parameters.working_directory, product_type,
                            first_date.strftime("%Y"))
     os.makedirs(dirname, exist_ok=True)
@@ -188,46 +212,81 @@ def file_path(first_date: np.datetime64,
     return os.path.join(dirname, filename)
 
 
-def sum_error(errors: Dict[str, np.ndarray], swath: bool = True) -> np.ndarray:
-    """Calculate the sum of errors
+@nb.njit(cache=True, nogil=True)
+def _mask_and_add(error: np.ndarray, mask: np.ndarray,
+                  swath: np.ndarray) -> None:
+    """Masks a swath error in place and adds it to the SSH of the swath, in a
+    single pass over the arrays."""
+    for ix in range(error.shape[0]):
+        for jx in range(error.shape[1]):
+            value = error[ix, jx] * mask[ix, jx]
+            error[ix, jx] = value
+            swath[ix, jx] += value
 
-    Args:
-        errors (dict): Simulated errors.
-        swath (bool, optional): True if the measurements processed concern the
-            swath.
 
-    Returns:
-        numpy.ndarray: The sum of errors
+def accumulate_errors(errors: Dict[str, np.ndarray], mask: np.ndarray,
+                      swath: Optional[np.ndarray],
+                      nadir: Optional[np.ndarray]) -> None:
+    """Masks the swath errors and adds the errors to the SSH, in place.
+
+    Args:
+        errors (dict): Simulated errors. The swath errors are masked in
+            place.
+        mask (numpy.ndarray): Mask to set the measurements outside the
+            requirements of the mission to NaN.
+        swath (numpy.ndarray, optional): SSH of the swath, masked, to which
+            the swath errors are added.
+        nadir (numpy.ndarray, optional): SSH at nadir to which the nadir
+            errors are added.
     """
-    dims = 2 if swath else 1
-    return np.add.reduce(
-        [item for item in errors.values() if len(item.shape) == dims])
+    for error in errors.values():
+        if error.ndim == 2:
+            if swath is not None:
+                _mask_and_add(error, mask, swath)
+            else:
+                error *= mask
+        elif nadir is not None:
+            nadir += error
 
 
-def simulate(args: Tuple[int, int, np.datetime64],
-             error_generator: generator.Generator,
-             orbit: orbit_propagator.Orbit,
-             parameters: settings.Parameters,
-             logging_server: Optional[Tuple[str, int, int]] = None) -> None:
-    """Simulate a pass.
+def write_product(product: product_specification.Nadir, cycle_number: int,
+                  pass_number: int, path: str,
+                  parameters: settings.Parameters) -> None:
+    """Writes a product in the output format selected.
 
     Args:
-        simulation arguments (tuple): cycle & pass number, date of the first
-            half-orbit measurement
-        error_generator (generator.Generator): Measurement error generator.
-        orbit (orbit_propagator.Orbit): Orbit propagator.
+        product (product_specification.Nadir): Product to write.
+        cycle_number (int): Cycle number.
+        pass_number (int): Pass number.
+        path (str): Path to the product to create.
         parameters (settings.Parameters): Simulation parameters.
-        logging_server (tuple, optional): Log server connection settings.
     """
-    cycle_number, pass_number, date = args
+    if parameters.output_format == "zarr":
+        product.to_zarr(cycle_number, pass_number, path,
+                        parameters.complete_product, parameters.write_profile)
+    else:
+        product.to_netcdf(cycle_number, pass_number, path,
+                          parameters.complete_product,
+                          parameters.write_profile)
 
-    # Initialize this worker's logger.
-    if logging_server is not None:
-        logbook.setup_worker_logging(logging_server)
 
-    # Calculation of the end date of the track.
-    last_date = date + orbit.pass_shift(pass_number)
+def product_paths(cycle_number: int, pass_number: int, date: np.datetime64,
+                  last_date: np.datetime64, parameters: settings.Parameters
+                  ) -> Tuple[Optional[str], Optional[str]]:
+    """Get the paths of the products to be created for a half-orbit.
+
+    Args:
+        cycle_number (int): Cycle number of the half-orbit.
+        pass_number (int): Pass number of the half-orbit.
+        date (numpy.datetime64): Date of the first simulated measurement.
+        last_date (numpy.datetime64): Date of the last simulated measurement.
+        parameters (settings.Parameters): Simulation parameters.
 
+    Returns:
+        tuple: The paths of the swath and nadir products to be created. A
+        path is None if the product is not requested or has already been
+        produced.
+    """
     # Paths of products to be generated.
     swath_path = None
     nadir_path = None
@@ -251,22 +310,25 @@ def simulate(args: Tuple[int, int, np.datetime64],
                                nadir=True)
         if os.path.exists(nadir_path):
             nadir_path = None
+    return swath_path, nadir_path
 
-    # To continue, there must be at least one task left for this pass.
-    if swath_path is None and nadir_path is None:
-        return
 
-    # Compute the spatial/temporal position of the satellite
-    track = orbit_propagator.calculate_pass(pass_number, orbit, parameters)
-    if track is None:
-        return
+def interpolate_swh(track: orbit_propagator.Pass,
+                    parameters: settings.Parameters
+                    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Get the SWH of the pass at the date set.
 
-    # Set the simulated date
-    track.time = date
+    Args:
+        track (orbit_propagator.Pass): Geometry of the pass.
+        parameters (settings.Parameters): Simulation parameters.
+
+    Returns:
+        tuple: The SWH of the swath and, if the SWH is interpolated by a
+        plug-in, the SWH of the swath and the nadir concatenated.
+    """
+    # Floating point type of the simulated fields
+    dtype = np.dtype(parameters.precision)
 
-    # Mask to set the measurements outside the requirements of the mission to
-    # NaN.
-    mask = track.mask()
     # Interpolation of the SWH if the user wishes.
     if parameters.swh_plugin is not None:
         # The nadir and swath data are concatenated to process the
@@ -276,21 +338,60 @@ def simulate(args: Tuple[int, int, np.datetime64],
         swath_time = np.repeat(track.time, lon.shape[1]).reshape(lon.shape)
         swh = parameters.swh_plugin.interpolate(lon.flatten(), lat.flatten(),
                                                 swath_time.flatten())
-        swh_all = swh.reshape(lon.shape)
-        swh = swh_all[:, :-1]
-    else:
-        swh_all = None
-        swh = np.full((track.x_ac.size, ), parameters.swh, dtype="f8")
+        swh_all = swh.reshape(lon.shape).astype(dtype, copy=False)
+        return swh_all[:, :-1], swh_all
+    return np.full((track.x_ac.size, ), parameters.swh, dtype=dtype), None
+
+
+def simulate_cycle(
+        track: orbit_propagator.Pass,
+        mask: np.ndarray,
+        cycle_number: int,
+        pass_number: int,
+        date: np.datetime64,
+        swath_path: Optional[str],
+        nadir_path: Optional[str],
+        error_generator: generator.Generator,
+        orbit: orbit_propagator.Orbit,
+        parameters: settings.Parameters,
+        noise_errors: Optional[Dict[str, np.ndarray]] = None,
+        swh: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None
+) -> None:
+    """Simulate one cycle of a pass whose geometry is known.
+
+    Args:
+        track (orbit_propagator.Pass): Geometry of the pass.
+        mask (numpy.ndarray): Mask to set the measurements outside the
+            requirements of the mission to NaN.
+        cycle_number (int): Cycle number.
+        pass_number (int): Pass number.
+        date (numpy.datetime64): Date of the first half-orbit measurement.
+        swath_path (str, optional): Path to the swath product to create.
+        nadir_path (str, optional): Path to the nadir product to create.
+        error_generator (generator.Generator): Measurement error generator.
+        orbit (orbit_propagator.Orbit): Orbit propagator.
+        parameters (settings.Parameters): Simulation parameters.
+        noise_errors (dict, optional): Errors already simulated for this
+            cycle. If not set, the errors are generated.
+        swh (tuple, optional): SWH of the pass returned by
+            :func:`interpolate_swh`. If not set, the SWH is interpolated.
+    """
+    # Set the simulated date
+    track.time = date
+
+    # Floating point type of the simulated fields
+    dtype = np.dtype(parameters.precision)
+
+    if swh is None:
+        swh = interpolate_swh(track, parameters)
+    swh_swath, swh_all = swh
 
     # Calculation of instrumental errors
-    noise_errors = error_generator.generate(cycle_number,
-                                            orbit.curvilinear_distance,
-                                            track.time, track.x_al, track.x_ac,
-                                            swh)
-    for error in noise_errors.values():
-        # Only the swaths must be masked
-        if len(error.shape) == 2:
-            error *= mask
+    if noise_errors is None:
+        noise_errors = error_generator.generate(cycle_number,
+                                                orbit.curvilinear_distance,
+                                                track.time, track.x_al,
+                                                track.x_ac, swh_swath)
 
     # Interpolation of the SSH if the user wishes.
     if parameters.ssh_plugin is not None:
@@ -301,10 +402,22 @@ def simulate(args: Tuple[int, int, np.datetime64],
         swath_time = np.repeat(track.time, lon.shape[1]).reshape(lon.shape)
         ssh = parameters.ssh_plugin.interpolate(lon.flatten(), lat.flatten(),
                                                 swath_time.flatten())
-        ssh = ssh.reshape(lon.shape)
+        ssh = ssh.reshape(lon.shape).astype(dtype, copy=False)
     else:
         ssh = None
 
+    # The SSH measured is accumulated in buffers allocated once for the swath
+    # and the nadir: each error is masked (only the swaths must be masked)
+    # and added to the SSH in place.
+    swath_ssh = None
+    nadir_ssh = None
+    if ssh is not None:
+        if swath_path:
+            swath_ssh = np.multiply(ssh[:, :-1], mask)
+        if nadir_path:
+            nadir_ssh = ssh[:, -1].copy()
+    accumulate_errors(noise_errors, mask, swath_ssh, nadir_ssh)
+
     if swath_path:
         LOGGER.info("generate swath %d/%d [%s, %s]", cycle_number, pass_number,
                     track.time[0], track.time[-1])
@@ -313,16 +426,16 @@ def simulate(args: Tuple[int, int, np.datetime64],
         product = product_specification.Swath(track, parameters.central_pixel,
                                               parameters.product_type)
 
-        if ssh is not None:
-            product.ssh((ssh[:, :-1] * mask) + sum_error(noise_errors))
+        if swath_ssh is not None:
+            product.ssh(swath_ssh)
             if noise_errors:
                 product.simulated_true_ssh(ssh[:, :-1])
         if swh_all is not None:
-            product.swh((swh * mask))
+            product.swh((swh_swath * mask))
 
         product.update_noise_errors(noise_errors)
-        product.to_netcdf(cycle_number, pass_number, swath_path,
-                          parameters.complete_product)
+        write_product(product, cycle_number, pass_number, swath_path,
+                      parameters)
 
     # Create the nadir dataset
     if nadir_path:
@@ -333,22 +446,183 @@ def simulate(args: Tuple[int, int, np.datetime64],
                                               standalone=not parameters.swath)
 
         # Interpolation of the SSH if the user wishes.
-        if ssh is not None:
-            product.ssh(ssh[:, -1] + sum_error(noise_errors, swath=False))
+        if nadir_ssh is not None:
+            product.ssh(nadir_ssh)
             if noise_errors:
                 product.simulated_true_ssh(ssh[:, -1])
         if swh_all is not None:
             product.swh(swh_all[:, -1])
         product.update_noise_errors(noise_errors)
-        product.to_netcdf(cycle_number, pass_number, nadir_path,
-                          parameters.complete_product)
+        write_product(product, cycle_number, pass_number, nadir_path,
+                      parameters)
+
+
+def _calculate_pass(pass_number: int, orbit: orbit_propagator.Orbit,
+                    parameters: settings.Parameters,
+                    geometry: Optional[orbit_propagator.GeometryStore]
+                    ) -> Optional[orbit_propagator.Pass]:
+    """Compute the spatial/temporal position of the satellite"""
+    if geometry is None:
+        return orbit_propagator.calculate_pass(pass_number, orbit, parameters)
+    return geometry.get(pass_number, orbit, parameters)
+
+
+def simulate(args: Tuple[int, int, np.datetime64],
+             error_generator: generator.Generator,
+             orbit: orbit_propagator.Orbit,
+             parameters: settings.Parameters,
+             logging_server: Optional[Tuple[str, int, int]] = None,
+             geometry: Optional[orbit_propagator.GeometryStore] = None
+             ) -> None:
+    """Simulate a pass.
+
+    Args:
+        simulation arguments (tuple): cycle & pass number, date of the first
+            half-orbit measurement
+        error_generator (generator.Generator): Measurement error generator.
+        orbit (orbit_propagator.Orbit): Orbit propagator.
+        parameters (settings.Parameters): Simulation parameters.
+        logging_server (tuple, optional): Log server connection settings.
+        geometry (orbit_propagator.GeometryStore, optional): Store of the
+            geometry of the passes. If not set, the geometry of the pass is
+            computed.
+    """
+    cycle_number, pass_number, date = args
+
+    # Initialize this worker's logger.
+    if logging_server is not None:
+        logbook.setup_worker_logging(logging_server)
+
+    # Calculation of the end date of the track.
+    last_date = date + orbit.pass_shift(pass_number)
+
+    swath_path, nadir_path = product_paths(cycle_number, pass_number, date,
+                                           last_date, parameters)
+
+    # To continue, there must be at least one task left for this pass.
+    if swath_path is None and nadir_path is None:
+        return
+
+    # Compute the spatial/temporal position of the satellite
+    track = _calculate_pass(pass_number, orbit, parameters, geometry)
+    if track is None:
+        return
+
+    # Mask to set the measurements outside the requirements of the mission to
+    # NaN.
+    mask = track.mask(parameters.precision)
+
+    simulate_cycle(track, mask, cycle_number, pass_number, date, swath_path,
+                   nadir_path, error_generator, orbit, parameters)
+
+
+def simulate_pass(args: Tuple[int, List[Tuple[int, np.datetime64]]],
+                  error_generator: generator.Generator,
+                  orbit: orbit_propagator.Orbit,
+                  parameters: settings.Parameters,
+                  logging_server: Optional[Tuple[str, int, int]] = None,
+                  geometry: Optional[orbit_propagator.GeometryStore] = None,
+                  cycles_per_batch: int = 4) -> None:
+    """Simulate all the cycles of a pass.
+
+    The geometry of the pass and the mask of the mission requirements are
+    calculated once, and then reused for each cycle. The errors are
+    generated for batches of cycles.
+
+    Args:
+        simulation arguments (tuple): pass number, and the list of the cycle
+            numbers and dates of the first half-orbit measurement to simulate
+        error_generator (generator.Generator): Measurement error generator.
+        orbit (orbit_propagator.Orbit): Orbit propagator.
+        parameters (settings.Parameters): Simulation parameters.
+        logging_server (tuple, optional): Log server connection settings.
+        geometry (orbit_propagator.GeometryStore, optional): Store of the
+            geometry of the passes. If not set, the geometry of the pass is
+            computed.
+        cycles_per_batch (int, optional): Number of cycles whose errors are
+            generated together.
+    """
+    pass_number, cycles = args
+
+    # Initialize this worker's logger.
+    if logging_server is not None:
+        logbook.setup_worker_logging(logging_server)
+
+    # Calculation of the duration of the track.
+    pass_shift = orbit.pass_shift(pass_number)
+
+    # Cycles for which there is at least one product left to create.
+    pending = []
+    for cycle_number, date in cycles:
+        swath_path, nadir_path = product_paths(cycle_number, pass_number,
+                                               date, date + pass_shift,
+                                               parameters)
+        if swath_path is not None or nadir_path is not None:
+            pending.append((cycle_number, date, swath_path, nadir_path))
+    if not pending:
+        return
+
+    track = _calculate_pass(pass_number, orbit, parameters, geometry)
+    if track is None:
+        return
+    mask = track.mask(parameters.precision)
+
+    cycles_per_batch = max(cycles_per_batch, 1)
+    for start in range(0, len(pending), cycles_per_batch):
+        batch = pending[start:start + cycles_per_batch]
+
+        # The SWH of each cycle is required to generate the errors.
+        swh = []
+        passes = []
+        for cycle_number, date, _, _ in batch:
+            track.time = date
+            swh.append(interpolate_swh(track, parameters))
+            passes.append((cycle_number, track.time, track.x_al, swh[-1][0]))
+        noise_errors = error_generator.generate_batch(
+            orbit.curvilinear_distance, track.x_ac, passes)
+
+        for ix, (cycle_number, date, swath_path,
+                 nadir_path) in enumerate(batch):
+            simulate_cycle(track,
+                           mask,
+                           cycle_number,
+                           pass_number,
+                           date,
+                           swath_path,
+                           nadir_path,
+                           error_generator,
+                           orbit,
+                           parameters,
+                           noise_errors=noise_errors[ix],
+                           swh=swh[ix])
+
+
+def enable_pass_caches(error_generator: generator.Generator,
+                       parameters: settings.Parameters) -> None:
+    """Keeps in memory the data reused when the cycles of a pass are
+    simulated in a row: the errors independent of the cycle number and the
+    interpolation stencils of the grid plug-ins.
+
+    Args:
+        error_generator (generator.Generator): Measurement error generator.
+        parameters (settings.Parameters): Simulation parameters.
+    """
+    error_generator.enable_cache()
+    for item in [parameters.ssh_plugin, parameters.swh_plugin]:
+        # The plug-ins are registered in a wrapper.
+        plugin = getattr(item, "plugin", None)
+        if isinstance(plugin, detail.GridTimeSeries):
+            plugin.enable_stencil_cache()
 
 
 def launch(client: dask.distributed.Client,
            parameters: settings.Parameters,
            logging_server: Optional[Tuple[str, int, int]],
            first_date: Optional[np.datetime64] = None,
-           last_date: Optional[np.datetime64] = None):
+           last_date: Optional[np.datetime64] = None,
+           tasks_per_worker: int = 2,
+           group_by_pass: bool = False,
+           cycles_per_batch: int = 4):
     """Executes the simulation set to the selected period.
 
     Args:
@@ -358,6 +632,13 @@ def launch(client: dask.distributed.Client,
         logging_server (tuple, optional): Log server connection settings.
         first_date (numpy.datetime64): First date of the simulation.
         last_date (numpy.datetime64): Last date of the simulation.
+        tasks_per_worker (int, optional): Maximum number of tasks queued on
+            each worker.
+        group_by_pass (bool, optional): True to simulate all the cycles of a
+            pass number in a single task.
+        cycles_per_batch (int, optional): Number of cycles of a pass whose
+            errors are generated together, if the cycles are grouped by
+            pass.
     """
     # Displaying Dask client information.
     LOGGER.info(client)
@@ -372,18 +653,37 @@ def launch(client: dask.distributed.Client,
     # Initialization of measurement error generators
     error_generator = generator.Generator(parameters, first_date)
 
+    # Store of the geometry of the passes, shared by all cycles.
+    geometry = orbit_propagator.GeometryStore(orbit, parameters)
+
+    if group_by_pass:
+        enable_pass_caches(error_generator, parameters)
+
     # Scatter data into distributed memory
     _error_generator = client.scatter(error_generator)
     _parameters = client.scatter(parameters)
     _orbit = client.scatter(orbit)
+    _geometry = client.scatter(geometry)
+
+    kwargs = dict()
+    if group_by_pass:
+        func = simulate_pass
+        seq = orbit.iterate_by_pass(first_date, last_date)
+        kwargs["cycles_per_batch"] = cycles_per_batch
+    else:
+        func = simulate
+        seq = orbit.iterate(first_date, last_date)
 
     dispatch.compute(client,
-                     simulate,
-                     orbit.iterate(first_date, last_date),
+                     func,
+                     seq,
+                     tasks_per_worker=tasks_per_worker,
                      error_generator=_error_generator,
                      orbit=_orbit,
                      parameters=_parameters,
-                     logging_server=logging_server)
+                     logging_server=logging_server,
+                     geometry=_geometry,
+                     **kwargs)
 
 
 def main():
@@ -407,7 +707,8 @@ def main():
     try:
         parameters = settings.eval_config_file(args.settings.name)
         launch(client, settings.Parameters(parameters), logging_server,
-               args.first_date, args.last_date)
+               args.first_date, args.last_date, args.tasks_per_worker,
+               args.group_by_pass, args.cycles_per_batch)
 
         client.close()
         logger.info("End of processing.")
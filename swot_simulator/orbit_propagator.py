@@ -6,17 +6,22 @@
 Orbit Propagator
 ----------------
 """
-from typing import Dict, Iterator, Optional, TextIO, Tuple
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 import datetime
 import logging
+import os
 import warnings
 import numpy as np
+from . import cache
 from . import math
 from . import settings
 from . import VOLUMETRIC_MEAN_RADIUS
 
 LOGGER = logging.getLogger(__name__)
 
+#: Default memory budget, in bytes, of the pass geometries kept in memory.
+DEFAULT_GEOMETRY_CACHE_SIZE = 1 << 30
+
 
 def load_ephemeris(stream: TextIO, cols: Optional[Tuple[int, int, int]] = None
                    ) -> Tuple[Dict[str, float], Tuple]:
@@ -295,6 +300,35 @@ class Orbit:
             absolute_pass_number += 1
         return StopIteration
 
+    def iterate_by_pass(
+        self,
+        first_date: Optional[np.datetime64] = None,
+        last_date: Optional[np.datetime64] = None,
+        absolute_pass_number: int = 1
+    ) -> Iterator[Tuple[int, List[Tuple[int, np.datetime64]]]]:
+        """Obtain all half-orbits within the defined time interval, grouped
+        by pass number.
+
+        Args:
+            first_date (numpy.datetime64): First date of the period to be
+                considered.
+            last_date (numpy.datetime64): Last date of the period to be
+                considered.
+            absolute_pass_number (int, optional): Absolute number of the first
+                pass to be returned.
+
+        Returns:
+            iterator: An iterator for all pass numbers in the interval
+            pointing to the pass number and the list of the cycle numbers and
+            start dates of the half-orbits.
+        """
+        passes: Dict[int, List[Tuple[int, np.datetime64]]] = dict()
+        for cycle_number, pass_number, date in self.iterate(
+                first_date, last_date, absolute_pass_number):
+            passes.setdefault(pass_number, []).append((cycle_number, date))
+        for pass_number in sorted(passes):
+            yield pass_number, passes[pass_number]
+
 
 class Pass:
     """Handle one pass
@@ -336,16 +370,23 @@ class Pass:
     def time(self, date: np.datetime64) -> None:
         self._time = date + (self.timedelta - self.timedelta[0])
 
-    def mask(self) -> np.ndarray:
+    def mask(self, dtype: Union[str, np.dtype] = np.float64) -> np.ndarray:
         """Obtain a mask to set NaN values outside the mission
-        requirements."""
+        requirements.
+
+        Args:
+            dtype (numpy.dtype, optional): Floating point type of the mask.
+
+        Returns:
+            numpy.ndarray: The mask.
+        """
         if self.requirement_bounds is not None:
-            valid = np.full_like(self.x_ac, np.nan)
+            valid = np.full(self.x_ac.shape, np.nan, dtype=dtype)
             valid[(np.abs(self.x_ac) >= self.requirement_bounds[0])
                   & (np.abs(self.x_ac) <= self.requirement_bounds[1])] = 1
-            along_track = np.full(self.lon_nadir.shape, 1, dtype=np.float64)
+            along_track = np.full(self.lon_nadir.shape, 1, dtype=dtype)
             return along_track[:, np.newaxis] * valid
-        return np.full(self.lon.shape, 1, dtype=np.float64)
+        return np.full(self.lon.shape, 1, dtype=dtype)
 
 
 def calculate_orbit(parameters: settings.Parameters,
@@ -434,6 +475,22 @@ def calculate_orbit(parameters: settings.Parameters,
                  distance[-1], parameters.shift_time)
 
 
+def across_track_distance(parameters: settings.Parameters) -> np.ndarray:
+    """Get the across track distances of the pixels of the swath.
+
+    Args:
+        parameters (settings.Parameters): Simulation parameters.
+
+    Returns:
+        numpy.ndarray: The across track distances.
+    """
+    # Number of points in half of the swath
+    half_swath = int((parameters.half_swath - parameters.half_gap) /
+                     parameters.delta_ac) + 1
+    x_ac = np.arange(half_swath) * parameters.delta_al + parameters.half_gap
+    return np.hstack((-np.flip(x_ac), x_ac))
+
+
 def calculate_pass(pass_number: int, orbit: Orbit,
                    parameters: settings.Parameters) -> Optional[Pass]:
     """Get the properties of an half-orbit
@@ -473,11 +530,9 @@ def calculate_pass(pass_number: int, orbit: Orbit,
     x_al = x_al[mask]
 
     # Compute accross track distances from nadir
+    x_ac = across_track_distance(parameters)
     # Number of points in half of the swath
-    half_swath = int((parameters.half_swath - parameters.half_gap) /
-                     parameters.delta_ac) + 1
-    x_ac = np.arange(half_swath) * parameters.delta_al + parameters.half_gap
-    x_ac = np.hstack((-np.flip(x_ac), x_ac))
+    half_swath = x_ac.size // 2
 
     location = np.ascontiguousarray(
         np.vstack(math.spher2cart(lon_nadir, lat_nadir)).T)
@@ -494,3 +549,115 @@ def calculate_pass(pass_number: int, orbit: Orbit,
                 x_ac,
                 x_al,
                 requirement_bounds=parameters.requirement_bounds)
+
+
+class GeometryStore:
+    """Store of the swath geometry of the passes of an orbit.
+
+    For a given orbit and geometry settings, the geometry of a pass is the
+    same for every cycle. If a cache directory is defined in the settings,
+    the geometry of each pass is computed once, written to disk and
+    memory-mapped, so that all the processes working on the same node share
+    the same pages. The passes mapped are kept in a LRU cache bounded by a
+    memory budget. Without a cache directory, the geometry is computed for
+    each cycle: a pass number comes back only one cycle later, the passes
+    would be evicted from memory before being reused.
+
+    Args:
+        orbit (Orbit): Orbit describing the passes to be calculated.
+        parameters (settings.Parameters): Simulation parameters.
+        cache_size (int, optional): Memory budget, in bytes, of the passes
+            mapped in memory by each process.
+    """
+    #: Arrays describing the geometry of a pass.
+    ARRAYS = ("lat_nadir", "lat", "lon_nadir", "lon", "timedelta", "x_ac",
+              "x_al")
+
+    def __init__(self,
+                 orbit: Orbit,
+                 parameters: settings.Parameters,
+                 cache_size: int = DEFAULT_GEOMETRY_CACHE_SIZE):
+        self.key = cache.fingerprint(orbit.lon, orbit.lat, orbit.time,
+                                     orbit.x_al, orbit.pass_time,
+                                     parameters.delta_al, parameters.delta_ac,
+                                     parameters.half_gap,
+                                     parameters.half_swath, parameters.area,
+                                     parameters.shift_lon,
+                                     parameters.shift_time)
+        self.directory = None if parameters.cache_directory is None \
+            else os.path.join(parameters.cache_directory, "geometry",
+                              self.key)
+        self.requirement_bounds = parameters.requirement_bounds
+        # The loaded passes are specific to each process: the cache is
+        # emptied when the store is serialized.
+        self._passes = cache.LRUCache(cache_size)
+
+    def _dirname(self, pass_number: int) -> str:
+        """Get the directory containing the geometry of a pass"""
+        assert self.directory is not None
+        return os.path.join(self.directory, f"pass_{pass_number:04d}")
+
+    def _load(self, pass_number: int) -> Optional[Dict[str, np.ndarray]]:
+        """Loads the geometry of a pass stored on disk."""
+        dirname = self._dirname(pass_number)
+        if os.path.exists(os.path.join(dirname, "missing")):
+            return dict()
+        arrays = dict()
+        for name in self.ARRAYS:
+            array = cache.load_array(os.path.join(dirname, f"{name}.npy"))
+            if array is None:
+                return None
+            arrays[name] = array
+        return arrays
+
+    def _store(self, pass_number: int,
+               arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Writes the geometry of a pass on disk and returns the arrays
+        memory-mapped."""
+        dirname = self._dirname(pass_number)
+        os.makedirs(dirname, exist_ok=True)
+        if not arrays:
+            with open(os.path.join(dirname, "missing"), "w"):
+                pass
+            return arrays
+        for name, array in arrays.items():
+            path = os.path.join(dirname, f"{name}.npy")
+            cache.save_array(path, array)
+            arrays[name] = cache.load_array(path)
+        return arrays
+
+    def get(self, pass_number: int, orbit: Orbit,
+            parameters: settings.Parameters) -> Optional[Pass]:
+        """Get the properties of an half-orbit
+
+        Args:
+            pass_number (int): Pass number
+            orbit (Orbit): Orbit describing the pass to be calculated.
+            parameters (settings.Parameters): Simulation parameters.
+
+        Returns:
+            Pass, optional: The properties of the pass or None, if the pas is
+            missing in the selected area.
+        """
+        if self.directory is None:
+            return calculate_pass(pass_number, orbit, parameters)
+        arrays = self._passes.get(pass_number)
+        if arrays is None:
+            arrays = self._load(pass_number)
+            if arrays is None:
+                track = calculate_pass(pass_number, orbit, parameters)
+                arrays = dict() if track is None else dict(
+                    (name, getattr(track, name)) for name in self.ARRAYS)
+                arrays = self._store(pass_number, arrays)
+            self._passes.put(pass_number, arrays,
+                             sum(item.nbytes for item in arrays.values()))
+        if not arrays:
+            return None
+        return Pass(arrays["lat_nadir"],
+                    arrays["lat"],
+                    arrays["lon_nadir"],
+                    arrays["lon"],
+                    arrays["timedelta"],
+                    arrays["x_ac"],
+                    arrays["x_al"],
+                    requirement_bounds=self.requirement_bounds)
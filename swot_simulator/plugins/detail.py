@@ -0,0 +1,319 @@
+# Copyright (c) 2020 CNES/JPL
+#
+# All rights reserved. Use of this source code is governed by a
+# BSD-style license that can be found in the LICENSE file.
+"""
+Details of the implementation of the plug-ins handling a time series of grids
+-----------------------------------------------------------------------------
+"""
+from typing import Optional
+import os
+import numpy as np
+import xarray as xr
+
+from .. import cache
+
+#: Default memory budget, in bytes, of the grids kept in memory.
+DEFAULT_CACHE_SIZE = 1 << 30
+
+#: Default memory budget, in bytes, of the interpolation stencils kept in
+#: memory when the cycles of a pass are simulated in a row: only the stencils
+#: of the passes being processed by the threads of a worker are reused.
+DEFAULT_STENCIL_CACHE_SIZE = 1 << 28
+
+
+def is_circle(x_axis: np.ndarray, epsilon: float = 1e-6) -> bool:
+    """Checks if a regular longitude axis covers the whole globe.
+
+    Args:
+        x_axis (numpy.ndarray): Longitudes of the axis, in ascending order.
+        epsilon (float, optional): Tolerance, in degrees, of the comparison.
+
+    Returns:
+        bool: True if the axis is circular.
+    """
+    if x_axis.size < 2:
+        return False
+    step = (x_axis[-1] - x_axis[0]) / (x_axis.size - 1)
+    return x_axis[-1] - x_axis[0] + step >= 360 - epsilon
+
+
+class Stencil:
+    """Bilinear interpolation stencil of points in a regular grid.
+
+    The indices of the four cells surrounding each point and their weights
+    depend only on the position of the points, they are calculated once and
+    applied to all the grids of a time series.
+
+    Args:
+        x_axis (numpy.ndarray): Longitudes of the grid, in ascending order.
+            The axis is circular if it covers the whole globe.
+        y_axis (numpy.ndarray): Latitudes of the grid.
+        lon (numpy.ndarray): Longitudes of the points.
+        lat (numpy.ndarray): Latitudes of the points.
+    """
+    def __init__(self, x_axis: np.ndarray, y_axis: np.ndarray,
+                 lon: np.ndarray, lat: np.ndarray) -> None:
+        x_axis = np.asarray(x_axis, dtype=np.float64)
+        y_axis = np.asarray(y_axis, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64).ravel()
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        nx = x_axis.size
+
+        # Longitudes: the point is normalized in [x0, x0 + 360[. If the axis
+        # is circular, the last cell joins the last and the first longitude
+        # of the axis, otherwise the points beyond the last longitude are
+        # outside the grid.
+        lon = (lon - x_axis[0]) % 360 + x_axis[0]
+        i0 = np.searchsorted(x_axis, lon, side="right") - 1
+        if is_circle(x_axis):
+            outside = np.isnan(lon)
+            i1 = i0 + 1
+            upper = np.append(x_axis[1:], x_axis[0] + 360)
+            wx = (lon - x_axis[i0]) / (upper[i0] - x_axis[i0])
+            i1[i1 == nx] = 0
+        else:
+            outside = (lon > x_axis[-1]) | np.isnan(lon)
+            i0 = np.clip(i0, 0, nx - 2)
+            i1 = i0 + 1
+            wx = (lon - x_axis[i0]) / (x_axis[i1] - x_axis[i0])
+
+        # Latitudes: the axis may be in descending order.
+        reverse = y_axis[0] > y_axis[-1]
+        if reverse:
+            y_axis = y_axis[::-1]
+        j0 = np.searchsorted(y_axis, lat, side="right") - 1
+        #: True for the points located outside the grid.
+        self.outside = outside | (lat < y_axis[0]) | (lat > y_axis[-1]) | \
+            np.isnan(lat)
+        j0 = np.clip(j0, 0, y_axis.size - 2)
+        wy = (lat - y_axis[j0]) / (y_axis[j0 + 1] - y_axis[j0])
+        j1 = j0 + 1
+        if reverse:
+            j0, j1 = y_axis.size - 1 - j0, y_axis.size - 1 - j1
+
+        #: Flat indices of the four cells surrounding each point.
+        self.index = np.vstack(
+            (j0 * nx + i0, j0 * nx + i1, j1 * nx + i0, j1 * nx + i1))
+        #: Weights of the four cells.
+        self.weights = np.vstack(((1 - wx) * (1 - wy), wx * (1 - wy),
+                                  (1 - wx) * wy, wx * wy))
+        self.weights[:, self.outside] = np.nan
+        self.index[:, self.outside] = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes occupied by the stencil"""
+        return self.index.nbytes + self.weights.nbytes + self.outside.nbytes
+
+    def __call__(self,
+                 grids: np.ndarray,
+                 dates: np.ndarray,
+                 time: np.ndarray,
+                 bounds_error: bool = False) -> np.ndarray:
+        """Interpolates the grids of a time series at the positions of the
+        stencil.
+
+        Args:
+            grids (numpy.ndarray): Grids to interpolate (time, y, x).
+            dates (numpy.ndarray): Dates of the grids.
+            time (numpy.ndarray): Dates of the points.
+            bounds_error (bool, optional): If true, a ValueError is raised
+                if a point is located outside the grid, otherwise its value
+                is undefined (NaN).
+
+        Returns:
+            numpy.ndarray: The interpolated values.
+        """
+        dates = dates.astype("datetime64[ns]").astype(np.int64)
+        time = time.astype("datetime64[ns]").astype(np.int64).ravel()
+        outside = self.outside | (time < dates[0]) | (time > dates[-1])
+        if bounds_error and np.any(outside):
+            raise ValueError(
+                f"{np.count_nonzero(outside)} points are out of the bounds "
+                "of the grid")
+
+        # Linear interpolation in time between the two bracketing grids.
+        t0 = np.clip(
+            np.searchsorted(dates, time, side="right") - 1, 0,
+            max(dates.size - 2, 0))
+        t1 = np.minimum(t0 + 1, dates.size - 1)
+        span = dates[t1] - dates[t0]
+        wt = np.divide(time - dates[t0],
+                       span,
+                       out=np.zeros(time.shape),
+                       where=span != 0)
+
+        grids = grids.reshape(grids.shape[0], -1)
+        result = np.zeros(time.shape)
+        for index, weights in zip(self.index, self.weights):
+            result += weights * ((1 - wt) * grids[t0, index] +
+                                 wt * grids[t1, index])
+        result[outside] = np.nan
+        return result
+
+
+class GridTimeSeries:
+    """Abstract class handling a time series of grids stored in files.
+
+    The grids read are kept in memory, in a LRU cache bounded by a memory
+    budget, so that consecutive passes requiring the same grids do not read
+    and decode the files again.
+
+    The bilinear interpolation stencils can also be kept in memory: the
+    positions of a pass are the same in every cycle, only the grids used
+    differ. A pass number comes back only one cycle later, so the stencils
+    are only kept if the cycles of a pass are simulated in a row (see
+    :meth:`enable_stencil_cache`), or if their memory budget is set.
+
+    Args:
+        path (str): Path to the directory containing the time series.
+        cache_size (int, optional): Memory budget, in bytes, of the grids
+            kept in memory by each process.
+        stencil_cache_size (int, optional): Memory budget, in bytes, of the
+            interpolation stencils kept in memory by each process. Defaults
+            to no cache, unless enabled by :meth:`enable_stencil_cache`.
+    """
+    def __init__(self,
+                 path: str,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 stencil_cache_size: Optional[int] = None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path!r}")
+        self.path = path
+        self.ts = None
+        self.dt = None
+        self.frames = cache.LRUCache(cache_size)
+        self.stencils = cache.LRUCache(stencil_cache_size or 0)
+        self._stencil_cache_size = stencil_cache_size
+        self.load_ts()
+
+    def enable_stencil_cache(self) -> None:
+        """Keeps the interpolation stencils in memory, with the default
+        memory budget unless it has been set by the user.
+
+        Called when the cycles of a pass are simulated in a row by the same
+        task: the positions of the pass are then interpolated several times.
+        """
+        if self._stencil_cache_size is None:
+            self.stencils = cache.LRUCache(DEFAULT_STENCIL_CACHE_SIZE)
+
+    def load_ts(self):
+        """Loading in memory the time axis of the time series"""
+        raise NotImplementedError()
+
+    def load_frame(self, path: str) -> xr.DataArray:
+        """Loads in memory the grids stored in a file.
+
+        Args:
+            path (str): Path to the file to read.
+
+        Returns:
+            xarray.DataArray: The grids read, the first dimension of the
+            array is the time.
+        """
+        raise NotImplementedError()
+
+    def select_paths(self, first_date: np.datetime64,
+                     last_date: np.datetime64) -> np.ndarray:
+        """Selects the files required to cover the period provided.
+
+        Args:
+            first_date (numpy.datetime64): First date of the period.
+            last_date (numpy.datetime64): Last date of the period.
+
+        Returns:
+            numpy.ndarray: The paths of the files to be read.
+        """
+        if first_date < self.ts["date"][0] or last_date > self.ts["date"][-1]:
+            raise IndexError(
+                f"period [{first_date}, {last_date}] is out of range: "
+                f"[{self.ts['date'][0]}, {self.ts['date'][-1]}]")
+        first_date -= self.dt
+        last_date += self.dt
+
+        return self.ts["path"][(self.ts["date"] >= first_date)
+                               & (self.ts["date"] < last_date)]
+
+    def load_frames(self, first_date: np.datetime64,
+                    last_date: np.datetime64) -> xr.DataArray:
+        """Loads the grids covering the period provided.
+
+        Args:
+            first_date (numpy.datetime64): First date of the period.
+            last_date (numpy.datetime64): Last date of the period.
+
+        Returns:
+            xarray.DataArray: The grids concatenated along the time axis.
+        """
+        frames = [
+            self.get_frame(path)
+            for path in self.select_paths(first_date, last_date)
+        ]
+        return xr.concat(frames, dim="time")
+
+    def get_frame(self, path: str) -> xr.DataArray:
+        """Get the grids stored in a file, from the cache if they have
+        already been read.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            xarray.DataArray: The grids stored in the file.
+        """
+        frame = self.frames.get(path)
+        if frame is None:
+            frame = self.load_frame(path)
+            self.frames.put(path, frame, frame.nbytes)
+        return frame
+
+    def get_stencil(self, x_axis: np.ndarray, y_axis: np.ndarray,
+                    lon: np.ndarray, lat: np.ndarray) -> Stencil:
+        """Get the interpolation stencil of the positions provided, from the
+        cache if it has already been calculated.
+
+        Args:
+            x_axis (numpy.ndarray): Longitudes of the grid.
+            y_axis (numpy.ndarray): Latitudes of the grid.
+            lon (numpy.ndarray): Longitudes of the points.
+            lat (numpy.ndarray): Latitudes of the points.
+
+        Returns:
+            Stencil: The interpolation stencil.
+        """
+        key = cache.fingerprint(x_axis, y_axis, lon, lat)
+        stencil = self.stencils.get(key)
+        if stencil is None:
+            stencil = Stencil(x_axis, y_axis, lon, lat)
+            self.stencils.put(key, stencil, stencil.nbytes)
+        return stencil
+
+    def interpolate_frames(self,
+                           lon: np.ndarray,
+                           lat: np.ndarray,
+                           time: np.ndarray,
+                           x: str = "longitude",
+                           y: str = "latitude",
+                           bounds_error: bool = False) -> np.ndarray:
+        """Bilinear interpolation of the time series.
+
+        Args:
+            lon (numpy.ndarray): Longitudes of the points.
+            lat (numpy.ndarray): Latitudes of the points.
+            time (numpy.ndarray): Dates of the points.
+            x (str, optional): Name of the longitude coordinate.
+            y (str, optional): Name of the latitude coordinate.
+            bounds_error (bool, optional): If true, a ValueError is raised
+                if a point is located outside the grid, otherwise its value
+                is undefined (NaN).
+
+        Returns:
+            numpy.ndarray: The interpolated values.
+        """
+        frames = self.load_frames(time.min(), time.max())
+        frames = frames.transpose("time", y, x)
+        stencil = self.get_stencil(frames[x].values, frames[y].values, lon,
+                                   lat)
+        return stencil(frames.values, frames["time"].values, time,
+                       bounds_error).reshape(np.shape(lon))
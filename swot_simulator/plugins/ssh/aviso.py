@@ -58,29 +58,18 @@ class AVISO(detail.CartesianGridHandler):
         # interpolate the SSH.
         self.dt = np.timedelta64(frequency.pop(), 's')
 
+    def load_frame(self, path: str) -> xr.DataArray:
+        """Loads in memory the grid stored in a file."""
+        with xr.open_dataset(path) as ds:
+            return ds.adt.load()
+
     def load_dataset(self, first_date: np.datetime64, last_date: np.datetime64
                      ) -> pyinterp.backends.xarray.Grid3D:
         """Loads the 3D cube describing the SSH in time and space."""
-        if first_date < self.ts["date"][0] or last_date > self.ts["date"][-1]:
-            raise IndexError(
-                f"period [{first_date}, {last_date}] is out of range: "
-                f"[{self.ts['date'][0]}, {self.ts['date'][-1]}]")
-        first_date -= self.dt
-        last_date += self.dt
-
-        selected = self.ts["path"][(self.ts["date"] >= first_date)
-                                   & (self.ts["date"] < last_date)]
-
-        ds = xr.open_mfdataset(selected, concat_dim="time", combine="nested")
-        return pyinterp.backends.xarray.Grid3D(ds.adt)
+        return pyinterp.backends.xarray.Grid3D(
+            self.load_frames(first_date, last_date))
 
     def interpolate(self, lon: np.ndarray, lat: np.ndarray,
                     time: np.ndarray) -> np.ndarray:
         """Interpolate the SSH to the required coordinates"""
-        interpolator = self.load_dataset(time.min(), time.max())
-        time2 = time.astype("datetime64[ns]")
-        ssh = interpolator.trivariate(dict(longitude=lon,
-                                           latitude=lat,
-                                           time=time2),
-                                      interpolator='bilinear')
-        return ssh
+        return self.interpolate_frames(lon, lat, time)
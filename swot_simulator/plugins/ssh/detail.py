@@ -6,10 +6,11 @@
 Details of the implementation of a SSH plug-in
 ----------------------------------------------
 """
-import os
 import numpy as np
 import pyinterp.backends.xarray
 
+from .. import detail
+
 
 class Interface:
     """Interface of an SSH plugin"""
@@ -41,20 +42,14 @@ class Plugin:
         return result
 
 
-class CartesianGridHandler(Interface):
-    """Abstract class of the interpolation of a series of grids."""
-    def __init__(self, path):
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"{path!r}")
-        self.path = path
-        self.ts = None
-        self.dt = None
-        self.load_ts()
-
-    def load_ts(self):
-        """Loading in memory the time axis of the time series"""
-        raise NotImplementedError()
+class CartesianGridHandler(Interface, detail.GridTimeSeries):
+    """Abstract class of the interpolation of a series of grids.
 
+    Args:
+        path (str): Path to the directory containing the time series.
+        cache_size (int, optional): Memory budget, in bytes, of the grids
+            kept in memory by each process.
+    """
     def load_dataset(self, first_date: np.datetime64, last_date: np.datetime64
                      ) -> pyinterp.backends.xarray.Grid3D:
         """Loads the 3D cube describing the SSH in time and space."""
@@ -6,47 +6,150 @@
 Interpolation of the SSH HYCOM
 ==============================
 """
+from typing import Dict, List, Optional
+import datetime
+import json
+import logging
 import os
 import re
+import tempfile
 import numpy as np
 import pyinterp
 import pyinterp.backends.xarray
 import xarray as xr
 
 from . import detail
+from ... import cache
+
+#: Logger of this module
+LOGGER = logging.getLogger(__name__)
 
 
 class HYCOM(detail.CartesianGridHandler):
     """
     Interpolation of the SSH HYCOM
+
+    The time steps stored in each file of the time series are recorded in a
+    time index, written in the file ``index``, so that the files are not
+    opened again to build the time axis of the following runs.
+
+    Args:
+        path (str): Path to the directory containing the time series.
+        index (str, optional): Path to the time index of the time series.
+            Defaults to a file of ``cache_directory`` if defined, otherwise
+            to the file ``.time_index.json`` in the directory of the time
+            series if it is writable. If no location is available, the time
+            index is not kept between runs.
+        cache_directory (str, optional): Directory storing the time index.
+        cache_size (int, optional): Memory budget, in bytes, of the grids
+            kept in memory by each process.
     """
 
-    #: Decode the product date encoded from the file name.
-    #hycom_GLBu0.08_191_2012031900_t012.nc
-    PATTERN = re.compile(
-        r"hycom_GLBu0.08_191_(\d{4})(\d{2})(\d{2})(\d{2})_t\d{3}.nc").search
+    #: Selects the files of the time series, e.g.
+    #: hycom_GLBu0.08_191_2012031900_t012.nc. The dates are read from the
+    #: files (the time index), a file may hold several time steps. The
+    #: group captured is the date of the forecast run.
+    PATTERN = re.compile(r"hycom_GLBu0\.08_191_(\d{10})_t\d{3}\.nc").search
+
+    def __init__(self,
+                 path: str,
+                 index: Optional[str] = None,
+                 cache_directory: Optional[str] = None,
+                 **kwargs):
+        self.index = index or self._default_index(path, cache_directory)
+        super().__init__(path, **kwargs)
+
+    @staticmethod
+    def _default_index(path: str,
+                       cache_directory: Optional[str]) -> Optional[str]:
+        """Get the default path to the time index of the time series"""
+        if cache_directory is not None:
+            return os.path.join(
+                cache_directory, "hycom",
+                cache.fingerprint(os.path.abspath(path)) + ".json")
+        if os.access(path, os.W_OK):
+            return os.path.join(path, ".time_index.json")
+        LOGGER.info(
+            "%r is read-only and no cache directory is defined: the time "
+            "index is not kept between runs", path)
+        return None
+
+    def _read_index(self) -> Dict[str, Dict]:
+        """Reads the time index of the time series"""
+        if self.index is None:
+            return dict()
+        try:
+            with open(self.index, "r") as stream:
+                return json.load(stream)
+        except (OSError, ValueError):
+            return dict()
+
+    def _write_index(self, index: Dict[str, Dict]) -> None:
+        """Writes the time index of the time series"""
+        if self.index is None:
+            return
+        dirname = os.path.dirname(os.path.abspath(self.index))
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=dirname, suffix=".json")
+            with os.fdopen(handle, "w") as stream:
+                json.dump(index, stream)
+            os.replace(temporary, self.index)
+        except OSError as exc:
+            LOGGER.warning("unable to write the time index %r: %s",
+                           self.index, exc)
+
+    @staticmethod
+    def _model_hours(path: str) -> List[float]:
+        """Reads the model hours stored in a file"""
+        with xr.open_dataset(path, decode_times=False) as ds:
+            return ds.variables["time"].values.astype(np.float64).tolist()
 
     def load_ts(self):
         """Loading in memory the time axis of the time series"""
-        items = []
+        cached = self._read_index()
+        index = dict()
+        # For each date, the file and the index of the time step in the file
+        # providing the grid. If several forecasts are available for the
+        # same date, the one of the most recent run is kept.
+        grids = dict()
+        runs = dict()
         length = -1
 
         for root, _, files in os.walk(self.path):
-            for item in files:
+            for item in sorted(files):
                 match = self.PATTERN(item)
-                if match is not None or True:
-                    filename = os.path.join(root, item)
-                    items.append(
-                        (np.datetime64(f"{match.group(1)}-{match.group(2)}-"
-                                       f"{match.group(3)}"), filename))
-                    length = max(length, len(filename))
+                if match is None:
+                    continue
+                filename = os.path.join(root, item)
+                run = datetime.datetime.strptime(match.group(1), "%Y%m%d%H")
+                mtime = os.path.getmtime(filename)
+                entry = cached.get(filename)
+                if entry is None or entry["mtime"] != mtime:
+                    entry = dict(mtime=mtime,
+                                 hours=self._model_hours(filename))
+                index[filename] = entry
+                for ix, hours in enumerate(entry["hours"]):
+                    date = np.datetime64("2000") + np.timedelta64(
+                        int(round(hours * 3600)), "s")
+                    if date not in runs or runs[date] < run:
+                        runs[date] = run
+                        grids[date] = (filename, ix)
+                length = max(length, len(filename))
+
+        if index != cached:
+            self._write_index(index)
+
+        if not grids:
+            raise RuntimeError("Check that your list of data is not empty")
 
         # The time series is encoded in a structured Numpy array containing
-        # the date and path to the file.
-        ts = np.array(items,
+        # the date, the path to the file and the index of the grid in the
+        # file.
+        ts = np.array([(date, ) + grids[date] for date in grids],
                       dtype={
-                          'names': ('date', 'path'),
-                          'formats': ('datetime64[s]', f'U{length}')
+                          'names': ('date', 'path', 'index'),
+                          'formats': ('datetime64[s]', f'U{length}', 'int64')
                       })
         self.ts = ts[np.argsort(ts["date"])]
 
@@ -62,6 +165,13 @@ class HYCOM(detail.CartesianGridHandler):
         # interpolate the SSH.
         self.dt = np.timedelta64(frequency.pop(), 's')
 
+    def load_frame(self, path: str) -> xr.DataArray:
+        """Loads in memory the grids stored in a file."""
+        with xr.open_dataset(path, decode_times=False) as ds:
+            frame = ds.surf_el.sel(depth=0).load()
+        hours = (frame["time"].values * 3600000000).astype('timedelta64[us]')
+        return frame.assign_coords(time=np.datetime64('2000') + hours)
+
     def load_dataset(
             self, first_date: np.datetime64,
             last_date: np.datetime64) -> pyinterp.backends.xarray.Grid3D:
@@ -73,21 +183,19 @@ class HYCOM(detail.CartesianGridHandler):
         first_date -= self.dt
         last_date += self.dt
 
-        selected = self.ts["path"][:]
-
-        ds = xr.open_mfdataset(selected,
-                               concat_dim="time",
-                               combine="nested",
-                               decode_times=False)
-        ds = ds.sel(depth=0)
-
-        x_axis = pyinterp.Axis(ds.variables["lon"][:], is_circle=True)
-        y_axis = pyinterp.Axis(ds.variables["lat"][:])
-        hours = (ds.variables['time'][:].data *
-                 3600000000).astype('timedelta64[us]')
-        time = np.datetime64('2000') + hours
-        z_axis = pyinterp.TemporalAxis(time)
-        var = ds.surf_el[:].T
+        # Only the files holding the grids bracketing the period are read.
+        selected = self.ts[(self.ts["date"] >= first_date)
+                           & (self.ts["date"] < last_date)]
+        frames = [
+            self.get_frame(item["path"]).isel(time=[int(item["index"])])
+            for item in selected
+        ]
+        ds = xr.concat(frames, dim="time")
+
+        x_axis = pyinterp.Axis(ds["lon"].values, is_circle=True)
+        y_axis = pyinterp.Axis(ds["lat"].values)
+        z_axis = pyinterp.TemporalAxis(ds["time"].values)
+        var = ds.values.T
         return pyinterp.Grid3D(x_axis, y_axis, z_axis, var)
 
     def interpolate(self, lon: np.ndarray, lat: np.ndarray,
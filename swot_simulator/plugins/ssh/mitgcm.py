@@ -7,8 +7,8 @@ Interpolate SSH from MIT/GCM model
 ==================================
 """
 import logging
+import threading
 import time
-import dask.array as da
 import numba as nb
 import numpy as np
 import pyinterp
@@ -55,71 +55,46 @@ def _time_interp(xp: np.ndarray, yp: np.ndarray, xi: np.ndarray) -> np.ndarray:
     return result
 
 
-def _spatial_interp(z_model: da.array, x_model: da.array, y_model: da.array,
-                    x_sat: np.ndarray, y_sat: np.ndarray):
-    mesh = pyinterp.RTree(dtype="float32")
-    x, y, z = (), (), ()
-
-    start_time = time.time()
-
-    for face in range(13):
-        x_face = x_model[face, :].compute()
-        y_face = y_model[face, :].compute()
-
-        # We test if the face covers the satellite positions.
-        ix0, ix1 = x_face.min(), x_face.max()
-        iy0, iy1 = y_face.min(), y_face.max()
-
-        box = pyinterp.geodetic.Box2D(pyinterp.geodetic.Point2D(ix0, iy0),
-                                      pyinterp.geodetic.Point2D(ix1, iy1))
-        mask = box.covered_by(x_sat, y_sat)
-        if not np.any(mask == 1):
-            continue
-        del box, mask
-
-        # The undefined values are filtered
-        z_face = z_model[face, :].compute()
-        defined = ~np.isnan(z_face)
-        x += (x_face[defined].flatten(), )
-        y += (y_face[defined].flatten(), )
-        z += (z_face[defined].flatten(), )
-
-    # The tree is built and the interpolation is calculated
-    x = np.concatenate(x)
-    y = np.concatenate(y)
-    coordinates = np.vstack((x, y)).T
-    del x, y
-
-    z = np.concatenate(z)
-    LOGGER.debug("loaded %d MB in %.2fs",
-                 (coordinates.nbytes + z.nbytes) // 1024**2,
-                 time.time() - start_time)
-    start_time = time.time()
-    mesh.packing(coordinates, z)
-    LOGGER.debug("mesh build in %.2fs", time.time() - start_time)
-
-    del coordinates, z
-
-    start_time = time.time()
-    z, _ = mesh.radial_basis_function(np.vstack(
-        (x_sat, y_sat)).T.astype("float32"),
-                                      within=True,
-                                      k=11,
-                                      radius=55000,
-                                      rbf="thin_plate",
-                                      num_threads=1)
-    LOGGER.debug("interpolation done in %.2fs", time.time() - start_time)
-    del mesh
-    return z.astype("float32")
+class MITGCM(detail.Interface):
+    """Interpolation of the SSH from the MIT/GCM model (LLC grid).
 
+    The search tree of the ocean points of the model is built once, on first
+    use, by each process. The neighbors of the satellite positions are then
+    searched once per pass: the SSH of each time layer required is
+    interpolated by a radial basis function from these points only.
+
+    Args:
+        xc (xarray.DataArray): Longitudes of the model (face, j, i).
+        yc (xarray.DataArray): Latitudes of the model (face, j, i).
+        eta (xarray.DataArray): SSH of the model (time, face, j, i).
+    """
+    #: Number of neighbors used to interpolate a point.
+    K = 11
+
+    #: Maximum distance, in meters, between a point and its neighbors.
+    RADIUS = 55000
 
-class MITGCM(detail.Interface):
     def __init__(self, xc: xr.DataArray, yc: xr.DataArray, eta: xr.DataArray):
         self.lon = xc.data
         self.lat = yc.data
         self.ssh = eta.data
         self.ts = eta.time.data.astype("datetime64[us]")
         self.dt = self._calculate_dt(self.ts)
+        self._tree = None
+        self._points = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The search tree is built by each process.
+        state["_tree"] = None
+        state["_points"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
 
     @staticmethod
     def _calculate_dt(dates: xr.DataArray):
@@ -138,6 +113,69 @@ class MITGCM(detail.Interface):
             return date + self.dt * shift
         return date
 
+    def _build_tree(self) -> None:
+        """Builds the search tree of the ocean points of the model."""
+        start_time = time.time()
+        x, y, index = (), (), ()
+        face_size = int(np.prod(self.lon.shape[1:]))
+        for face in range(self.lon.shape[0]):
+            # The undefined values (land) are filtered
+            defined = ~np.isnan(np.asarray(self.ssh[0, face].compute()))
+            x += (np.asarray(self.lon[face, :].compute())[defined], )
+            y += (np.asarray(self.lat[face, :].compute())[defined], )
+            index += (np.flatnonzero(defined) + face * face_size, )
+
+        # Coordinates and position in the model grid of the ocean points.
+        # The tree stores, for each point, its rank in these arrays.
+        x = np.concatenate(x).astype("float64")
+        y = np.concatenate(y).astype("float64")
+        index = np.concatenate(index)
+        LOGGER.debug("loaded %d MB in %.2fs",
+                     (x.nbytes + y.nbytes + index.nbytes) // 1024**2,
+                     time.time() - start_time)
+
+        start_time = time.time()
+        tree = pyinterp.RTree(dtype="float64")
+        tree.packing(np.vstack((x, y)).T,
+                     np.arange(x.size, dtype="float64"))
+        LOGGER.debug("mesh build in %.2fs", time.time() - start_time)
+        self._points = (x, y, index, face_size)
+        self._tree = tree
+
+    def _neighbors(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Get the ocean points used to interpolate the satellite positions,
+        i.e. the union of the nearest neighbors of each position.
+
+        Returns:
+            numpy.ndarray: The rank of the ocean points selected.
+        """
+        with self._lock:
+            if self._tree is None:
+                self._build_tree()
+
+        start_time = time.time()
+        _, ranks = self._tree.query(np.vstack((lon, lat)).T,
+                                    k=self.K,
+                                    within=False,
+                                    num_threads=1)
+        ranks = np.unique(ranks[np.isfinite(ranks)].astype(np.int64))
+        LOGGER.debug("%d neighbors found in %.2fs", ranks.size,
+                     time.time() - start_time)
+        return ranks
+
+    def _layer_values(self, layer: int, ranks: np.ndarray) -> np.ndarray:
+        """Reads the SSH of a time layer at the ocean points provided."""
+        index, face_size = self._points[2:]
+        index = index[ranks]
+        faces = index // face_size
+        result = np.empty(ranks.shape, dtype=np.float64)
+        # Only the faces containing the points are read.
+        for face in np.unique(faces):
+            mask = faces == face
+            values = np.asarray(self.ssh[layer, face].compute()).ravel()
+            result[mask] = values[index[mask] - face * face_size]
+        return result
+
     def interpolate(self, lon: np.ndarray, lat: np.ndarray,
                     dates: np.ndarray) -> np.ndarray:
         """Interpolate the SSH for the given coordinates"""
@@ -154,15 +192,28 @@ class MITGCM(detail.Interface):
 
         LOGGER.debug("fetch data for %s, %s", first_date, last_date)
 
-        # 4D cube representing the data necessary for interpolation.
-        frame = self.ssh[mask]
+        # The nearest neighbors of the satellite positions in the whole model
+        # are also their nearest neighbors in this subset: the
+        # interpolation of each time layer only packs these points.
+        ranks = self._neighbors(lon, lat)
+        x, y = self._points[:2]
+        coordinates = np.vstack((x[ranks], y[ranks])).T.astype("float32")
+        points = np.vstack((lon, lat)).T.astype("float32")
 
         # Spatial interpolation of the SSH on the different selected grids.
         start_time = time.time()
         layers = []
-        for index in range(len(frame)):
-            layers.append(
-                _spatial_interp(frame[index, :], self.lon, self.lat, lon, lat))
+        for layer in np.flatnonzero(mask):
+            mesh = pyinterp.RTree(dtype="float32")
+            mesh.packing(coordinates,
+                         self._layer_values(layer, ranks).astype("float32"))
+            z, _ = mesh.radial_basis_function(points,
+                                              within=True,
+                                              k=self.K,
+                                              radius=self.RADIUS,
+                                              rbf="thin_plate",
+                                              num_threads=1)
+            layers.append(z.astype("float32"))
 
         # Time interpolation of the SSH.
         layers = np.stack(layers)
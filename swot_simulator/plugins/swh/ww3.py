@@ -59,40 +59,24 @@ class WW3(detail.CartesianGridHandler):
         # interpolate the SSH.
         self.dt = np.timedelta64(frequency.pop(), 's')
 
+    def load_frame(self, path: str) -> xr.DataArray:
+        """Loads in memory the grid stored in a file."""
+        with xr.open_dataset(path, decode_times=True) as ds:
+            return ds.hs.load()
+
     def load_dataset(
             self, first_date: np.datetime64,
             last_date: np.datetime64) -> pyinterp.backends.xarray.Grid3D:
-        """Loads the 3D cube describing the SSH in time and space."""
-        if first_date < self.ts["date"][0] or last_date > self.ts["date"][-1]:
-            raise IndexError(
-                f"period [{first_date}, {last_date}] is out of range: "
-                f"[{self.ts['date'][0]}, {self.ts['date'][-1]}]")
-        first_date -= self.dt
-        last_date += self.dt
-
-        selected = self.ts["path"][(self.ts["date"] >= first_date)
-                                   & (self.ts["date"] < last_date)]
-
-        ds = xr.open_mfdataset(selected,
-                               concat_dim="time",
-                               combine="nested",
-                               decode_times=True)
+        """Loads the 3D cube describing the SWH in time and space."""
+        frames = self.load_frames(first_date, last_date)
 
-        x_axis = pyinterp.Axis(ds.variables["longitude"][:], is_circle=True)
-        y_axis = pyinterp.Axis(ds.variables["latitude"][:])
-        z_axis = pyinterp.TemporalAxis(ds.time)
-        var = ds.hs[:].T
+        x_axis = pyinterp.Axis(frames["longitude"].values, is_circle=True)
+        y_axis = pyinterp.Axis(frames["latitude"].values)
+        z_axis = pyinterp.TemporalAxis(frames["time"].values)
+        var = frames.values.T
         return pyinterp.Grid3D(x_axis, y_axis, z_axis, var)
 
     def interpolate(self, lon: np.ndarray, lat: np.ndarray,
                     time: np.ndarray) -> np.ndarray:
         """Interpolate the SSH to the required coordinates"""
-        interpolator = self.load_dataset(time.min(), time.max())
-        time2 = time.astype("datetime64[ns]")
-        swh = pyinterp.trivariate(interpolator,
-                                  lon.flatten(),
-                                  lat.flatten(),
-                                  time2,
-                                  bounds_error=True,
-                                  interpolator='bilinear').reshape(lon.shape)
-        return swh
+        return self.interpolate_frames(lon, lat, time, bounds_error=True)
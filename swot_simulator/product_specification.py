@@ -13,11 +13,20 @@ import collections
 import logging
 import os
 import pathlib
+import shutil
 import xml.etree.ElementTree as xt
 #
 import netCDF4
 import numpy as np
 import xarray as xr
+try:
+    import numcodecs
+    import zarr
+    import zarr.codecs
+except ImportError:
+    # The Zarr output format is optional (pip install swot_simulator[zarr]).
+    numcodecs = None
+    zarr = None
 from . import orbit_propagator
 from . import math
 from . import PRODUCT_TYPE
@@ -29,6 +38,41 @@ REFERENCE = "Gaultier, L., C. Ubelmann, and L.-L. Fu, 2016: The " \
     " J. Atmos. Oceanic Technol., 33, 119-126, doi:10.1175/jtech-d-15-0160" \
     ".1. http://dx.doi.org/10.1175/JTECH-D-15-0160.1."
 
+#: Compression and chunking of the variables written for each write profile.
+#: The chunk shape is given for each dimension of the products, None selects
+#: the whole dimension.
+WRITE_PROFILES: Dict[str, Dict[str, Any]] = dict(
+    fast=dict(zlib=False,
+              shuffle=False,
+              chunks=dict(num_lines=None, num_pixels=None, num_sides=None)),
+    balanced=dict(zlib=True,
+                  complevel=4,
+                  shuffle=True,
+                  chunks=dict(num_lines=1024,
+                              num_pixels=None,
+                              num_sides=None)),
+    archive=dict(zlib=True,
+                 complevel=9,
+                 shuffle=True,
+                 chunks=dict(num_lines=4096,
+                             num_pixels=None,
+                             num_sides=None)),
+)
+
+#: Default write profile.
+DEFAULT_WRITE_PROFILE = "balanced"
+
+#: Compressors, defined by their Blosc properties, used for each write profile
+#: by the Zarr backend. None disables compression.
+ZARR_COMPRESSORS: Dict[str, Optional[Dict[str, Any]]] = dict(
+    fast=None,
+    balanced=dict(cname="lz4", clevel=5, shuffle=1),
+    archive=dict(cname="zstd", clevel=9, shuffle=1),
+)
+
+#: Shuffle filters of the Zarr format 3, indexed by the numcodecs value.
+ZARR_SHUFFLE = ("noshuffle", "shuffle", "bitshuffle")
+
 
 def _find(element: xt.Element, tag: str) -> xt.Element:
     """Find a tag in the xml format specifcation file"""
@@ -181,22 +225,40 @@ def _parser(tree: xt.ElementTree):
     return variables, attributes
 
 
-def _create_variable_args(encoding: Dict[str, Dict], name: str,
-                          variable: xr.Variable) -> Tuple[str, Dict[str, Any]]:
+def _chunk_sizes(chunks: Dict[str, Optional[int]], dims: Tuple[str, ...],
+                 shape: Tuple[int, ...]) -> Optional[Tuple[int, ...]]:
+    """Calculates the chunk shape of a variable from the chunk shape of the
+    dimensions defined by a write profile."""
+    if not dims or any(size == 0 for size in shape):
+        return None
+    return tuple(
+        min(size, chunks.get(dim) or size) for dim, size in zip(dims, shape))
+
+
+def _create_variable_args(
+        encoding: Dict[str, Dict],
+        name: str,
+        variable: xr.Variable,
+        profile: str = DEFAULT_WRITE_PROFILE) -> Tuple[str, Dict[str, Any]]:
     """Initiation of netCDF4.Dataset.createVariable method parameters from
-    user-defined encoding information.
+    user-defined encoding information and the write profile selected.
     """
+    if profile not in WRITE_PROFILES:
+        raise ValueError(f"Unknown write profile: {profile}")
+    settings = WRITE_PROFILES[profile]
     kwargs = dict()
     keywords = encoding[name] if name in encoding else dict()
     if "_FillValue" in keywords:
         keywords["fill_value"] = keywords.pop("_FillValue")
     dtype = keywords.pop("dtype", variable.dtype)
-    for key, value in dict(zlib=True,
-                           complevel=4,
-                           shuffle=True,
+    for key, value in dict(zlib=settings.get("zlib", True),
+                           complevel=settings.get("complevel", 4),
+                           shuffle=settings.get("shuffle", True),
                            fletcher32=False,
                            contiguous=False,
-                           chunksizes=None,
+                           chunksizes=_chunk_sizes(settings["chunks"],
+                                                   variable.dims,
+                                                   variable.shape),
                            endian='native',
                            least_significant_digit=None,
                            fill_value=None).items():
@@ -207,7 +269,8 @@ def _create_variable_args(encoding: Dict[str, Dict], name: str,
 def _create_variable(xr_dataset: xr.Dataset, nc_dataset: netCDF4.Dataset,
                      encoding: Dict[str, Dict[str, Dict[str, Any]]], name: str,
                      unlimited_dims: Optional[List[str]],
-                     variable: xr.Variable) -> None:
+                     variable: xr.Variable,
+                     profile: str = DEFAULT_WRITE_PROFILE) -> None:
     """Creation and writing of the NetCDF variable"""
     unlimited_dims = unlimited_dims or list()
 
@@ -221,7 +284,7 @@ def _create_variable(xr_dataset: xr.Dataset, nc_dataset: netCDF4.Dataset,
             946684800000000) * 1e-6
         assert (
             variable.attrs["units"] == "seconds since 2000-01-01 00:00:00.0")
-    dtype, kwargs = _create_variable_args(encoding, name, variable)
+    dtype, kwargs = _create_variable_args(encoding, name, variable, profile)
 
     # If the dimensions doesn't exist then we have to create them.
     if not nc_dataset.dimensions:
@@ -233,9 +296,17 @@ def _create_variable(xr_dataset: xr.Dataset, nc_dataset: netCDF4.Dataset,
     ncvar.setncatts(variable.attrs)
     values = variable.values
     if kwargs['fill_value'] is not None:
-        if values.dtype.kind == "f" and np.any(np.isnan(values)):
-            values[np.isnan(values)] = kwargs['fill_value']
-        values = np.ma.array(values, mask=values == kwargs['fill_value'])
+        mask = values == kwargs['fill_value']
+        if values.dtype.kind == "f":
+            # The undefined values are masked without modifying the array
+            # provided: the fill value is not always representable in the
+            # floating point type of the array (e.g. 2**31 - 1 in single
+            # precision).
+            undefined = np.isnan(values)
+            if np.any(undefined):
+                mask |= undefined
+                values = np.where(undefined, 0, values)
+        values = np.ma.array(values, mask=mask)
     nc_dataset[name][:] = values
 
 
@@ -243,8 +314,19 @@ def to_netcdf(dataset: xr.Dataset,
               path: Union[str, pathlib.Path],
               encoding: Optional[Dict[str, Dict]] = None,
               unlimited_dims: Optional[List[str]] = None,
+              profile: str = DEFAULT_WRITE_PROFILE,
               **kwargs):
-    """Write dataset contents to a netCDF file"""
+    """Write dataset contents to a netCDF file
+
+    Args:
+        dataset (xarray.Dataset): Dataset to write.
+        path (str, pathlib.Path): Path to the file to create.
+        encoding (dict, optional): Encoding of the variables.
+        unlimited_dims (list, optional): Dimensions to set as unlimited.
+        profile (str, optional): Name of the write profile defining the
+            compression and the chunking of the variables.
+        **kwargs: Extra keyword arguments passed to netCDF4.Dataset.
+    """
     encoding = encoding or dict()
 
     if isinstance(path, str):
@@ -256,11 +338,131 @@ def to_netcdf(dataset: xr.Dataset,
 
         for name, variable in dataset.coords.items():
             _create_variable(dataset, stream, encoding, name, unlimited_dims,
-                             variable)
+                             variable, profile)
 
         for name, variable in dataset.data_vars.items():
             _create_variable(dataset, stream, encoding, name, unlimited_dims,
-                             variable)
+                             variable, profile)
+
+
+def _zarr_encoding(dataset: xr.Dataset, encoding: Dict[str, Dict],
+                   profile: str) -> Dict[str, Dict[str, Any]]:
+    """Builds the encoding of the variables written in a Zarr store.
+
+    The packing attributes (_FillValue, scale_factor, add_offset) and the
+    units of the dates are moved from the attributes of the variables to their
+    encoding, so that xarray encodes the values as the netCDF library does.
+    """
+    if profile not in WRITE_PROFILES:
+        raise ValueError(f"Unknown write profile: {profile}")
+    properties = ZARR_COMPRESSORS[profile]
+    # The stores are written in the default format of the library installed:
+    # the Zarr format 3 has its own codecs.
+    if int(zarr.__version__.split(".")[0]) >= 3:
+        key = "compressors"
+        compressor = None if properties is None else (zarr.codecs.BloscCodec(
+            cname=properties["cname"],
+            clevel=properties["clevel"],
+            shuffle=ZARR_SHUFFLE[properties["shuffle"]]), )
+    else:
+        key = "compressor"
+        compressor = None if properties is None else numcodecs.Blosc(
+            **properties)
+
+    result = dict()
+    for name, variable in dataset.variables.items():
+        keywords = copy.copy(encoding.get(name, dict()))
+        for item in ["_FillValue", "add_offset", "scale_factor"]:
+            if item in variable.attrs:
+                keywords[item] = variable.attrs.pop(item)
+        if np.issubdtype(variable.dtype, np.datetime64):
+            for item in ["units", "calendar"]:
+                if item in variable.attrs:
+                    keywords[item] = variable.attrs.pop(item)
+        if np.dtype(keywords.get("dtype", variable.dtype)).kind in "SU":
+            keywords.pop("dtype", None)
+        keywords["chunks"] = _chunk_sizes(WRITE_PROFILES[profile]["chunks"],
+                                          variable.dims, variable.shape)
+        keywords[key] = compressor
+        result[name] = keywords
+    return result
+
+
+def to_zarr(dataset: xr.Dataset,
+            path: Union[str, pathlib.Path],
+            encoding: Optional[Dict[str, Dict]] = None,
+            profile: str = DEFAULT_WRITE_PROFILE) -> None:
+    """Write dataset contents in a group of a Zarr store.
+
+    The group is first written under a temporary name, then renamed: the
+    group of a pass only exists once it has been completely written. The
+    groups of a store are independent, several workers can write their
+    passes in the same store at the same time.
+
+    Args:
+        dataset (xarray.Dataset): Dataset to write.
+        path (str, pathlib.Path): Path to the group to create, i.e. the path
+            to the store followed by the name of the group.
+        encoding (dict, optional): Encoding of the variables.
+        profile (str, optional): Name of the write profile defining the
+            compression and the chunking of the variables.
+    """
+    if zarr is None or numcodecs is None:
+        raise ImportError("writing Zarr stores requires the zarr and "
+                          "numcodecs packages")
+    path = pathlib.Path(path)
+    store = path.parent
+    store.mkdir(parents=True, exist_ok=True)
+
+    dataset = dataset.copy()
+    encoding = _zarr_encoding(dataset, encoding or dict(), profile)
+
+    temporary = store.joinpath(f".{path.name}.{os.getpid()}")
+    if temporary.exists():
+        shutil.rmtree(temporary)
+    dataset.to_zarr(str(store),
+                    group=temporary.name,
+                    mode="w",
+                    encoding=encoding,
+                    consolidated=False)
+    if path.exists():
+        shutil.rmtree(path)
+    os.rename(temporary, path)
+
+
+def open_zarr_run(path: Union[str, pathlib.Path]) -> xr.Dataset:
+    """Opens lazily the passes written by the Zarr backend as one dataset.
+
+    Args:
+        path (str, pathlib.Path): Path to the directory containing the stores
+            of the cycles (i.e. ``working_directory/karin`` or
+            ``working_directory/nadir``).
+
+    Returns:
+        xarray.Dataset: The passes concatenated along the ``num_lines``
+        dimension. The variables ``cycle_number`` and ``pass_number`` locate
+        the lines of each pass.
+    """
+    path = pathlib.Path(path)
+    datasets = []
+    for store in sorted(path.glob("cycle_*.zarr")):
+        cycle_number = int(store.stem.split("_")[1])
+        for group in sorted(store.glob("pass_*")):
+            pass_number = int(group.name.split("_")[1])
+            ds = xr.open_zarr(str(store),
+                              group=group.name,
+                              consolidated=False)
+            num_lines = ds.sizes["num_lines"]
+            datasets.append(
+                ds.assign(cycle_number=("num_lines",
+                                        np.full(num_lines, cycle_number,
+                                                dtype=np.uint16)),
+                          pass_number=("num_lines",
+                                       np.full(num_lines, pass_number,
+                                               dtype=np.uint16))))
+    if not datasets:
+        raise FileNotFoundError(f"no pass found in {str(path)!r}")
+    return xr.concat(datasets, dim="num_lines", data_vars="minimal")
 
 
 class ProductSpecification:
@@ -684,7 +886,7 @@ class Nadir:
             if fill_value is None:
                 fill_value = np.full((data.shape[0], ),
                                      np.nan,
-                                     dtype=np.float64)
+                                     dtype=data.dtype)
             middle = data.shape[1] // 2
             data = np.c_[data[:, :middle], fill_value[:, np.newaxis],
                          data[:, middle:]]
@@ -782,8 +984,12 @@ class Nadir:
                                                   self.data_vars[0].values,
                                                   lng, lat))
 
-    def to_netcdf(self, cycle_number: int, pass_number: int, path: str,
-                  complete_product: bool) -> None:
+    def to_netcdf(self,
+                  cycle_number: int,
+                  pass_number: int,
+                  path: str,
+                  complete_product: bool,
+                  write_profile: str = DEFAULT_WRITE_PROFILE) -> None:
         """Writes the dataset in a netCDF file.
 
         Args:
@@ -792,10 +998,38 @@ class Nadir:
             complete_product (bool): True if you want to obtain a complete
                 SWOT dataset, i.e. containing all the variables of the
                 official dataset, even those not calculated by the simulator.
+            write_profile (str, optional): Name of the write profile
+                defining the compression and the chunking of the variables.
+        """
+        LOGGER.info("write %s", path)
+        dataset = self.to_xarray(cycle_number, pass_number, complete_product)
+        to_netcdf(dataset,
+                  path,
+                  self.encoding,
+                  profile=write_profile,
+                  mode="w")
+
+    def to_zarr(self,
+                cycle_number: int,
+                pass_number: int,
+                path: str,
+                complete_product: bool,
+                write_profile: str = DEFAULT_WRITE_PROFILE) -> None:
+        """Writes the dataset in a group of a Zarr store.
+
+        Args:
+            cycle_number (int): Cycle number.
+            pass_number (int): Pass number.
+            path (str): Path to the group to create.
+            complete_product (bool): True if you want to obtain a complete
+                SWOT dataset, i.e. containing all the variables of the
+                official dataset, even those not calculated by the simulator.
+            write_profile (str, optional): Name of the write profile
+                defining the compression and the chunking of the variables.
         """
         LOGGER.info("write %s", path)
         dataset = self.to_xarray(cycle_number, pass_number, complete_product)
-        to_netcdf(dataset, path, self.encoding, mode="w")
+        to_zarr(dataset, path, self.encoding, profile=write_profile)
 
 
 class Swath(Nadir):
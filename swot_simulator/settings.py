@@ -10,6 +10,7 @@ from typing import Any, Dict, Iterator, Tuple
 import contextlib
 import copy
 import importlib
+import importlib.util
 import os
 import logging
 import traceback
@@ -27,6 +28,24 @@ DEFAULT_WORKING_DIRECTORY = os.path.join(os.path.expanduser('~'),
 #: Module logger
 LOGGER = logging.getLogger(__name__)
 
+#: Strategies of execution of the error generators
+ERROR_EXECUTORS = ("serial", "thread", "dask")
+
+#: Profiles of compression and chunking of the written products
+WRITE_PROFILES = ("fast", "balanced", "archive")
+
+#: Formats of the written products
+OUTPUT_FORMATS = ("netcdf", "zarr")
+
+#: Optional packages required by the Zarr output format
+ZARR_REQUIREMENTS = ("numcodecs", "zarr")
+
+#: FFT backends used to synthesize the random signals
+FFT_BACKENDS = ("auto", "numpy", "scipy", "pyfftw", "mkl")
+
+#: Floating point types used to compute and store the simulated fields
+PRECISIONS = ("float32", "float64")
+
 
 def execfile_(filepath: str, _globals: Any) -> None:
     """Executes a Python code defined in a file"""
@@ -113,6 +132,7 @@ class Parameters:
     CONFIG_VALUES: Dict[str, Tuple[Any, Any]] = dict(
         area=(None, [float, 4]),
         beam_position=((-20, 20), [float, 2]),
+        cache_directory=(None, str),
         central_pixel=(False, bool),
         complete_product=(False, bool),
         cycle_duration=(20.86455, float),
@@ -120,7 +140,11 @@ class Parameters:
         delta_al=(2.0, float),
         ephemeris_cols=(None, [int, 3]),
         ephemeris=(None, str),
+        error_cache_size=(None, int),
+        error_executor=("thread", str),
         error_spectrum=(None, str),
+        fft_backend=("auto", str),
+        fft_threads=(1, int),
         corrected_roll_phase_dataset=(None, str),
         half_gap=(10.0, float),
         half_swath=(60.0, float),
@@ -132,6 +156,8 @@ class Parameters:
         noise=(None, [str, -1]),
         nrand_karin=(1000, int),
         nseed=(0, int),
+        output_format=("netcdf", str),
+        precision=("float64", str),
         product_type=("expert", str),
         requirement_bounds=(None, [float, 2]),
         shift_lon=(None, float),
@@ -142,6 +168,7 @@ class Parameters:
         swath=(True, bool),
         swh=(2, int),
         working_directory=(DEFAULT_WORKING_DIRECTORY, str),
+        write_profile=("balanced", str),
     )
 
     #: Arguments that must be defined by the user.
@@ -164,6 +191,35 @@ class Parameters:
             if getattr(self, "noise") is not None:
                 raise ValueError("The wind/wave product cannot store errors.")
 
+        error_executor = getattr(self, "error_executor")
+        if error_executor not in ERROR_EXECUTORS:
+            raise ValueError(f"Unknown error executor: {error_executor}")
+
+        write_profile = getattr(self, "write_profile")
+        if write_profile not in WRITE_PROFILES:
+            raise ValueError(f"Unknown write profile: {write_profile}")
+
+        output_format = getattr(self, "output_format")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if output_format == "zarr":
+            missing = [
+                item for item in ZARR_REQUIREMENTS
+                if importlib.util.find_spec(item) is None
+            ]
+            if missing:
+                raise ValueError(
+                    "The zarr output format requires the packages: "
+                    f"{', '.join(missing)} (pip install swot_simulator[zarr])")
+
+        fft_backend = getattr(self, "fft_backend")
+        if fft_backend not in FFT_BACKENDS:
+            raise ValueError(f"Unknown FFT backend: {fft_backend}")
+
+        precision = getattr(self, "precision")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+
         noise = getattr(self, "noise")
         if noise is not None:
             if "corrected_roll_phase" in noise:
@@ -188,6 +244,9 @@ class Parameters:
 
     def _convert_overrides(self, name: str, value: Any) -> Any:
         expected_type = self.CONFIG_VALUES[name][1]
+        # None selects the behavior by default (e.g. error_cache_size).
+        if value is None:
+            return value
         try:
             if isinstance(expected_type, list):
                 if not isinstance(value, list):
@@ -15,6 +15,7 @@ def eval_config_file(filename: str) -> Dict:
 class Parameters:
     area: Optional[Tuple[float, float, float, float]]
     beam_position: List[float]
+    cache_directory: Optional[str]
     central_pixel: bool
     complete_product: bool
     corrected_roll_phase_dataset: Optional[str]
@@ -23,7 +24,11 @@ class Parameters:
     delta_al: float
     ephemeris_cols: Optional[Tuple[int, int, int]]
     ephemeris: Optional[str]
+    error_cache_size: Optional[int]
+    error_executor: str
     error_spectrum: Optional[str]
+    fft_backend: str
+    fft_threads: int
     half_gap: float
     half_swath: float
     height: float
@@ -34,6 +39,8 @@ class Parameters:
     noise: List[str]
     nrand_karin: int
     nseed: int
+    output_format: str
+    precision: str
     product_type: str
     requirement_bounds: Optional[Tuple[float, float]]
     shift_lon: Optional[float]
@@ -45,6 +52,7 @@ class Parameters:
     swh: int
     hierarchical_groups: bool
     working_directory: str
+    write_profile: str
 
     def __init__(self, override: Dict[str, Any]) -> None:
         ...
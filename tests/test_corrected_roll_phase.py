@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import xarray as xr
+import swot_simulator.settings
+import swot_simulator.error.corrected_roll_phase as corrected_roll_phase
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _generate(ds, first_date, time, x_ac):
+    """Errors computed by the previous implementation, interpolating each
+    variable of the dataset separately."""
+    time_date = first_date + (ds.time[:].astype(np.float32) * 86400 *
+                              1000000).astype("timedelta64[us]")
+    time_date = time_date.astype('datetime64[us]').astype('float64') * 0.001
+    time = time.astype('datetime64[us]').astype('float64')
+    values = dict((name, np.interp(time, time_date, ds[name]) * 1e-3)
+                  for name in corrected_roll_phase.CorrectedRollPhase.CHANNELS)
+    swath_center = x_ac.size // 2
+    ac_l = x_ac[:swath_center]
+    ac_r = x_ac[swath_center:]
+    phase = np.hstack((np.outer(values["p1phase_err"], ac_l),
+                       np.outer(values["p2phase_err"], ac_r)))
+    rollphase_est = np.hstack(
+        (np.outer(values["slope1_est"] - values["slope1_err"], ac_l),
+         np.outer(values["slope2_est"] - values["slope2_err"], ac_r)))
+    return {
+        "simulated_error_roll": x_ac * values["proll_err"][:, np.newaxis],
+        "simulated_error_phase": phase,
+        "roll_phase_estimate": rollphase_est
+    }
+
+
+def test_generate(tmpdir):
+    random_state = np.random.RandomState(0)
+    ds = xr.Dataset(
+        dict((name, ("time", random_state.normal(size=50)))
+             for name in corrected_roll_phase.CorrectedRollPhase.CHANNELS),
+        coords=dict(time=np.sort(random_state.uniform(0, 10, 50))))
+    path = str(tmpdir.join("roll_phase.nc"))
+    ds.to_netcdf(path)
+
+    parameters = swot_simulator.settings.Parameters(
+        dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                    "ephem_calval_june2015_ell.txt"),
+             error_spectrum=os.path.join(ROOT, "..", "data",
+                                         "error_spectrum.nc"),
+             karin_noise=os.path.join(ROOT, "..", "data",
+                                      "karin_noise_v2.nc"),
+             corrected_roll_phase_dataset=path))
+    first_date = np.datetime64("2020-01-01")
+    generator = corrected_roll_phase.CorrectedRollPhase(
+        parameters, first_date)
+    # The dates of the pass exceed the time axis of the dataset.
+    time = first_date + np.arange(-3600, 12 * 86400, 977).astype(
+        "timedelta64[s]")
+    x_ac = np.concatenate((-np.arange(10.0, 61.0, 2)[::-1],
+                           np.arange(10.0, 61.0, 2)))
+    result = generator.generate(time, x_ac)
+    expected = _generate(ds, first_date, time, x_ac)
+    assert result.keys() == expected.keys()
+    for name, value in expected.items():
+        np.testing.assert_allclose(result[name], value, err_msg=name)
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+import pytest
+import xarray as xr
+import swot_simulator.plugins.detail as detail
+
+
+def _grids(x_axis, y_axis):
+    dates = np.array(["2020-01-01", "2020-01-02"], dtype="datetime64[ns]")
+    grid = np.add.outer(y_axis, x_axis)
+    return np.stack((grid, grid)), dates
+
+
+def test_stencil_circle():
+    x_axis = np.arange(0.0, 360.0, 1.0)
+    y_axis = np.arange(-10.0, 11.0, 1.0)
+    assert detail.is_circle(x_axis)
+    grids, dates = _grids(np.sin(np.radians(x_axis)), y_axis)
+    lon = np.array([0.5, 359.5, -0.5, 720.25])
+    lat = np.zeros(lon.shape)
+    time = np.full(lon.shape, dates[0])
+    stencil = detail.Stencil(x_axis, y_axis, lon, lat)
+    assert not np.any(stencil.outside)
+    result = stencil(grids, dates, time, bounds_error=True)
+    assert np.allclose(result[1], result[2])
+    assert np.allclose(result[0], -result[1])
+    assert np.isfinite(result).all()
+
+
+def test_stencil_regional():
+    x_axis = np.arange(0.0, 11.0, 1.0)
+    y_axis = np.arange(-10.0, 11.0, 1.0)
+    assert not detail.is_circle(x_axis)
+    grids, dates = _grids(x_axis, y_axis)
+    lon = np.array([0.0, 2.5, 10.0, 50.0, 359.0, -1.0, np.nan])
+    lat = np.array([0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    time = np.full(lon.shape, dates[0])
+    stencil = detail.Stencil(x_axis, y_axis, lon, lat)
+    result = stencil(grids, dates, time)
+    assert np.allclose(result[:3], [0.0, 3.5, 10.0])
+    assert np.all(np.isnan(result[3:]))
+
+    with pytest.raises(ValueError):
+        stencil(grids, dates, time, bounds_error=True)
+    stencil = detail.Stencil(x_axis, y_axis, lon[:3], lat[:3])
+    stencil(grids, dates, time[:3], bounds_error=True)
+
+
+class _TimeSeries(detail.GridTimeSeries):
+    def load_ts(self):
+        pass
+
+
+def test_stencil_cache(tmpdir):
+    x_axis = np.arange(0.0, 360.0, 1.0)
+    y_axis = np.arange(-10.0, 11.0, 1.0)
+    lon = np.array([0.5, 10.25])
+    lat = np.array([0.0, 5.5])
+
+    # Without the cycles of a pass in a row, the stencils are not kept.
+    series = _TimeSeries(str(tmpdir))
+    stencil = series.get_stencil(x_axis, y_axis, lon, lat)
+    assert len(series.stencils) == 0
+    assert series.get_stencil(x_axis, y_axis, lon, lat) is not stencil
+
+    series.enable_stencil_cache()
+    stencil = series.get_stencil(x_axis, y_axis, lon, lat)
+    # Same geometry: hit.
+    assert series.get_stencil(x_axis, y_axis, lon.copy(),
+                              lat.copy()) is stencil
+    # Another geometry: miss.
+    other = series.get_stencil(x_axis, y_axis, lon + 1, lat)
+    assert other is not stencil
+    assert len(series.stencils) == 2
+
+    # The memory budget set by the user is kept.
+    series = _TimeSeries(str(tmpdir), stencil_cache_size=0)
+    series.enable_stencil_cache()
+    series.get_stencil(x_axis, y_axis, lon, lat)
+    assert len(series.stencils) == 0
+
+
+class _Files(detail.GridTimeSeries):
+    """Daily grids stored in one file per day"""
+    def load_ts(self):
+        dates = np.arange(np.datetime64("2020-01-01"),
+                          np.datetime64("2020-01-05"))
+        self.reads = []
+        self.ts = np.array(
+            [(date, os.path.join(self.path, f"{ix}.nc"))
+             for ix, date in enumerate(dates)],
+            dtype=[("date", "datetime64[s]"), ("path", "U256")])
+        self.dt = np.timedelta64(1, "D")
+        for date, path in self.ts:
+            xr.Dataset(
+                dict(ssh=(("time", "latitude", "longitude"),
+                          np.full((1, 3, 4), date.astype(np.int64),
+                                  dtype=np.float64))),
+                coords=dict(time=[date.astype("datetime64[ns]")],
+                            latitude=np.arange(3.0),
+                            longitude=np.arange(4.0))).to_netcdf(path)
+
+    def load_frame(self, path):
+        self.reads.append(path)
+        with xr.open_dataset(path) as ds:
+            return ds.ssh.load()
+
+
+def test_grid_cache(tmpdir):
+    series = _Files(str(tmpdir))
+    first_date = np.datetime64("2020-01-02T12")
+    last_date = np.datetime64("2020-01-03T06")
+    frames = series.load_frames(first_date, last_date)
+    paths = series.select_paths(first_date, last_date)
+    assert len(series.reads) == len(paths) == 3
+    # The cube is the one read from the files by the previous implementation.
+    with xr.open_mfdataset(paths, combine="by_coords") as ds:
+        assert frames.equals(ds.ssh.load())
+
+    # The next pass requires the same grids: they are not read again.
+    series.load_frames(first_date + np.timedelta64(50, "m"),
+                       last_date + np.timedelta64(50, "m"))
+    assert len(series.reads) == 3
+    series.load_frames(np.datetime64("2020-01-01T12"),
+                       np.datetime64("2020-01-01T18"))
+    assert len(series.reads) == 4
+
+    # The least recently used grids are evicted to respect the budget.
+    series = _Files(str(tmpdir), cache_size=frames[0].nbytes * 2)
+    series.load_frames(first_date, last_date)
+    assert len(series.frames) == 2
+    series.load_frames(first_date, last_date)
+    assert len(series.reads) == 6
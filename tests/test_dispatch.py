@@ -0,0 +1,39 @@
+import threading
+import time
+import dask.distributed
+import swot_simulator.dispatch
+
+
+def _work(item):
+    time.sleep(0.1)
+    return item, dask.distributed.get_worker().address
+
+
+def test_compute_new_workers():
+    with dask.distributed.LocalCluster(n_workers=1,
+                                       threads_per_worker=1,
+                                       processes=False,
+                                       dashboard_address=None) as cluster:
+        with dask.distributed.Client(cluster) as client:
+            thread = threading.Timer(0.5, cluster.scale, args=(2, ))
+            thread.start()
+            result = swot_simulator.dispatch.compute(client, _work,
+                                                     range(40))
+            thread.join()
+    assert sorted(item for item, _ in result) == list(range(40))
+    # The worker added during the processing has received tasks.
+    assert len(set(worker for _, worker in result)) == 2
+
+
+def test_statistics():
+    statistics = swot_simulator.dispatch.Statistics(["a", "b"])
+    statistics.submitted("a")
+    time.sleep(0.1)
+    statistics.done("a", 0)
+    idle = statistics.idle_times()
+    # Worker b has never received a task, worker a has been busy during the
+    # sleep.
+    assert idle["b"] >= 0.1
+    assert idle["a"] < idle["b"]
+    assert statistics.completed == 1
+    assert statistics.tasks_per_minute() > 0
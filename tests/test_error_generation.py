@@ -122,6 +122,26 @@ def test_wet_troposphere():
                expected['wt_nadir']['two']['wet_tropo']).mean() < 1e-12
 
 
+def test_wet_troposphere_cache(tmpdir):
+    parameters = load_parameters()
+    (x_al, x_ac, _, _, _) = load_data()
+    expected = swot_simulator.error.wet_troposphere.WetTroposphere(
+        parameters).generate(x_al, x_ac)
+
+    parameters.cache_directory = str(tmpdir)
+    error = swot_simulator.error.wet_troposphere.WetTroposphere(parameters)
+    assert error.ps2d is None
+    generated = error.generate(x_al, x_ac)
+    assert len(tmpdir.join("wet_troposphere").listdir()) == 1
+
+    # The instance serialized reads the random field stored in the cache.
+    error = pickle.loads(pickle.dumps(error))
+    assert error.ps2d is None and error._signal is None
+    for item in [generated, error.generate(x_al, x_ac)]:
+        for key, value in expected.items():
+            assert abs(item[key] - value).mean() < 1e-12
+
+
 def test_altimeter():
     parameters = load_parameters()
     (x_al, _, _, _, expected) = load_data('altimeter')
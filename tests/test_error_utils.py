@@ -1,8 +1,12 @@
+import concurrent.futures
 import os
 import pickle
+import numpy as np
 import pytest
+import scipy.interpolate
 import xarray as xr
 
+import swot_simulator.error.fft as fft
 import swot_simulator.error.utils as utils
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +22,34 @@ def test_gen_signal_1d():
     assert (result - expected).mean() < 1e-12
 
 
+def test_signal_1d():
+    with open(os.path.join(ROOT, "data", "gen_signal_1d.bin"), "rb") as stream:
+        (fi, psi, x, nseed, fmin, fmax, alpha, lf_extpl, hf_extpl,
+         expected) = pickle.load(stream)
+
+    signal = utils.Signal1D(fi, psi, nseed, fmin, fmax, alpha, lf_extpl,
+                            hf_extpl)
+    assert (signal(x) - expected).mean() < 1e-12
+    # The signal is periodic
+    assert (signal(x + signal.period) - expected).mean() < 1e-12
+
+
+def test_signal_1d_fft_backends():
+    with open(os.path.join(ROOT, "data", "gen_signal_1d.bin"), "rb") as stream:
+        (fi, psi, x, nseed, fmin, fmax, alpha, lf_extpl, hf_extpl,
+         expected) = pickle.load(stream)
+
+    for name in ["numpy", "scipy"]:
+        backend = fft.create(name, threads=2)
+        backend = pickle.loads(pickle.dumps(backend))
+        signal = utils.Signal1D(fi, psi, nseed, fmin, fmax, alpha, lf_extpl,
+                                hf_extpl, backend)
+        assert abs(signal(x) - expected).mean() < 1e-12
+
+    with pytest.raises(ValueError):
+        fft.create("unknown")
+
+
 def test_gen_signal_2d_rectangle():
     with open(os.path.join(ROOT, "data", "gen_signal_2d_rectangle.bin"),
               "rb") as stream:
@@ -31,11 +63,110 @@ def test_gen_signal_2d_rectangle():
     assert (result - expected).mean() < 1e-12
 
 
+
+def test_signal_2d_periodic_bilinear():
+    random_state = np.random.RandomState(0)
+    tile = random_state.normal(size=(33, 17))
+    # A period of 160 along x and 64 along y.
+    signal = utils.Signal2D.from_tile(tile, 1 / 160, 1 / 64)
+
+    # Within the first period, the signal is the bilinear interpolation of
+    # the tile, relative to the first position of each axis.
+    x = np.linspace(0, 159.9, 101) + 1000
+    y = np.linspace(0, 63.9, 53) - 20
+    interpolator = scipy.interpolate.RegularGridInterpolator(
+        (signal.yg, signal.xg), tile)
+    mx, my = np.meshgrid(x - x[0], y - y[0])
+    expected = interpolator(np.stack((my.ravel(), mx.ravel()),
+                                     axis=-1)).reshape(mx.shape)
+    np.testing.assert_allclose(signal(x, y), expected)
+
+    # Beyond the first period, the positions are wrapped.
+    result = signal(np.concatenate((x, x + 160)), np.concatenate(
+        (y, y + 64)))
+    np.testing.assert_allclose(result[:y.size, :x.size], expected)
+    np.testing.assert_allclose(result[y.size:, x.size:], expected)
+
+    # The axes of the tile are swapped if the period along y is the longest.
+    signal = utils.Signal2D.from_tile(tile, 1 / 64, 1 / 160)
+    assert signal.revert
+    np.testing.assert_allclose(signal(y, x), expected.T)
+
+
+def test_signal_random_streams():
+    fi = np.arange(1 / 1000, 0.05, 1 / 1000)
+    psi = fi**-2
+    ps2d, f = utils.gen_ps2d(fi, psi, 1 / 1000, 1 / 500, 0.05, 2)
+    x = np.arange(0, 3000, 2.0)
+    y = np.arange(-60, 60, 2.0)
+
+    def synthesize(nseed):
+        return (utils.Signal1D(fi, psi, nseed, 1 / 1000, 0.05)(x),
+                utils.Signal2D(ps2d, f, 1 / 1000, 1 / 500, 0.05, 2,
+                               nseed)(x, y))
+
+    # The global random generator is neither used nor reseeded.
+    np.random.seed(42)
+    state = np.random.get_state()[1].copy()
+    expected = [synthesize(nseed) for nseed in range(8)]
+    assert np.all(np.random.get_state()[1] == state)
+    assert not np.all(expected[0][0] == expected[1][0])
+
+    # The signals synthesized concurrently are the ones synthesized
+    # serially.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        result = list(executor.map(synthesize, range(8)))
+    for (signal_1d, signal_2d), (item_1d, item_2d) in zip(result, expected):
+        assert np.all(signal_1d == item_1d)
+        assert np.all(signal_2d == item_2d)
+
+
+def test_gen_ps2d_cache(tmpdir):
+    with open(os.path.join(ROOT, "data", "gen_signal_2d_rectangle.bin"),
+              "rb") as stream:
+        (fi, psi, _, _, fminx, fminy, fmax, alpha, _, lf_extpl, hf_extpl,
+         _) = pickle.load(stream)
+
+    expected, f = utils.gen_ps2d(fi, psi, fminx, fminy, fmax, alpha, lf_extpl,
+                                 hf_extpl)
+    for _ in range(2):
+        ps2d, f2 = utils.gen_ps2d(fi, psi, fminx, fminy, fmax, alpha,
+                                  lf_extpl, hf_extpl, str(tmpdir))
+        assert np.all(ps2d == expected)
+        assert np.all(f == f2)
+    assert len(tmpdir.join("ps2d").listdir()) == 1
+
+
 def test_read_file_karin():
     height_sdt, cross_track, swh = utils.read_file_karin(
         os.path.join(ROOT, "..", "data", "karin_noise_v2.nc"))
 
 
+def test_interpolate_file_karin():
+    height_sdt = np.array([[1.0, 2.0, 3.0], [2.0, 4.0, 6.0], [3.0, 6.0, 9.0]])
+    cross_track = np.array([10.0, 20.0, 30.0])
+    swh = np.array([0.0, 1.0, 2.0])
+    x_ac = np.array([12.0, 19.0, 21.0, 29.0])
+
+    # Constant SWH along track
+    result = utils.interpolate_file_karin(np.full(x_ac.shape, 0.5), x_ac,
+                                          height_sdt, cross_track, swh)
+    assert result.shape == (1, 4)
+    assert np.allclose(result, [[1.5, 3.0, 3.0, 4.5]])
+
+    # SWH defined for each pixel
+    swh_in = np.array([[0.0, 1.0, 1.5, 0.25], [0.5, 0.5, 0.5, 0.5]])
+    result = utils.interpolate_file_karin(swh_in, x_ac, height_sdt,
+                                          cross_track, swh)
+    assert np.allclose(result, [[1.0, 4.0, 5.0, 3.75], [1.5, 3.0, 3.0, 4.5]])
+
+    # SWH greater than the maximum of the table
+    with pytest.warns(RuntimeWarning):
+        result = utils.interpolate_file_karin(np.full(x_ac.shape, 3.0), x_ac,
+                                              height_sdt, cross_track, swh)
+    assert np.allclose(result, [[3.0, 6.0, 6.0, 9.0]])
+
+
 def test_read_file_instr():
     dataset = utils.read_file_instr(
         os.path.join(ROOT, "..", "data", "error_spectrum.nc"), 2.0, 20000)
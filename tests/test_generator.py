@@ -0,0 +1,163 @@
+import os
+import numpy as np
+import swot_simulator.settings
+import swot_simulator.error.generator
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_parameters(**kwargs):
+    return swot_simulator.settings.Parameters(
+        dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                    "ephem_calval_june2015_ell.txt"),
+             error_executor="serial",
+             error_spectrum=os.path.join(ROOT, "..", "data",
+                                         "error_spectrum.nc"),
+             karin_noise=os.path.join(ROOT, "..", "data",
+                                      "karin_noise_v2.nc"),
+             noise=["altimeter", "baseline_dilation", "karin", "timing"],
+             **kwargs))
+
+
+def test_generate_batch():
+    generator = swot_simulator.error.generator.Generator(
+        load_parameters(), np.datetime64("2020-01-01"))
+    x_ac = np.concatenate((-np.arange(11.0, 71.0, 2)[::-1],
+                           np.arange(11.0, 71.0, 2)))
+    passes = []
+    for cycle_number, size in [(1, 100), (2, 0), (3, 57)]:
+        x_al = np.arange(size, dtype=np.float64) * 2 + cycle_number * 10
+        time = np.datetime64("2020-01-01") + np.arange(size).astype(
+            "timedelta64[s]")
+        swh = np.full(x_ac.shape, 2.0)
+        passes.append((cycle_number, time, x_al, swh))
+
+    batch = generator.generate_batch(40075.0, x_ac, passes)
+    assert len(batch) == 3
+    assert batch[1] == dict()
+    for (cycle_number, time, x_al, swh), errors in zip(passes, batch):
+        if not x_al.size:
+            continue
+        expected = generator.generate(cycle_number, 40075.0, time, x_al,
+                                      x_ac, swh)
+        assert set(errors) == set(expected)
+        for key, value in expected.items():
+            assert errors[key].shape == value.shape
+            assert np.all(errors[key] == value)
+
+
+def test_cycle_invariant_cache(tmpdir):
+    parameters = load_parameters(cache_directory=str(tmpdir))
+    generator = swot_simulator.error.generator.Generator(
+        parameters, np.datetime64("2020-01-01"))
+    x_ac = np.concatenate((-np.arange(11.0, 71.0, 2)[::-1],
+                           np.arange(11.0, 71.0, 2)))
+    x_al = np.arange(100, dtype=np.float64) * 2
+    time = np.datetime64("2020-01-01") + np.arange(100).astype(
+        "timedelta64[s]")
+    swh = np.full(x_ac.shape, 2.0)
+
+    first = generator.generate(1, 40075.0, time, x_al, x_ac, swh)
+    # Altimeter, baseline dilation and timing are kept, not KaRIn.
+    assert len(generator.cache) == 3
+    expected = dict((key, value.copy()) for key, value in first.items())
+    first["simulated_error_timing"] *= np.nan
+
+    second = generator.generate(2, 40075.0, time, x_al, x_ac, swh)
+    for key in ["simulated_error_altimeter",
+                "simulated_error_baseline_dilation",
+                "simulated_error_timing"]:
+        assert np.all(second[key] == expected[key])
+    assert np.any(second["simulated_error_karin"] !=
+                  expected["simulated_error_karin"])
+
+    # Another process reads the errors stored on disk.
+    assert len(os.listdir(os.path.join(str(tmpdir), "errors"))) == 3
+    generator = swot_simulator.error.generator.Generator(
+        parameters, np.datetime64("2020-01-01"))
+    assert len(generator.cache) == 0
+    third = generator.generate(1, 40075.0, time, x_al, x_ac, swh)
+    assert len(generator.cache) == 3
+    for key, value in expected.items():
+        assert np.all(third[key] == value)
+
+
+def test_generate_batch_shared_keys(tmpdir):
+    parameters = load_parameters(cache_directory=str(tmpdir))
+    generator = swot_simulator.error.generator.Generator(
+        parameters, np.datetime64("2020-01-01"))
+    x_ac = np.concatenate((-np.arange(11.0, 71.0, 2)[::-1],
+                           np.arange(11.0, 71.0, 2)))
+    x_al = np.arange(100, dtype=np.float64) * 2
+    time = np.datetime64("2020-01-01") + np.arange(100).astype(
+        "timedelta64[s]")
+    swh = np.full(x_ac.shape, 2.0)
+    passes = [(cycle_number, time, x_al, swh) for cycle_number in (1, 2, 3)]
+
+    execute = generator._execute
+    sizes = []
+
+    def _execute(tasks):
+        sizes.extend(args[0].size for _, args in tasks)
+        return execute(tasks)
+
+    generator._execute = _execute
+    batch = generator.generate_batch(40075.0, x_ac, passes)
+    # The errors independent of the cycle number are simulated once for the
+    # pass, KaRIn for each cycle.
+    assert sorted(sizes) == [100] * 6
+    assert len(os.listdir(os.path.join(str(tmpdir), "errors"))) == 3
+    for key in ["simulated_error_altimeter",
+                "simulated_error_baseline_dilation",
+                "simulated_error_timing"]:
+        for errors in batch[1:]:
+            assert np.all(errors[key] == batch[0][key])
+            assert not np.shares_memory(errors[key], batch[0][key])
+    assert np.any(batch[1]["simulated_error_karin"] !=
+                  batch[0]["simulated_error_karin"])
+
+
+def test_cache_size(tmpdir):
+    first_date = np.datetime64("2020-01-01")
+    # A pass number comes back one cycle later: the errors are not kept in
+    # memory by default.
+    generator = swot_simulator.error.generator.Generator(
+        load_parameters(), first_date)
+    assert generator.cache.max_bytes == 0
+    generator.enable_cache()
+    assert generator.cache.max_bytes == \
+        swot_simulator.error.generator.DEFAULT_CACHE_SIZE
+
+    generator = swot_simulator.error.generator.Generator(
+        load_parameters(cache_directory=str(tmpdir)), first_date)
+    assert generator.cache.max_bytes == \
+        swot_simulator.error.generator.DEFAULT_CACHE_SIZE
+
+    generator = swot_simulator.error.generator.Generator(
+        load_parameters(error_cache_size=0), first_date)
+    generator.enable_cache()
+    assert generator.cache.max_bytes == 0
+
+
+def test_precision():
+    first_date = np.datetime64("2020-01-01")
+    x_ac = np.concatenate((-np.arange(11.0, 71.0, 2)[::-1],
+                           np.arange(11.0, 71.0, 2)))
+    x_al = np.arange(100, dtype=np.float64) * 2
+    time = first_date + np.arange(100).astype("timedelta64[s]")
+    swh = np.full(x_ac.shape, 2.0)
+
+    expected = swot_simulator.error.generator.Generator(
+        load_parameters(), first_date).generate(1, 40075.0, time, x_al,
+                                                x_ac, swh)
+    # The errors are computed in double precision, then converted: the
+    # random streams are the same in single precision.
+    result = swot_simulator.error.generator.Generator(
+        load_parameters(precision="float32"),
+        first_date).generate(1, 40075.0, time, x_al, x_ac,
+                             swh.astype("float32"))
+    assert set(result) == set(expected)
+    for key, value in expected.items():
+        assert value.dtype == np.float64
+        assert result[key].dtype == np.float32
+        assert np.all(result[key] == value.astype(np.float32))
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import xarray as xr
+import swot_simulator.plugins.ssh
+
+
+def _create(path, run, hours):
+    lon = np.arange(0.0, 360.0, 10.0)
+    lat = np.arange(-80.0, 81.0, 10.0)
+    xr.Dataset(
+        dict(surf_el=(("time", "depth", "lat", "lon"),
+                      np.zeros((len(hours), 1, lat.size, lon.size)))),
+        coords=dict(time=("time", np.array(hours, dtype=np.float64),
+                          dict(units="hours since 2000-01-01")),
+                    depth=[0.0],
+                    lat=lat,
+                    lon=lon)).to_netcdf(
+                        os.path.join(path,
+                                     f"hycom_GLBu0.08_191_{run}_t000.nc"))
+
+
+def test_time_index(tmpdir, monkeypatch):
+    data = str(tmpdir.mkdir("data"))
+    start = 12 * 366 * 24
+    _create(data, "2012010100", [start, start + 3])
+    _create(data, "2012010106", [start + 6, start + 9])
+
+    cache_directory = str(tmpdir.join("cache"))
+    plugin = swot_simulator.plugins.ssh.HYCOM(data,
+                                              cache_directory=cache_directory)
+    assert len(plugin.ts) == 4
+    assert plugin.dt == np.timedelta64(3, "h")
+    assert plugin.index.startswith(cache_directory)
+    assert os.path.exists(plugin.index)
+    assert not os.path.exists(os.path.join(data, ".time_index.json"))
+    assert np.all(
+        swot_simulator.plugins.ssh.HYCOM(
+            data, cache_directory=cache_directory).ts == plugin.ts)
+
+    # The data directory is read-only: the time index is not written.
+    monkeypatch.setattr(os, "access", lambda *args, **kwargs: False)
+    plugin = swot_simulator.plugins.ssh.HYCOM(data)
+    assert plugin.index is None
+    assert len(plugin.ts) == 4
+    assert not os.path.exists(os.path.join(data, ".time_index.json"))
+
+
+def test_most_recent_forecast(tmpdir):
+    # The path of the most recent run sorts before the path of the oldest
+    # one.
+    recent = str(tmpdir.mkdir("a"))
+    oldest = str(tmpdir.mkdir("b"))
+    start = 12 * 366 * 24
+    _create(oldest, "2012010100", [start, start + 3, start + 6])
+    _create(recent, "2012010106", [start + 6, start + 9])
+
+    plugin = swot_simulator.plugins.ssh.HYCOM(str(tmpdir))
+    assert len(plugin.ts) == 4
+    assert all(path.startswith(oldest) for path in plugin.ts["path"][:2])
+    assert all(path.startswith(recent) for path in plugin.ts["path"][2:])
+    assert list(plugin.ts["index"]) == [0, 1, 0, 1]
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pytest
+import swot_simulator.settings
+import swot_simulator.error.karin
+import swot_simulator.orbit_propagator
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _sigma(swh_in, x_ac_in, height_sdt, cross_track, swh):
+    """Standard deviation of the noise computed by the previous
+    implementation."""
+    swh_in = np.atleast_2d(swh_in)
+    hsdt = np.zeros(swh_in.shape)
+    for j in range(swh_in.shape[1]):
+        indice_ac = np.argmin(np.abs(cross_track - x_ac_in[j]))
+        for i in range(swh_in.shape[0]):
+            threshold = swh_in[i, j]
+            indices = np.argmin(np.abs(swh - threshold))
+            if swh[indices] > threshold:
+                indices -= 1
+            if swh.max() <= threshold:
+                hsdt[i, j] = height_sdt[-1, indice_ac]
+            else:
+                rswh = threshold - swh[indices]
+                hsdt[i, j] = height_sdt[indices, indice_ac] * (
+                    1 - rswh) + rswh * height_sdt[indices + 1, indice_ac]
+    return hsdt
+
+
+def _generate(karin, x_al, x_ac, curvilinear_distance, cycle, swh):
+    """KaRIn noise computed by the previous implementation."""
+    a_karin = np.random.RandomState(karin.nseed + 1).normal(
+        0, 1, (karin.nrand_karin, x_ac.size))
+    sigma_karin = _sigma(swh, x_ac, karin.hsdt, karin.x_ac,
+                         karin.swh) / np.sqrt(karin.delta_al * karin.delta_ac)
+    ai = (((x_al + cycle * curvilinear_distance) / karin.delta_al) %
+          karin.nrand_karin).astype(np.uint64)
+    return sigma_karin * a_karin[ai, :]
+
+
+def test_generate():
+    parameters = swot_simulator.settings.Parameters(
+        dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                    "ephem_calval_june2015_ell.txt"),
+             error_spectrum=os.path.join(ROOT, "..", "data",
+                                         "error_spectrum.nc"),
+             karin_noise=os.path.join(ROOT, "..", "data",
+                                      "karin_noise_v2.nc")))
+    karin = swot_simulator.error.karin.Karin(parameters)
+    random_state = np.random.RandomState(0)
+    x_al = np.arange(100, dtype=np.float64) * parameters.delta_al
+    swh_max = float(karin.swh.max())
+
+    # The swath defined by the settings, using the precomputed tables, and
+    # another swath.
+    x_ac = swot_simulator.orbit_propagator.across_track_distance(parameters)
+    for item in [x_ac, x_ac[::2]]:
+        # SWH varying in space, including values greater than the maximum
+        # of the file, and constant along track.
+        swh = random_state.uniform(0, swh_max * 1.1, (x_al.size, item.size))
+        for swh in [swh, swh[0, :]]:
+            with pytest.warns(RuntimeWarning):
+                result = karin.generate(x_al, item, 1000.0, 3, swh)
+            np.testing.assert_allclose(
+                result["simulated_error_karin"],
+                _generate(karin, x_al, item, 1000.0, 3, swh))
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import swot_simulator.error.generator
+import swot_simulator.launcher
+import swot_simulator.plugins.ssh.detail
+import swot_simulator.settings
+
+
+def test_accumulate_errors():
+    mask = np.ones((4, 3))
+    mask[:, 1] = np.nan
+    ssh = np.arange(16, dtype=np.float64).reshape(4, 4)
+    errors = dict(swath=np.full((4, 3), 0.5),
+                  other=np.full((4, 3), 0.25),
+                  nadir=np.full((4, ), 2.0))
+
+    swath = np.multiply(ssh[:, :-1], mask)
+    nadir = ssh[:, -1].copy()
+    swot_simulator.launcher.accumulate_errors(errors, mask, swath, nadir)
+
+    expected = ssh[:, :-1] * mask + 0.75
+    assert np.allclose(swath, expected, equal_nan=True)
+    assert np.all(np.isnan(errors["swath"][:, 1]))
+    assert np.all(errors["other"][:, 0] == 0.25)
+    assert np.allclose(nadir, ssh[:, -1] + 2)
+    assert np.all(errors["nadir"] == 2)
+
+    # Without SSH, the swath errors are only masked.
+    errors = dict(swath=np.full((4, 3), 0.5))
+    swot_simulator.launcher.accumulate_errors(errors, mask, None, None)
+    assert np.all(np.isnan(errors["swath"][:, 1]))
+    assert np.all(errors["swath"][:, 0] == 0.5)
+
+
+def test_enable_pass_caches(tmpdir):
+    class Plugin(swot_simulator.plugins.ssh.detail.CartesianGridHandler):
+        def load_ts(self):
+            pass
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                        "data")
+    parameters = swot_simulator.settings.Parameters(
+        dict(ephemeris=os.path.join(root, "ephem_calval_june2015_ell.txt"),
+             error_executor="serial",
+             error_spectrum=os.path.join(root, "error_spectrum.nc"),
+             karin_noise=os.path.join(root, "karin_noise_v2.nc"),
+             noise=["altimeter"],
+             ssh_plugin=Plugin(str(tmpdir))))
+    error_generator = swot_simulator.error.generator.Generator(
+        parameters, np.datetime64("2020-01-01"))
+    assert error_generator.cache.max_bytes == 0
+    assert parameters.ssh_plugin.plugin.stencils.max_bytes == 0
+
+    swot_simulator.launcher.enable_pass_caches(error_generator, parameters)
+    assert error_generator.cache.max_bytes > 0
+    assert parameters.ssh_plugin.plugin.stencils.max_bytes > 0
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+pyinterp = pytest.importorskip("pyinterp")
+import swot_simulator.plugins.ssh.mitgcm as mitgcm  # noqa: E402
+
+
+def _model():
+    """LLC-like grid: two adjacent faces of jittered points"""
+    generator = np.random.default_rng(0)
+    j, i = np.meshgrid(np.arange(40) * 0.2, np.arange(40) * 0.2,
+                       indexing="ij")
+    lon = np.stack((i, i + 8.0)) + generator.uniform(-0.05, 0.05,
+                                                     (2, 40, 40))
+    lat = np.stack((j, j)) + generator.uniform(-0.05, 0.05, (2, 40, 40))
+    time = np.arange(3) * np.timedelta64(1, "h") + np.datetime64("2012-01-01")
+    ssh = np.sin(np.radians(lon * 20))[np.newaxis, ...] * np.arange(
+        1, 4).reshape(3, 1, 1, 1) + np.cos(np.radians(lat * 30))
+    # Land points
+    ssh[:, 0, 10:30, 10:30] = np.nan
+    dims = ("face", "j", "i")
+    return (xr.DataArray(lon, dims=dims).chunk(),
+            xr.DataArray(lat, dims=dims).chunk(),
+            xr.DataArray(ssh.astype("float32"),
+                         dims=("time", ) + dims,
+                         coords=dict(time=time)).chunk())
+
+
+def _reference(lon, lat, ssh, layer, x, y):
+    """Interpolation of a layer with a tree of all the ocean points"""
+    values = ssh[layer].values
+    defined = ~np.isnan(values)
+    mesh = pyinterp.RTree(dtype="float32")
+    mesh.packing(
+        np.vstack((lon.values[defined], lat.values[defined])).T,
+        values[defined])
+    z, _ = mesh.radial_basis_function(np.vstack((x, y)).T.astype("float32"),
+                                      within=True,
+                                      k=11,
+                                      radius=55000,
+                                      rbf="thin_plate",
+                                      num_threads=1)
+    return z.astype("float32")
+
+
+def test_interpolate():
+    lon, lat, ssh = _model()
+    generator = np.random.default_rng(1)
+    x = np.concatenate((
+        generator.uniform(0.5, 15.0, 200),
+        # Outside the grid: not surrounded by the neighbors.
+        [-1.0, 20.0],
+        # Center of the land: no neighbor within the radius.
+        [4.0],
+        # Edge of the land: fewer than k neighbors within the radius.
+        [2.2, 5.8]))
+    y = np.concatenate((generator.uniform(0.5, 7.5, 200), [4.0, 4.0, 4.0],
+                        [4.0, 4.0]))
+    dates = np.full(x.shape, ssh.time.values[1]).astype("datetime64[us]")
+    dates[-1] = ssh.time.values[2]
+
+    plugin = mitgcm.MITGCM(lon, lat, ssh)
+    result = plugin.interpolate(x, y, dates)
+    expected = np.where(dates == dates[0],
+                        _reference(lon, lat, ssh, 1, x, y),
+                        _reference(lon, lat, ssh, 2, x, y))
+    assert np.all(np.isnan(result[200:203]))
+    np.testing.assert_allclose(result, expected, rtol=1e-5, equal_nan=True)
+
+    # The tree is reused by the following passes.
+    tree = plugin._tree
+    np.testing.assert_allclose(plugin.interpolate(x, y, dates),
+                               result,
+                               equal_nan=True)
+    assert plugin._tree is tree
@@ -0,0 +1,105 @@
+import importlib.util
+import os
+import netCDF4
+import numpy as np
+import pytest
+import xarray as xr
+import swot_simulator.product_specification as product_specification
+
+requires_zarr = pytest.mark.skipif(importlib.util.find_spec("zarr") is None,
+                                   reason="zarr is not installed")
+
+
+def _dataset(num_lines, offset):
+    time = np.datetime64("2020-01-01") + np.arange(num_lines).astype(
+        "timedelta64[s]")
+    ssh = np.arange(num_lines * 4, dtype=np.float64).reshape(
+        num_lines, 4) * 1e-3 + offset
+    # Masked measurements
+    ssh[:, 1] = np.nan
+    return xr.Dataset(
+        dict(time=(("num_lines", ),
+                   time.astype("datetime64[ns]"),
+                   dict(units="seconds since 2000-01-01 00:00:00.0",
+                        calendar="gregorian")),
+             ssh_karin=(("num_lines", "num_pixels"), ssh,
+                        dict(scale_factor=1e-4,
+                             add_offset=0.0,
+                             _FillValue=2147483647))),
+        attrs=dict(title="test"))
+
+
+@requires_zarr
+@pytest.mark.parametrize("profile", ["fast", "balanced", "archive"])
+def test_zarr_run(tmpdir, profile):
+    root = str(tmpdir)
+    encoding = dict(ssh_karin=dict(dtype="int32"))
+    expected = []
+    for cycle_number in [1, 2]:
+        for pass_number in [3, 4]:
+            dataset = _dataset(5 + pass_number, cycle_number * 10)
+            expected.append((cycle_number, pass_number, dataset))
+            path = os.path.join(root, f"cycle_{cycle_number:03d}.zarr",
+                                f"pass_{pass_number:04d}")
+            product_specification.to_zarr(dataset, path, encoding, profile)
+            # Rewriting a pass replaces the group.
+            product_specification.to_zarr(dataset, path, encoding, profile)
+
+    # The temporary groups are renamed once written: one store per cycle,
+    # one group per pass.
+    assert sorted(os.listdir(root)) == ["cycle_001.zarr", "cycle_002.zarr"]
+    for cycle_number in [1, 2]:
+        groups = [
+            item for item in os.listdir(
+                os.path.join(root, f"cycle_{cycle_number:03d}.zarr"))
+            if item.startswith(("pass_", "."))
+        ]
+        assert sorted(groups) == ["pass_0003", "pass_0004"]
+
+    ds = product_specification.open_zarr_run(root)
+    assert ds.sizes["num_lines"] == sum(
+        item[2].sizes["num_lines"] for item in expected)
+    start = 0
+    for cycle_number, pass_number, dataset in expected:
+        part = ds.isel(num_lines=slice(start,
+                                       start + dataset.sizes["num_lines"]))
+        start += dataset.sizes["num_lines"]
+        assert np.all(part.cycle_number.values == cycle_number)
+        assert np.all(part.pass_number.values == pass_number)
+        assert np.all(part.time.values == dataset.time.values)
+        # The values are packed as int32 with the scale factor.
+        np.testing.assert_allclose(part.ssh_karin.values,
+                                   dataset.ssh_karin.values,
+                                   atol=1e-4,
+                                   equal_nan=True)
+
+
+@requires_zarr
+def test_open_zarr_run_empty(tmpdir):
+    with pytest.raises(FileNotFoundError):
+        product_specification.open_zarr_run(str(tmpdir))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_netcdf_precision(tmpdir, dtype):
+    dataset = _dataset(5, 1.0)
+    dataset["ssh_karin"] = dataset.ssh_karin.astype(dtype)
+    ssh = dataset.ssh_karin.values.copy()
+    path = str(tmpdir.join("product.nc"))
+    product_specification.to_netcdf(
+        dataset,
+        path,
+        dict(ssh_karin=dict(dtype="int32", _FillValue=2147483647)),
+        mode="w")
+
+    # The undefined values are written as the fill value, without modifying
+    # the array provided.
+    np.testing.assert_array_equal(dataset.ssh_karin.values, ssh)
+    with netCDF4.Dataset(path) as stream:
+        variable = stream["ssh_karin"]
+        assert variable.dtype == np.int32
+        variable.set_auto_maskandscale(False)
+        values = variable[:]
+    assert np.all(values[:, 1] == 2147483647)
+    with xr.open_dataset(path) as ds:
+        np.testing.assert_allclose(ds.ssh_karin.values, ssh, atol=1e-4)
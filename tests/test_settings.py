@@ -0,0 +1,36 @@
+import importlib.util
+import os
+import pytest
+import swot_simulator.settings
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_zarr_requirements(monkeypatch):
+    overrides = dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                            "ephem_calval_june2015_ell.txt"),
+                     error_spectrum=os.path.join(ROOT, "..", "data",
+                                                 "error_spectrum.nc"),
+                     karin_noise=os.path.join(ROOT, "..", "data",
+                                              "karin_noise_v2.nc"),
+                     output_format="zarr")
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util, "find_spec", lambda name, *args: None
+        if name == "zarr" else find_spec(name, *args))
+    with pytest.raises(ValueError, match="zarr"):
+        swot_simulator.settings.Parameters(overrides)
+
+
+def test_none_overrides():
+    overrides = dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                            "ephem_calval_june2015_ell.txt"),
+                     error_spectrum=os.path.join(ROOT, "..", "data",
+                                                 "error_spectrum.nc"),
+                     karin_noise=os.path.join(ROOT, "..", "data",
+                                              "karin_noise_v2.nc"),
+                     cache_directory=None,
+                     error_cache_size=None)
+    parameters = swot_simulator.settings.Parameters(overrides)
+    assert parameters.cache_directory is None
+    assert parameters.error_cache_size is None
@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import swot_simulator.error.utils as utils
+import swot_simulator.error.wet_troposphere as wet_troposphere
+import swot_simulator.settings
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SIGMA = 6.0
+DELTA_AL = 2.0
+DELTA_AC = 2.0
+
+
+def _path_delay(sigma, radio, x_al, x_ac_large, wt_large, position=0):
+    """Path delay computed with the 2D gaussian footprint of the beam, as
+    done by the previous implementation."""
+    beam = np.empty((x_al.shape[0], ))
+    ind = x_ac_large + position
+    indac = np.where((ind < 2 * sigma) & (ind > -2 * sigma))[0]
+    slice_ac = slice(indac[0], indac[-1] + 1)
+    for idx, xal in enumerate(x_al):
+        delta_x_al = x_al - xal
+        indal = np.where((delta_x_al <= (2 * sigma))
+                         & (delta_x_al > (-2 * sigma)))[0]
+        slice_al = slice(indal[0], indal[-1] + 1)
+        x, y = np.meshgrid(x_ac_large[slice_ac], x_al[slice_al] - xal)
+        g = np.exp(-(x**2 + y**2) / (2 * sigma**2))
+        beam[idx] = np.sum(
+            g * wt_large[slice_al, slice_ac]) / np.sum(g) + radio[idx]
+    return beam
+
+
+def _synthetic_pass():
+    x_al = np.arange(40, dtype=np.float64) * DELTA_AL + 1000
+    x_ac = np.concatenate((-np.arange(10.0, 61.0, DELTA_AC)[::-1],
+                           np.arange(10.0, 61.0, DELTA_AC)))
+    x_ac_large = np.arange(-2 * SIGMA / DELTA_AC + x_ac[0],
+                           2 * SIGMA / DELTA_AC + x_ac[-1] + DELTA_AC,
+                           DELTA_AC)
+    random_state = np.random.RandomState(0)
+    wt_large = random_state.normal(size=(x_al.size, x_ac_large.size))
+    radio = random_state.normal(size=x_al.size)
+    return x_al, x_ac_large, wt_large, radio
+
+
+def test_gaussian_stencil():
+    weights, lower = wet_troposphere._gaussian_stencil(SIGMA, DELTA_AL)
+    offsets = (np.arange(weights.size) + lower) * DELTA_AL
+    assert offsets[0] > -2 * SIGMA
+    assert offsets[-1] <= 2 * SIGMA
+    assert np.all(weights <= 1)
+    assert np.max(weights) == 1
+
+
+def test_calculate_path_delay():
+    x_al, x_ac_large, wt_large, radio = _synthetic_pass()
+    stencil = wet_troposphere._gaussian_stencil(SIGMA, DELTA_AL)
+    beam = wet_troposphere._calculate_path_delay(SIGMA, stencil, radio,
+                                                 x_ac_large, wt_large)
+    np.testing.assert_allclose(
+        beam, _path_delay(SIGMA, radio, x_al, x_ac_large, wt_large))
+
+
+def test_calculate_path_delay_lr():
+    x_al, x_ac_large, wt_large, radio = _synthetic_pass()
+    stencil = wet_troposphere._gaussian_stencil(SIGMA, DELTA_AL)
+    beam_positions = [-20.0, 20.0]
+    beam_r, beam_l = wet_troposphere._calculate_path_delay_lr(
+        beam_positions, SIGMA, stencil, radio, -radio, x_ac_large, wt_large)
+    np.testing.assert_allclose(
+        beam_r,
+        _path_delay(SIGMA, radio, x_al, x_ac_large, wt_large,
+                    beam_positions[1]))
+    np.testing.assert_allclose(
+        beam_l,
+        _path_delay(SIGMA, -radio, x_al, x_ac_large, wt_large,
+                    beam_positions[0]))
+
+
+def test_synthesize_once(monkeypatch):
+    parameters = swot_simulator.settings.Parameters(
+        dict(ephemeris=os.path.join(ROOT, "..", "data",
+                                    "ephem_calval_june2015_ell.txt"),
+             error_spectrum=os.path.join(ROOT, "..", "data",
+                                         "error_spectrum.nc"),
+             karin_noise=os.path.join(ROOT, "..", "data",
+                                      "karin_noise_v2.nc")))
+    generator = wet_troposphere.WetTroposphere(parameters)
+    synthesize = generator._synthesize
+    calls = []
+
+    def _synthesize():
+        calls.append(None)
+        return synthesize()
+
+    monkeypatch.setattr(generator, "_synthesize", _synthesize)
+    x_al, x_ac_large, _, _ = _synthetic_pass()
+    x_ac = x_ac_large[3:-3]
+    for _ in range(2):
+        generator.generate(x_al, x_ac)
+    assert len(calls) == 1
+
+    # The swath and the large swath sampled from the same field are the
+    # fields synthesized separately by the previous implementation.
+    signal = generator.signal()
+    for item in [x_ac, x_ac_large]:
+        np.testing.assert_allclose(
+            signal(x_al, item),
+            utils.gen_signal_2d_rectangle(generator.ps2d,
+                                          generator.f,
+                                          x_al,
+                                          item,
+                                          fminx=generator.fminx,
+                                          fminy=1 / generator.LC_MAX,
+                                          fmax=generator.F_MAX,
+                                          alpha=generator.ALPHA,
+                                          nseed=generator.nseed))